@@ -2,7 +2,9 @@
 API Routes for Salus AI
 """
 
-from fastapi import APIRouter, HTTPException, Body
+import hmac
+import os
+from fastapi import APIRouter, HTTPException, Body, Header
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, List
 from app.services.ai_assistant import AIAssistantService
@@ -36,6 +38,11 @@ class NutritionRequest(BaseModel):
 class SessionRequest(BaseModel):
     session_id: str
 
+class SessionInfoRequest(BaseModel):
+    session_id: str
+    cursor: Optional[int] = Field(None, description="history_cursor of the previous page (omit for the newest messages)")
+    limit: Optional[int] = Field(None, ge=1, le=500, description="Messages per history page")
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -92,12 +99,15 @@ async def get_nutrition_advice(request: NutritionRequest):
         )
 
 @router.post("/session/info", response_model=ChatResponse)
-async def get_session_info(request: SessionRequest):
+async def get_session_info(request: SessionInfoRequest):
     """
     Get session information including conversation history and pet context
+    
+    History is paged from newest to oldest: pass the returned history_cursor
+    to fetch the previous page.
     """
     try:
-        session_info = ai_assistant.get_session_info(request.session_id)
+        session_info = ai_assistant.get_session_info(request.session_id, request.cursor, request.limit)
         
         return ChatResponse(
             success=True,
@@ -131,6 +141,91 @@ async def clear_session(request: SessionRequest):
             error=str(e)
         )
 
+@router.post("/session/storage", response_model=ChatResponse)
+async def get_session_storage(request: SessionRequest):
+    """
+    Get stored size and encode/decode cost of a session's history compared with plain JSON
+    """
+    try:
+        report = ai_assistant.get_session_storage_report(request.session_id)
+        
+        return ChatResponse(
+            success=True,
+            data=report
+        )
+    
+    except Exception as e:
+        print(f"Session storage error: {str(e)}")
+        return ChatResponse(
+            success=False,
+            error=str(e)
+        )
+
+@router.get("/sessions/stats")
+async def get_session_stats():
+    """
+    Get session store metrics (connection pools, Redis outages and reconnects, buffered writes, caches)
+    """
+    return {
+        "success": True,
+        "data": ai_assistant.session.get_session_stats()
+    }
+
+@router.get("/datasets/stats")
+async def get_dataset_stats():
+    """
+    Get dataset retrieval metrics (cache hit rate, dataset version)
+    """
+    return {
+        "success": True,
+        "data": {
+            "cache": ai_assistant.dataset.get_cache_stats(),
+            "ingest": ai_assistant.dataset.ingest_stats,
+            "normalization": ai_assistant.dataset.snapshot.normalization
+        }
+    }
+
+@router.post("/datasets/reload")
+async def reload_datasets(x_admin_token: Optional[str] = Header(None)):
+    """
+    Rebuild the datasets and indexes in the background and swap them in atomically
+    """
+    admin_token = os.getenv("ADMIN_API_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_TOKEN is not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    
+    started = ai_assistant.dataset.reload_datasets()
+    return {
+        "success": True,
+        "data": {
+            "reload_started": started,
+            "message": "Reload started" if started else "A reload is already in progress",
+            "status": ai_assistant.dataset.get_reload_status()
+        }
+    }
+
+@router.get("/datasets/reload")
+async def get_reload_status():
+    """
+    Get the current dataset version and the outcome of the last reload
+    """
+    return {
+        "success": True,
+        "data": ai_assistant.dataset.get_reload_status()
+    }
+
+@router.get("/datasets/memory")
+async def get_dataset_memory():
+    """
+    Get per-dataset memory usage compared with plain-string storage
+    """
+    return {
+        "success": True,
+        "data": ai_assistant.dataset.get_memory_report()
+    }
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,197 @@
+"""
+In-process caching primitives for Salus AI
+Small, thread-safe building blocks shared by the services
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with hit-rate metrics.
+
+    All operations are O(1) and guarded by a lock so the cache can be
+    shared between request threads.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Args:
+            maxsize: Maximum number of entries kept (0 disables caching)
+        """
+        self.maxsize = max(0, int(maxsize))
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key (marking it recently used) or default"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        """Insert or refresh a value, evicting the least recently used entry if full"""
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (metrics are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return size and hit-rate metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class TTLLRUCache:
+    """
+    Bounded cache whose entries also expire a fixed time after last use.
+
+    Capped by entry count and, optionally, by total size as measured by a
+    sizeof callable; the least recently used entries are evicted first.
+    Every read or write restarts an entry's TTL, so recency order is also
+    expiry order: expired entries always sit at the LRU end and are purged
+    from there, keeping every operation O(1) amortized.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 86400, max_bytes: int = 0,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        """
+        Args:
+            maxsize: Maximum number of entries kept
+            ttl: Seconds an entry lives after its last read or write
+            max_bytes: Maximum total entry size (0 = no size cap)
+            sizeof: Entry size estimate in bytes (required for max_bytes)
+        """
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.max_bytes = max(0, int(max_bytes)) if sizeof else 0
+        self.sizeof = sizeof
+        # key → [value, expires_at, size]
+        self._data: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _purge_expired(self, now: float):
+        while self._data:
+            entry = next(iter(self._data.values()))
+            if entry[1] > now:
+                break
+            self._data.popitem(last=False)
+            self.bytes -= entry[2]
+            self.expirations += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the live value for key (restarting its TTL) or default"""
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            entry[1] = now + self.ttl
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        """Insert or replace a value (re-measuring its size), evicting LRU entries over the caps"""
+        size = self.sizeof(value) if self.sizeof else 0
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._data[key] = [value, now + self.ttl, size]
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes and len(self._data) > 1):
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= evicted[2]
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return a value (or default)"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            self.bytes -= entry[2]
+            return entry[0]
+
+    def values(self) -> List[Any]:
+        """Snapshot of the live values, least recently used first (O(n))"""
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return [entry[0] for entry in self._data.values()]
+
+    def clear(self):
+        """Drop every entry (metrics are kept)"""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return key in self._data
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return size, eviction and hit-rate metrics"""
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -34,142 +34,146 @@ class AIAssistantService:
             Dict with response and metadata
         """
         try:
-            # Get or create session
-            session = self.session.get_session(session_id)
-            
-            # Add user message to history
-            self.session.add_message(session_id, "user", user_message)
-            
-            # Detect emergency
-            emergency_info = self.llm.detect_emergency(user_message)
-            is_emergency = emergency_info["is_emergency"]
-            
-            if is_emergency:
-                self.session.mark_emergency(session_id)
-            
-            # Get pet context from session for consistent usage
-            pet_context = self.session.get_pet_context(session_id)
-
-            # Detect intent: Find Vets/Hospital
-            msg_lower = user_message.lower()
-            if any(k in msg_lower for k in ["vet", "veterinary", "clinic", "hospital", "doctor"]) and \
-               any(k in msg_lower for k in ["find", "search", "near", "location", "where", "closest", "around"]):
+            # Load the session once; every change below is written back in one
+            # round trip when the block exits (also on early return or error)
+            with self.session.unit_of_work(session_id) as session:
+                # Add user message to history
+                session.add_message("user", user_message)
                 
-                # If we don't have location yet, request it
-                if not user_location:
-                    return {
-                        "response": "I can help you find veterinary clinics nearby. To provide accurate recommendations, I need to know your current location. Please allow access when prompted.",
-                        "is_emergency": False, # Explicitly False for location requests
-                        "session_id": session_id,
-                        "action_required": "request_location",
-                        "pet_context": pet_context
-                    }
-                else:
-                    # User provided location, fetch real data (or mock)
-                    from app.services.places_service import PlacesService
-                    places_service = PlacesService()
-                    # Extract lat/lng from user_location dict
-                    lat = user_location.get("latitude", 0)
-                    lng = user_location.get("longitude", 0)
-                    
-                    clinics = places_service.search_nearby_vets(lat, lng)
-                    
-                    # Tailor response message based on whether results are exact or fallback
-                    is_fallback = clinics and clinics[0].get("is_nearby_fallback", False)
-                    user_city = clinics[0].get("user_city") if clinics else None
-                    fallback_city = clinics[0].get("fallback_city") if clinics else None
+                # Detect emergency
+                emergency_info = self.llm.detect_emergency(user_message)
+                is_emergency = emergency_info["is_emergency"]
+                
+                if is_emergency:
+                    session.mark_emergency()
+                
+                # Get pet context from session for consistent usage
+                pet_context = session.pet_context
 
-                    if clinics and is_fallback:
-                        # Build specific message: "couldn't find in Ahmednagar, showing Pune"
-                        if user_city and fallback_city and user_city.lower() != fallback_city.lower():
-                            response_msg = (
-                                f"I couldn't find any veterinary clinics in **{user_city}** through our current map provider. "
-                                f"The nearest I found were in **{fallback_city}** — they may be a drive away, but can definitely help your pet. 🐾"
-                            )
-                        elif fallback_city:
-                            response_msg = (
-                                f"No clinics were found in your immediate area, so I've expanded the search. "
-                                f"Here are the nearest veterinary clinics found in **{fallback_city}**:"
-                            )
-                        else:
-                            response_msg = "No clinics were found nearby, so I've expanded the search to a wider region. Here are the closest available:"
-                    elif clinics:
-                        response_msg = "Here are veterinary clinics I found near your location:"
-                    else:
-                        response_msg = "I wasn't able to find any veterinary clinics nearby using our current map data. Our data coverage may be limited in your area. Please try searching on Google Maps directly."
+                # Detect intent: Find Vets/Hospital
+                msg_lower = user_message.lower()
+                if any(k in msg_lower for k in ["vet", "veterinary", "clinic", "hospital", "doctor"]) and \
+                   any(k in msg_lower for k in ["find", "search", "near", "location", "where", "closest", "around"]):
                     
-                    return {
-                        "response": response_msg,
-                        "is_emergency": False,
-                        "session_id": session_id,
-                        "action_required": "show_places",
-                        "places_data": clinics,
-                        "pet_context": pet_context
-                    }
-
-            # Get relevant context from datasets (RAG)
-            dataset_context = self.dataset.get_context_for_query(user_message)
-            
-            # Get conversation history (use provided or fetch from session)
-            if conversation_history is None:
-                conversation_history = self.session.get_conversation_history(session_id)
-                # Get pet context from session only if not already retrieved (though we retrieved it above, this handles branching)
-                pet_context = self.session.get_pet_context(session_id)
-            else:
-                # If using custom history (branching), ignore stored pet context to prevent mixing
-                # The AI will rely on the provided history to infer context
-                pet_context = {}
-            
-            # Build enhanced prompt with dataset context
-            
-            # Build enhanced prompt with dataset context
-            enhanced_message = user_message
-            if dataset_context:
-                enhanced_message = f"""Based on the following veterinary knowledge:
-
-{dataset_context}
+                    # If we don't have location yet, request it
+                    if not user_location:
+                        return {
+                            "response": "I can help you find veterinary clinics nearby. To provide accurate recommendations, I need to know your current location. Please allow access when prompted.",
+                            "is_emergency": False, # Explicitly False for location requests
+                            "session_id": session_id,
+                            "action_required": "request_location",
+                            "pet_context": pet_context
+                        }
+                    else:
+                        # User provided location, fetch real data (or mock)
+                        from app.services.places_service import PlacesService
+                        places_service = PlacesService()
+                        # Extract lat/lng from user_location dict
+                        lat = user_location.get("latitude", 0)
+                        lng = user_location.get("longitude", 0)
+                        
+                        clinics = places_service.search_nearby_vets(lat, lng)
+                        
+                        # Tailor response message based on whether results are exact or fallback
+                        is_fallback = clinics and clinics[0].get("is_nearby_fallback", False)
+                        user_city = clinics[0].get("user_city") if clinics else None
+                        fallback_city = clinics[0].get("fallback_city") if clinics else None
 
-User's question: {user_message}
+                        if clinics and is_fallback:
+                            # Build specific message: "couldn't find in Ahmednagar, showing Pune"
+                            if user_city and fallback_city and user_city.lower() != fallback_city.lower():
+                                response_msg = (
+                                    f"I couldn't find any veterinary clinics in **{user_city}** through our current map provider. "
+                                    f"The nearest I found were in **{fallback_city}** — they may be a drive away, but can definitely help your pet. 🐾"
+                                )
+                            elif fallback_city:
+                                response_msg = (
+                                    f"No clinics were found in your immediate area, so I've expanded the search. "
+                                    f"Here are the nearest veterinary clinics found in **{fallback_city}**:"
+                                )
+                            else:
+                                response_msg = "No clinics were found nearby, so I've expanded the search to a wider region. Here are the closest available:"
+                        elif clinics:
+                            response_msg = "Here are veterinary clinics I found near your location:"
+                        else:
+                            response_msg = "I wasn't able to find any veterinary clinics nearby using our current map data. Our data coverage may be limited in your area. Please try searching on Google Maps directly."
+                        
+                        return {
+                            "response": response_msg,
+                            "is_emergency": False,
+                            "session_id": session_id,
+                            "action_required": "show_places",
+                            "places_data": clinics,
+                            "pet_context": pet_context
+                        }
 
-Please provide a helpful, accurate response using the above information as reference."""
-            
-            # Generate AI response
-            ai_response = self.llm.generate_response(
-                user_message=enhanced_message,
-                conversation_history=conversation_history,
-                pet_context=pet_context
-            )
-            
-            # Add AI response to history
-            self.session.add_message(session_id, "assistant", ai_response)
-            
-            # Prepare response
-            response_data = {
-                "response": ai_response,
-                "is_emergency": is_emergency,
-                "emergency_severity": emergency_info["severity"],
-                "session_id": session_id,
-                "message_count": session["message_count"],
-                "pet_context": pet_context
-            }
-            
-            # Add action buttons for emergencies
-            if is_emergency:
-                response_data["suggested_actions"] = [
-                    {
-                        "type": "connect_vet_online",
-                        "label": "Connect with Vet Online",
-                        "priority": "high"
-                    },
-                    {
-                        "type": "find_vet_nearby",
-                        "label": "Find Vet Clinic Nearby",
-                        "priority": "high"
-                    }
-                ]
-            
-            return response_data
-            
+                # Get conversation history (use provided or fetch from session)
+                if conversation_history is None:
+                    conversation_history = session.get_conversation_history()
+                else:
+                    # If using custom history (branching), ignore stored pet context to prevent mixing
+                    # The AI will rely on the provided history to infer context
+                    pet_context = {}
+                
+                # Get relevant context from datasets (RAG), filtered to the pet's species/breed
+                dataset_context = self.dataset.get_context_for_query(user_message, pet_context)
+                
+                # Local differential diagnosis from the symptom datasets
+                local_assessment = self.dataset.score_symptoms(user_message, pet_context)
+                
+                # Build enhanced prompt with dataset context
+                enhanced_message = user_message
+                if dataset_context:
+                    enhanced_message = "\n".join([
+                        "Based on the following veterinary knowledge:",
+                        "",
+                        dataset_context,
+                        "",
+                        f"User's question: {user_message}",
+                        "",
+                        "Please provide a helpful, accurate response using the above information as reference."
+                    ])
+                
+                # Generate AI response
+                ai_response = self.llm.generate_response(
+                    user_message=enhanced_message,
+                    conversation_history=conversation_history,
+                    pet_context=pet_context
+                )
+                
+                # Add AI response to history
+                session.add_message("assistant", ai_response)
+                
+                # Prepare response
+                response_data = {
+                    "response": ai_response,
+                    "is_emergency": is_emergency,
+                    "emergency_severity": emergency_info["severity"],
+                    "session_id": session_id,
+                    "message_count": session.message_count,
+                    "pet_context": pet_context
+                }
+                
+                if local_assessment["candidates"]:
+                    response_data["local_assessment"] = local_assessment
+                
+                # Add action buttons for emergencies
+                if is_emergency:
+                    response_data["suggested_actions"] = [
+                        {
+                            "type": "connect_vet_online",
+                            "label": "Connect with Vet Online",
+                            "priority": "high"
+                        },
+                        {
+                            "type": "find_vet_nearby",
+                            "label": "Find Vet Clinic Nearby",
+                            "priority": "high"
+                        }
+                    ]
+                
+                return response_data
+                
         except Exception as e:
             print(f"Error processing message: {str(e)}")
             return {
@@ -230,10 +234,30 @@ Please provide additional personalized advice, feeding schedules, and portion re
             "session_id": session_id
         }
     
-    def get_session_info(self, session_id: str) -> Dict:
-        """Get session information"""
-        return self.session.get_session(session_id)
+    def get_session_info(self, session_id: str, cursor: Optional[int] = None, limit: Optional[int] = None) -> Dict:
+        """
+        Get session information with one page of its conversation history
+        
+        Args:
+            session_id: Session ID
+            cursor: history_cursor from the previous call (None = newest messages)
+            limit: Messages per page (defaults to the history kept in Redis)
+        
+        Returns:
+            Session dict; history_cursor fetches the next older page (None when there is none)
+        """
+        # Metadata only (one history entry): the page below reads the history
+        session = self.session.get_session(session_id, history_limit=1)
+        page = self.session.get_history_page(session_id, cursor, limit or self.session.history_limit)
+        if page is not None:
+            session["conversation_history"] = page["messages"]
+            session["history_cursor"] = page["next_cursor"]
+        return session
     
     def clear_session(self, session_id: str):
         """Clear a session"""
         self.session.clear_session(session_id)
+    
+    def get_session_storage_report(self, session_id: str) -> Dict:
+        """Get stored size and encode/decode cost of a session's history"""
+        return self.session.get_storage_report(session_id)
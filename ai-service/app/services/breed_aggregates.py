@@ -0,0 +1,145 @@
+"""
+Breed Aggregates - Precomputed per-breed health statistics
+Summarizes the dog breed health dataset once at load time so breed lookups
+are a dictionary access instead of a table scan
+"""
+
+import pandas as pd
+from typing import Dict, List, Optional
+
+from app.services.dataset_compact import as_flag
+
+# Source columns in 04_dog_breed_health.csv
+BREED_COLUMN = "Breed"
+DISTRIBUTION_COLUMNS = {
+    "activity_levels": "Daily Activity Level",
+    "diets": "Diet",
+}
+
+
+def _yes_rate(series: pd.Series) -> pd.Series:
+    """Share of "Yes" among the non-missing Yes/No answers"""
+    return as_flag(series).astype("Float64").astype("float64")
+
+
+def build_breed_aggregates(df: pd.DataFrame) -> Dict[str, Dict]:
+    """
+    Group the breed health dataset by breed with vectorized aggregations
+
+    Args:
+        df: The 04_dog_breed_health.csv table
+
+    Returns:
+        Dict of lowercased breed name → aggregate stats
+    """
+    if BREED_COLUMN not in df.columns or df.empty:
+        return {}
+
+    breeds = df[BREED_COLUMN].astype("string").str.strip()
+    frame = pd.DataFrame({
+        "breed": breeds,
+        "healthy": _yes_rate(df["Healthy"]),
+        "seizures": _yes_rate(df["Seizures"]),
+        "medications": _yes_rate(df["Medications"]),
+        "weight_lbs": pd.to_numeric(df["Weight (lbs)"], errors="coerce"),
+        "age": pd.to_numeric(df["Age"], errors="coerce"),
+        "vet_visits": pd.to_numeric(df["Annual Vet Visits"], errors="coerce"),
+        "walk_miles": pd.to_numeric(df["Daily Walk Distance (miles)"], errors="coerce"),
+        "sleep_hours": pd.to_numeric(df["Hours of Sleep"], errors="coerce"),
+    }).dropna(subset=["breed"])
+
+    grouped = frame.groupby("breed", sort=True)
+    stats = grouped.agg(
+        records=("breed", "size"),
+        healthy_rate=("healthy", "mean"),
+        seizure_prevalence=("seizures", "mean"),
+        medication_rate=("medications", "mean"),
+        median_weight_lbs=("weight_lbs", "median"),
+        median_age=("age", "median"),
+        mean_vet_visits=("vet_visits", "mean"),
+        median_vet_visits=("vet_visits", "median"),
+        mean_walk_miles=("walk_miles", "mean"),
+        mean_sleep_hours=("sleep_hours", "mean"),
+    ).round(3)
+
+    sizes = (
+        df.assign(breed=breeds)
+        .dropna(subset=["breed", "Breed Size"])
+        .groupby("breed")["Breed Size"]
+        .agg(lambda s: s.value_counts().idxmax())
+    )
+
+    distributions = {}
+    for name, column in DISTRIBUTION_COLUMNS.items():
+        table = pd.crosstab(breeds, df[column], normalize="index").round(3)
+        distributions[name] = table
+
+    aggregates: Dict[str, Dict] = {}
+    for breed, row in stats.to_dict("index").items():
+        entry = {"breed": breed, "breed_size": sizes.get(breed)}
+        entry.update({key: (None if pd.isna(value) else value) for key, value in row.items()})
+        for name, table in distributions.items():
+            if breed in table.index:
+                shares = table.loc[breed]
+                entry[name] = {str(k): float(v) for k, v in shares[shares > 0].sort_values(ascending=False).items()}
+            else:
+                entry[name] = {}
+        aggregates[breed.lower()] = entry
+
+    overall = {
+        "healthy_rate": float(frame["healthy"].mean()),
+        "seizure_prevalence": float(frame["seizures"].mean()),
+        "median_weight_lbs": float(frame["weight_lbs"].median()),
+    }
+    for entry in aggregates.values():
+        entry["dataset_average"] = overall
+
+    return aggregates
+
+
+def lookup_breed(aggregates: Dict[str, Dict], breed: str) -> Optional[Dict]:
+    """Find a breed's aggregates by exact name, falling back to a partial match"""
+    key = breed.strip().lower()
+    if not key:
+        return None
+    if key in aggregates:
+        return aggregates[key]
+    for name, entry in aggregates.items():
+        if key in name or name in key:
+            return entry
+    return None
+
+
+def breed_nutrition_notes(stats: Dict) -> List[str]:
+    """Turn a breed's aggregates into short nutrition-relevant notes"""
+    notes = []
+    baseline = stats.get("dataset_average", {})
+
+    weight = stats.get("median_weight_lbs")
+    if weight:
+        size = f" ({stats['breed_size'].lower()} breed)" if stats.get("breed_size") else ""
+        notes.append(f"- Typical adult weight in our records: ~{weight:.0f} lbs ({weight * 0.4536:.0f} kg){size}")
+
+    activity = stats.get("activity_levels") or {}
+    if activity:
+        level, share = next(iter(activity.items()))
+        notes.append(f"- Most common activity level: {level} ({share:.0%}) — match calories to your dog's actual activity")
+
+    diets = stats.get("diets") or {}
+    if diets:
+        mix = ", ".join(f"{diet} {share:.0%}" for diet, share in list(diets.items())[:3])
+        notes.append(f"- Diets seen for this breed: {mix}")
+
+    healthy = stats.get("healthy_rate")
+    if healthy is not None:
+        notes.append(f"- {healthy:.0%} of recorded dogs of this breed were healthy")
+
+    seizures = stats.get("seizure_prevalence")
+    if seizures is not None and seizures > baseline.get("seizure_prevalence", 1):
+        notes.append(f"- Seizure prevalence ({seizures:.1%}) is above average — avoid sudden diet changes and discuss supplements with your vet")
+
+    visits = stats.get("mean_vet_visits")
+    if visits is not None:
+        notes.append(f"- Average {visits:.1f} vet visits per year — include a weight and diet review at each")
+
+    return notes
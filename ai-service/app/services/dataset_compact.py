@@ -0,0 +1,148 @@
+"""
+Dataset Compaction - Categorical and boolean column encoding
+Repetitive text columns (species, breeds, symptoms, diagnoses) become integer
+codes into one string pool shared by every dataset, and Yes/No columns become
+nullable boolean arrays
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+YES_NO = {"Yes": True, "No": False, "yes": True, "no": False}
+
+
+class StringPool:
+    """
+    Append-only pool of distinct strings shared by all categorical columns.
+
+    Every categorical column uses the pool as its category list, so equal
+    strings have equal codes in every column and dataset, and a text
+    predicate can be evaluated once per pool entry instead of once per row.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._values: List[str] = []
+        self._dtype: Optional[pd.CategoricalDtype] = None
+        self._lowered: Optional[pd.Series] = None
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, values) -> bool:
+        """Add unseen strings; returns True when the pool grew"""
+        grew = False
+        for value in values:
+            if isinstance(value, str) and value not in self._index:
+                self._index[value] = len(self._values)
+                self._values.append(value)
+                grew = True
+        if grew:
+            self._dtype = None
+            self._lowered = None
+        return grew
+
+    @property
+    def dtype(self) -> pd.CategoricalDtype:
+        """Categorical dtype over the current pool contents"""
+        if self._dtype is None:
+            self._dtype = pd.CategoricalDtype(pd.Index(self._values, dtype=object))
+        return self._dtype
+
+    @property
+    def categories(self) -> pd.Index:
+        return self.dtype.categories
+
+    @property
+    def lowered(self) -> pd.Series:
+        """Lowercased pool entries, computed once per pool state"""
+        if self._lowered is None:
+            self._lowered = pd.Series(self._values, dtype=object).str.lower()
+        return self._lowered
+
+
+def as_flag(series: pd.Series) -> pd.Series:
+    """View a Yes/No column as nullable booleans (already-compacted columns pass through)"""
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype("boolean")
+    return series.map(YES_NO).astype("boolean")
+
+
+class DatasetCompactor:
+    """
+    Per-dataset chunk transform that encodes the configured columns.
+
+    Args:
+        pool: Shared string pool
+        categorical: Columns to store as pool-coded categoricals
+        flags: Yes/No columns to store as nullable booleans
+    """
+
+    def __init__(self, pool: StringPool, categorical: List[str] = (), flags: List[str] = ()):
+        self.pool = pool
+        self.categorical = list(categorical)
+        self.flags = list(flags)
+
+    def compact(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Encode one chunk in place of its text columns"""
+        columns = [c for c in self.categorical if c in chunk.columns]
+        for column in columns:
+            self.pool.add(pd.unique(chunk[column].dropna()))
+        dtype = self.pool.dtype
+        for column in columns:
+            chunk[column] = chunk[column].astype(object).astype(dtype)
+        for column in self.flags:
+            if column in chunk.columns:
+                chunk[column] = as_flag(chunk[column])
+        return chunk
+
+
+def align_categories(frame: pd.DataFrame, pool: StringPool) -> pd.DataFrame:
+    """Re-point categorical columns at the final pool (codes of existing entries are unchanged)"""
+    dtype = pool.dtype
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype) and frame[column].dtype != dtype:
+            frame[column] = frame[column].cat.set_categories(dtype.categories)
+    return frame
+
+
+def pool_count(pool: StringPool, pattern) -> np.ndarray:
+    """Regex match counts evaluated once per pool entry"""
+    if len(pool) == 0:
+        return np.zeros(0, dtype=np.int32)
+    return pool.lowered.str.count(pattern).to_numpy(dtype=np.int32)
+
+
+def memory_report(frame: pd.DataFrame) -> Dict:
+    """
+    Resident memory of a dataset, and what its encoded columns would cost as
+    plain Python strings
+
+    Returns:
+        Dict with rows, bytes, object_bytes (uncompacted estimate) and
+        a per-column breakdown
+    """
+    columns = {}
+    total = compact_total = 0
+    for column in frame.columns:
+        series = frame[column]
+        compact_bytes = int(series.memory_usage(deep=True, index=False))
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Shared categories are counted once for the pool, not per column
+            compact_bytes = int(series.cat.codes.memory_usage(index=False))
+            object_bytes = int(series.astype(object).memory_usage(deep=True, index=False))
+        elif pd.api.types.is_bool_dtype(series):
+            object_bytes = int(series.map({True: "Yes", False: "No"}).astype(object).memory_usage(deep=True, index=False))
+        else:
+            object_bytes = compact_bytes
+        columns[column] = {"dtype": str(series.dtype), "bytes": compact_bytes, "object_bytes": object_bytes}
+        total += object_bytes
+        compact_total += compact_bytes
+    return {
+        "rows": len(frame),
+        "bytes": compact_total,
+        "object_bytes": total,
+        "ratio": round(total / compact_total, 2) if compact_total else None,
+        "columns": columns,
+    }
@@ -0,0 +1,201 @@
+"""
+Dataset Ingest - Chunked streaming CSV ingestion
+Reads veterinary CSV exports chunk by chunk, normalizes each chunk and hands
+it to incremental consumers (indexes, collectors), so the raw parsed table is
+never held in memory at once; only what the consumers keep survives a chunk.
+Large files can be parsed across a process pool.
+
+Peak memory is still O(rows) when a FrameCollector is among the consumers,
+as it is for every dataset the service loads: the service answers queries
+from the in-memory frames, so the whole compacted table is kept (and
+briefly held twice while the chunks are concatenated). Streaming bounds
+the parse, not the result.
+"""
+
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# Rows per chunk in serial mode, bytes per chunk in parallel mode
+DEFAULT_CHUNK_ROWS = int(os.getenv("DATASET_CHUNK_ROWS", "50000"))
+DEFAULT_CHUNK_BYTES = int(os.getenv("DATASET_CHUNK_BYTES", str(16 * 1024 * 1024)))
+
+# Parser processes (1 = parse in-process, 0 = one per CPU)
+DEFAULT_WORKERS = int(os.getenv("DATASET_INGEST_WORKERS", "1"))
+
+# Seconds between progress lines for long ingests
+PROGRESS_INTERVAL = 2.0
+
+
+def normalize_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Light per-chunk cleanup applied during ingestion
+
+    Trims and collapses whitespace in text columns, turns empty strings into
+    missing values and drops rows with no data at all.
+    """
+    for column in chunk.columns:
+        if pd.api.types.is_string_dtype(chunk[column]):
+            cleaned = chunk[column].str.split().str.join(" ")
+            chunk[column] = cleaned.replace("", np.nan)
+    return chunk.dropna(how="all")
+
+
+class IngestStats:
+    """Progress and throughput of one ingestion run"""
+
+    def __init__(self, name: str, total_bytes: int):
+        self.name = name
+        self.total_bytes = total_bytes
+        self.rows = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def add(self, rows: int):
+        self.rows += rows
+        self.chunks += 1
+        now = time.perf_counter()
+        if now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            print(f"  … {self.name}: {self.rows:,} rows ({self.rows_per_sec:,.0f} rows/s)")
+
+    def as_dict(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "bytes": self.total_bytes,
+            "seconds": round(self.elapsed, 3),
+            "rows_per_sec": round(self.rows_per_sec),
+        }
+
+
+def _byte_ranges(path: Path, chunk_bytes: int) -> Iterator[tuple]:
+    """
+    Split a CSV body into byte ranges that end on line boundaries.
+
+    Assumes one record per line (no quoted newlines), which holds for the
+    exports we ingest; serial mode has no such restriction.
+    """
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        f.readline()  # header
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            yield start, end
+            start = end
+
+
+def _parse_range(path: str, columns: List[str], start: int, end: int,
+                 normalizer: Optional[Callable]) -> pd.DataFrame:
+    """Worker: parse and normalize one byte range of a CSV file"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    chunk = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+    return normalizer(chunk) if normalizer else chunk
+
+
+def stream_csv(path: Path, chunk_rows: int = None, chunk_bytes: int = None,
+               workers: int = None, normalizer: Optional[Callable] = normalize_chunk) -> Iterator[pd.DataFrame]:
+    """
+    Yield normalized chunks of a CSV file in file order
+
+    Args:
+        path: CSV file
+        chunk_rows: Rows per chunk when parsing in-process
+        chunk_bytes: Bytes per chunk when parsing in a process pool
+        workers: Parser processes (1 = in-process, 0 = one per CPU)
+        normalizer: Picklable function applied to each parsed chunk
+
+    At most 2 × workers chunks are in flight, so memory stays bounded by the
+    chunk size regardless of the file size.
+    """
+    chunk_rows = chunk_rows or DEFAULT_CHUNK_ROWS
+    chunk_bytes = chunk_bytes or DEFAULT_CHUNK_BYTES
+    workers = DEFAULT_WORKERS if workers is None else workers
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or path.stat().st_size <= chunk_bytes:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            yield normalizer(chunk) if normalizer else chunk
+        return
+
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    ranges = _byte_ranges(path, chunk_bytes)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for start, end in ranges:
+            pending.append(pool.submit(_parse_range, str(path), columns, start, end, normalizer))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+class FrameCollector:
+    """
+    Consumer that keeps the normalized chunks and concatenates them once at the end
+
+    Holds every chunk it is given, so its memory grows with the dataset
+    (about twice the final frame during finalize); it is meant for tables
+    that are served from memory afterwards, not for bounding ingest memory.
+    """
+
+    def __init__(self):
+        self._chunks: List[pd.DataFrame] = []
+
+    def add_chunk(self, chunk: pd.DataFrame):
+        self._chunks.append(chunk)
+
+    def finalize(self) -> pd.DataFrame:
+        if not self._chunks:
+            return pd.DataFrame()
+        frame = pd.concat(self._chunks, ignore_index=True) if len(self._chunks) > 1 else self._chunks[0].reset_index(drop=True)
+        self._chunks = []
+        return frame
+
+
+def ingest_csv(name: str, path: Path, consumers: Iterable = (),
+               transform: Optional[Callable] = None, **stream_options) -> IngestStats:
+    """
+    Stream a CSV file through a set of incremental consumers
+
+    Args:
+        name: Dataset name used in progress output
+        path: CSV file
+        consumers: Objects with add_chunk(chunk); each sees every chunk in order
+        transform: Optional stateful chunk transform run in this process
+                   before the consumers (e.g. categorical encoding)
+        stream_options: Passed to stream_csv
+
+    Returns:
+        IngestStats for the run
+    """
+    consumers = list(consumers)
+    stats = IngestStats(name, path.stat().st_size)
+    for chunk in stream_csv(path, **stream_options):
+        if transform:
+            chunk = transform(chunk)
+        for consumer in consumers:
+            consumer.add_chunk(chunk)
+        stats.add(len(chunk))
+    return stats
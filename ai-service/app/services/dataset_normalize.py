@@ -0,0 +1,324 @@
+"""
+Dataset Normalization - Canonical species, symptom and condition labels
+Cleans the noisy raw exports (mixed-case species, misspelled symptoms, empty
+cells, symptoms repeated within a row, duplicate rows) so every index built on
+top of them sees one spelling per concept
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.services.facet_index import canonical_species
+
+# Misspellings and variant spellings → canonical symptom (all lowercase).
+# Entries are applied after lowercasing and whitespace/punctuation cleanup.
+SYMPTOM_SYNONYMS: Dict[str, str] = {
+    # appetite
+    "appetite loss": "loss of appetite",
+    "loss od appetite": "loss of appetite",
+    "loss of appettite": "loss of appetite",
+    "loss of eat": "loss of appetite",
+    "lack of appetite": "loss of appetite",
+    "decrease appetite": "decreased appetite",
+    "reduced appetite": "decreased appetite",
+    "inappentence": "inappetence",
+    "anoxeria": "anorexia",
+    "stopped eat": "stop eating",
+    "no appp": "loss of appetite",
+    # gastrointestinal
+    "vomitting": "vomiting",
+    "periodic vommiting": "periodic vomiting",
+    "diarrhoea": "diarrhea",
+    "bloody diarhhea": "bloody diarrhea",
+    "diarrhea with muscus": "diarrhea with mucus",
+    "watering diarrhea": "watery diarrhea",
+    "abdminal pain": "abdominal pain",
+    "abdonormal pain": "abdominal pain",
+    "abdonormal discomfort": "abdominal discomfort",
+    "abdominal destention": "abdominal distension",
+    "blood in faces": "blood in stool",
+    "blood on faces": "blood in stool",
+    "blood stool": "blood in stool",
+    "gasc": "gas",
+    "nause": "nausea",
+    "tensemus": "tenesmus",
+    # respiratory
+    "cough": "coughing",
+    "sneeze": "sneezing",
+    "diffculty breathing": "difficulty breathing",
+    "difficultty in breathing": "difficulty breathing",
+    "difficulty in breathing": "difficulty breathing",
+    "difficulty breating": "difficulty breathing",
+    "difficult in respiration": "difficulty breathing",
+    "lound breathing": "loud breathing",
+    "pnemonia": "pneumonia",
+    "tachypea": "tachypnea",
+    "hemopytsis": "hemoptysis",
+    "nosebleed": "nosebleeds",
+    "nose bleeds": "nosebleeds",
+    "bleeding from the nose": "nosebleeds",
+    "nasal bleeding": "nosebleeds",
+    "sour throat": "sore throat",
+    # general / systemic
+    "seizuers": "seizures",
+    "convulsion": "convulsions",
+    "aneamia": "anemia",
+    "anaemia": "anemia",
+    "fatique": "fatigue",
+    "lathargy": "lethargy",
+    "weekness": "weakness",
+    "week legs": "weak legs",
+    "week pulse": "weak pulse",
+    "despression": "depression",
+    "dull ness": "dullness",
+    "dizzines": "dizziness",
+    "weightloss": "weight loss",
+    "loss in weight": "weight loss",
+    "high body temperaure": "fever",
+    "high temperature": "fever",
+    "high body temperature": "fever",
+    "pyrexia": "fever",
+    "deability": "debility",
+    "lllthrift": "ill thrift",
+    "exessive urination": "excessive urination",
+    "thrist and urination": "thirst and urination",
+    "polydipsa": "polydipsia",
+    "blood poisioning": "blood poisoning",
+    "excession salivation": "excessive salivation",
+    "excess salivation": "excessive salivation",
+    "excess salivary": "excessive salivation",
+    "excessive drooling": "drooling",
+    "muscle twiching": "muscle twitching",
+    "muscles ache": "muscle aches",
+    "join pains": "joint pain",
+    "painfull": "painful",
+    "painfull to touch": "painful to touch",
+    "painfull swalling": "painful swallowing",
+    "moist and painfull": "moist and painful",
+    "swollen and painfull": "swollen and painful",
+    "pains": "pain",
+    "tremor": "tremors",
+    # skin / coat / eyes
+    "lossened teeth": "loosened teeth",
+    "teeth griding": "grinding teeth",
+    "grinding of teeth": "grinding teeth",
+    "skin reashes": "skin rashes",
+    "skin lesion": "skin lesions",
+    "lession on the skin": "skin lesions",
+    "lession on cat skin": "skin lesions",
+    "pox lession on skin": "pox lesion",
+    "lesions": "lesion",
+    "skin colour change": "skin color change",
+    "thivk skin": "thick skin",
+    "thicked skin": "thick skin",
+    "scartch": "scratching",
+    "scartches": "scratching",
+    "scartching": "scratching",
+    "scratches": "scratching",
+    "scartching ear": "scratching ear",
+    "itches": "itching",
+    "itchiness": "itching",
+    "pruritis": "pruritus",
+    "pustulses": "pustules",
+    "abscessess": "abscesses",
+    "severe swellimg": "severe swelling",
+    "swolling of joint": "swelling of joints",
+    "swelling on joints": "swelling of joints",
+    "swollen": "swelling",
+    "conjuctivtis": "conjunctivitis",
+    "chronic eye inflamation": "chronic eye inflammation",
+    "inflammed eye": "inflamed eye",
+    "eye disharge": "eye discharge",
+    "eye discharges": "eye discharge",
+    "discharge from eye": "eye discharge",
+    "discharge from eyes": "eye discharge",
+    "disharge from affected eye": "eye discharge",
+    "occular discharge": "eye discharge",
+    "ocular discharge": "eye discharge",
+    "watery eye": "watery eyes",
+    "watering of eyes": "watery eyes",
+    "anversion to light": "aversion to light",
+    "severe kerititis": "severe keratitis",
+    "head shking": "head shaking",
+    "shaking head": "head shaking",
+    "shaking oh head": "head shaking",
+    # mobility / neurological
+    "lame": "lameness",
+    "limp": "limping",
+    "difficulty in walk": "difficulty walking",
+    "difficulty in walking": "difficulty walking",
+    "difficult in walking": "difficulty walking",
+    "los of the ability to walk": "loss of the ability to walk",
+    "relunctance to move": "reluctance to move",
+    "relunctance to walk": "reluctance to walk",
+    "reluctant move": "reluctance to move",
+    "nuerological": "neurological",
+    "hyperaestesia": "hyperesthesia",
+    "floopy muscle": "floppy muscle",
+    # production animals
+    "decresed egg production": "decreased egg production",
+    "drop on egg production": "decreased egg production",
+    "egg production decreases": "decreased egg production",
+    "decrease in milk production": "decreased milk production",
+    "decreased milk yield": "decreased milk production",
+    "decreased milk": "decreased milk production",
+    "drop in milk production": "decreased milk production",
+    "milk reduce": "decreased milk production",
+    "reduce milk": "decreased milk production",
+    "abortion on late pregancy": "abortion in late pregnancy",
+    "retained placenda": "retained placenta",
+    "flock moratality": "flock mortality",
+    "high moratality": "high mortality",
+    "kid moratality": "kid mortality",
+    "fetopelvic dispropotion": "fetopelvic disproportion",
+    "uteria inertia": "uterine inertia",
+    "endomeritis": "endometritis",
+    "lepatomegaly": "hepatomegaly",
+    "skeleten abnormalities": "skeletal abnormalities",
+    "skeleten pain": "skeletal pain",
+    "abnormalalities": "abnormalities",
+}
+# Lookups are applied once, so a canonical spelling must not itself be remapped
+assert not set(SYMPTOM_SYNONYMS.values()) & set(SYMPTOM_SYNONYMS), "chained symptom synonyms"
+
+# Variant disease names → canonical disease name
+CONDITION_SYNONYMS: Dict[str, str] = {
+    "foot and mouth disease": "Foot-and-Mouth Disease",
+    "blue tongue": "Bluetongue",
+    "blue tongue disease": "Bluetongue",
+    "blue tongue virus": "Bluetongue",
+    "bluetongue virus": "Bluetongue",
+    "swine flu": "Swine Influenza",
+    "canine flu": "Canine Influenza",
+    "equine influenza virus": "Equine Influenza",
+    "scrapie disease": "Scrapie",
+    "caprine arthritis encephalitis virus": "Caprine Arthritis Encephalitis",
+    "feline panleukopenia virus": "Feline Panleukopenia",
+    "porcine epidemic diarrhea virus": "Porcine Epidemic Diarrhea",
+    "feline leukemia": "Feline Leukemia Virus",
+    "feline chlamydiosis": "Feline Chlamydia",
+    "bovine respiratory disease complex": "Bovine Respiratory Disease",
+}
+
+# Placeholder cell values that carry no information
+EMPTY_VALUES = {"", "no", "none", "nan", "n/a", "na", "-", "most often none"}
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s.,;:]+$")
+
+
+def clean_label(value) -> Optional[str]:
+    """Collapse whitespace (including non-breaking spaces) and strip stray trailing punctuation"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    text = _TRAILING_PUNCTUATION.sub("", " ".join(str(value).replace("\xa0", " ").split()))
+    return text or None
+
+
+def canonical_symptom(value) -> Optional[str]:
+    """Map a raw symptom cell to its canonical lowercase spelling (None for empty/placeholder cells)"""
+    text = clean_label(value)
+    if text is None:
+        return None
+    text = text.lower()
+    if text in EMPTY_VALUES:
+        return None
+    return SYMPTOM_SYNONYMS.get(text, text)
+
+
+def canonical_condition(value) -> Optional[str]:
+    """Map a raw disease name to its canonical spelling"""
+    text = clean_label(value)
+    if text is None:
+        return None
+    return CONDITION_SYNONYMS.get(text.lower(), text)
+
+
+class DatasetNormalizer:
+    """
+    Stateful chunk transform that canonicalizes one dataset.
+
+    Args:
+        species: Columns holding a species label
+        symptoms: Columns holding one symptom each (a row's symptom set)
+        conditions: Columns holding a disease name
+        dedupe: Drop rows identical to an earlier row (across chunks); keeps
+                one 64-bit hash per distinct row, so its memory grows with
+                the dataset
+
+    Tracks what it changed so the compiler can report it.
+    """
+
+    def __init__(self, species: List[str] = (), symptoms: List[str] = (),
+                 conditions: List[str] = (), dedupe: bool = True):
+        self.species = list(species)
+        self.symptoms = list(symptoms)
+        self.conditions = list(conditions)
+        self.dedupe = dedupe
+        self._seen = set()
+        self.rows_in = 0
+        self.duplicate_rows = 0
+        self.rewritten = Counter()
+        self.repeated_symptoms = 0
+
+    def _map_column(self, chunk: pd.DataFrame, column: str, mapper) -> None:
+        # Map each distinct value once, then broadcast
+        original = chunk[column].astype(object)
+        mapping = {value: mapper(value) for value in pd.unique(original.dropna())}
+        mapped = original.map(mapping)
+        self.rewritten[column] += int((original.notna() & (mapped != original)).sum())
+        chunk[column] = mapped
+
+    def normalize(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Canonicalize one chunk and drop repeated symptoms and duplicate rows"""
+        self.rows_in += len(chunk)
+        for column in (c for c in self.species if c in chunk.columns):
+            self._map_column(chunk, column, canonical_species)
+        for column in (c for c in self.conditions if c in chunk.columns):
+            self._map_column(chunk, column, canonical_condition)
+
+        columns = [c for c in self.symptoms if c in chunk.columns]
+        for column in columns:
+            self._map_column(chunk, column, canonical_symptom)
+        if len(columns) > 1:
+            # Blank a symptom already listed earlier in the same row
+            values = chunk[columns].to_numpy(dtype=object)
+            for j in range(1, len(columns)):
+                current = values[:, j]
+                repeated = pd.notna(current) & np.any(values[:, :j] == current[:, None], axis=1)
+                if repeated.any():
+                    self.repeated_symptoms += int(repeated.sum())
+                    values[repeated, j] = None
+                    chunk[columns[j]] = values[:, j]
+
+        if self.dedupe and len(chunk):
+            hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            keep = np.zeros(len(hashes), dtype=bool)
+            for i, value in enumerate(hashes):
+                if value not in self._seen:
+                    self._seen.add(value)
+                    keep[i] = True
+            dropped = int((~keep).sum())
+            if dropped:
+                self.duplicate_rows += dropped
+                chunk = chunk[keep]
+        return chunk
+
+    def report(self) -> Dict:
+        return {
+            "rows_in": self.rows_in,
+            "duplicate_rows": self.duplicate_rows,
+            "repeated_symptoms": self.repeated_symptoms,
+            "rewritten_values": dict(self.rewritten),
+        }
+
+
+def symptom_vocabulary(frame: pd.DataFrame, columns: List[str]) -> Dict[str, int]:
+    """Canonical symptom terms of a normalized dataset with their row counts"""
+    columns = [c for c in columns if c in frame.columns]
+    if not columns:
+        return {}
+    counts = pd.concat([frame[c].dropna().astype(object) for c in columns]).value_counts()
+    return {term: int(count) for term, count in counts.items()}
@@ -4,53 +4,423 @@ Implements RAG (Retrieval-Augmented Generation) for enhanced responses
 """
 
 import pandas as pd
+import numpy as np
 import os
+import sys
+import time
+import hashlib
+import pickle
+import tempfile
+import threading
+import subprocess
+import json
+from datetime import datetime
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Dict, Optional
 from pathlib import Path
 import re
 
-class DatasetService:
-    def __init__(self):
-        """Initialize dataset service and load all datasets"""
-        self.datasets_path = Path(__file__).parent.parent.parent / "datasets" / "01_raw_data"
-        self.datasets = {}
-        self.load_datasets()
+from app.core.cache import LRUCache
+from app.services.dataset_ingest import FrameCollector, ingest_csv
+from app.services.dataset_normalize import DatasetNormalizer, SYMPTOM_SYNONYMS, symptom_vocabulary
+from app.services.dataset_compact import StringPool, DatasetCompactor, align_categories, pool_count, memory_report
+from app.services.query_expansion import QueryExpander, QueryExpansion
+from app.services.similar_cases import MinHashLSH
+from app.services.dataset_snippets import SnippetTable, build_snippets
+from app.services.facet_index import FacetIndex, facets_from_pet_context
+from app.services.breed_aggregates import build_breed_aggregates, lookup_breed, breed_nutrition_notes
+from app.services.diagnosis_scorer import DiagnosisScorer
+from app.services.retrieval_pool import RetrievalPool
+from app.services.snapshot_file import dump_snapshot, read_snapshot
+from app.core.llm import EMERGENCY_KEYWORDS, INTENT_KEYWORDS
+
+# Dataset name → CSV file under datasets/01_raw_data
+DATASET_FILES = {
+    'symptoms': '01_pet_health_symptoms.csv',
+    'diseases': '02_animal_disease_prediction.csv',
+    'animals': '03_general_animal_data.csv',
+    'breeds': '04_dog_breed_health.csv',
+    'clinical': '05_veterinary_clinical.csv',
+}
+
+# Columns stored compactly: pool-coded categoricals and Yes/No booleans
+SYMPTOM_COLUMNS = [f'Symptom_{i}' for i in range(1, 6)]
+COMPACT_COLUMNS = {
+    'symptoms': {'categorical': ['condition', 'record_type']},
+    'diseases': {
+        'categorical': ['Animal_Type', 'Breed', 'Gender', 'Duration', 'Body_Temperature', 'Disease_Prediction'] + SYMPTOM_COLUMNS[:4],
+        'flags': ['Appetite_Loss', 'Vomiting', 'Diarrhea', 'Coughing', 'Labored_Breathing',
+                  'Lameness', 'Skin_Lesions', 'Nasal_Discharge', 'Eye_Discharge'],
+    },
+    'animals': {
+        'categorical': ['AnimalName'] + [f'symptoms{i}' for i in range(1, 6)],
+        'flags': ['Dangerous'],
+    },
+    'breeds': {
+        'categorical': ['Breed', 'Breed Size', 'Sex', 'Spay/Neuter Status', 'Daily Activity Level',
+                        'Diet', 'Food Brand', 'Owner Activity Level'],
+        'flags': ['Other Pets in Household', 'Medications', 'Seizures', 'Synthetic', 'Healthy'],
+    },
+    'clinical': {'categorical': ['AnimalName', 'Breed', 'MedicalHistory'] + SYMPTOM_COLUMNS},
+}
+
+# Facet source columns per dataset (see FacetIndex)
+FACET_COLUMNS = {
+    'diseases': {'species': 'Animal_Type', 'breed': 'Breed', 'age': 'Age', 'weight': 'Weight'},
+    'animals': {'species': 'AnimalName'},
+    'clinical': {'species': 'AnimalName', 'breed': 'Breed', 'age': 'Age', 'weight': 'Weight_kg'},
+}
+
+# Columns canonicalized at ingest (see DatasetNormalizer)
+NORMALIZE_COLUMNS = {
+    'symptoms': {},
+    'diseases': {'species': ['Animal_Type'], 'symptoms': SYMPTOM_COLUMNS[:4], 'conditions': ['Disease_Prediction']},
+    'animals': {'species': ['AnimalName'], 'symptoms': [f'symptoms{i}' for i in range(1, 6)]},
+    'breeds': {},
+    'clinical': {'species': ['AnimalName'], 'symptoms': SYMPTOM_COLUMNS},
+}
+
+# Datasets indexed for similar-case lookup (MinHash LSH over symptom sets)
+SIMILAR_CASE_DATASETS = ['clinical', 'symptoms']
+
+# Service root (the directory containing the app package)
+APP_ROOT = Path(__file__).parent.parent.parent
+
+# Compiled snapshot written by compile_datasets.py; bump the format when the
+# snapshot classes change shape so stale artifacts are rebuilt
+COMPILED_PATH = Path(os.getenv("DATASET_COMPILED_PATH", str(APP_ROOT / "datasets" / "02_compiled")))
+COMPILED_FORMAT = 6
+
+# Child-process entry point for out-of-process reloads; runs at lower CPU
+# priority so request threads win when cores are scarce
+BUILD_SNAPSHOT_SCRIPT = (
+    "import os, sys, pickle\n"
+    "if hasattr(os, 'nice'):\n"
+    "    os.nice(10)\n"
+    "from app.services.dataset_service import load_snapshot\n"
+    "snapshot = load_snapshot(sys.argv[1], sys.argv[2])\n"
+    "with open(sys.argv[3], 'wb') as f:\n"
+    "    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)\n"
+)
+
+
+def dataset_fingerprint(datasets_path: Path) -> str:
+    """Fingerprint the CSV files on disk (name, size, mtime)"""
+    digest = hashlib.sha1()
+    for csv_path in sorted(datasets_path.glob("*.csv")):
+        stat = csv_path.stat()
+        digest.update(f"{csv_path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+def build_snapshot(datasets_path) -> "DatasetSnapshot":
+    """
+    Stream all CSV datasets into memory, normalize them and build every index
     
-    def load_datasets(self):
-        """Load all CSV datasets into memory"""
-        try:
-            # Load pet health symptoms dataset
-            symptoms_path = self.datasets_path / "01_pet_health_symptoms.csv"
-            if symptoms_path.exists():
-                self.datasets['symptoms'] = pd.read_csv(symptoms_path)
-                print(f"✓ Loaded symptoms dataset: {len(self.datasets['symptoms'])} records")
-            
-            # Load animal disease prediction dataset
-            disease_path = self.datasets_path / "02_animal_disease_prediction.csv"
-            if disease_path.exists():
-                self.datasets['diseases'] = pd.read_csv(disease_path)
-                print(f"✓ Loaded diseases dataset: {len(self.datasets['diseases'])} records")
-            
-            # Load general animal data
-            animal_path = self.datasets_path / "03_general_animal_data.csv"
-            if animal_path.exists():
-                self.datasets['animals'] = pd.read_csv(animal_path)
-                print(f"✓ Loaded animals dataset: {len(self.datasets['animals'])} records")
-            
-            # Load dog breed health data
-            breed_path = self.datasets_path / "04_dog_breed_health.csv"
-            if breed_path.exists():
-                self.datasets['breeds'] = pd.read_csv(breed_path)
-                print(f"✓ Loaded breeds dataset: {len(self.datasets['breeds'])} records")
+    Module-level so a reload or the offline compiler can run it in a
+    separate process.
+    
+    Args:
+        datasets_path: Directory holding the raw CSV files
+    
+    Returns:
+        A fully built DatasetSnapshot
+    """
+    datasets_path = Path(datasets_path)
+    started = time.perf_counter()
+    version = dataset_fingerprint(datasets_path)
+    datasets = {}
+    facet_indexes = {}
+    ingest_stats = {}
+    normalization = {}
+    string_pool = StringPool()
+    try:
+        for name, filename in DATASET_FILES.items():
+            path = datasets_path / filename
+            if not path.exists():
+                continue
             
-            # Load veterinary clinical data
-            clinical_path = self.datasets_path / "05_veterinary_clinical.csv"
-            if clinical_path.exists():
-                self.datasets['clinical'] = pd.read_csv(clinical_path)
-                print(f"✓ Loaded clinical dataset: {len(self.datasets['clinical'])} records")
+            collector = FrameCollector()
+            consumers = [collector]
+            if name in FACET_COLUMNS:
+                facet_indexes[name] = FacetIndex(FACET_COLUMNS[name])
+                consumers.append(facet_indexes[name])
             
-        except Exception as e:
-            print(f"Error loading datasets: {str(e)}")
+            normalizer = DatasetNormalizer(**NORMALIZE_COLUMNS.get(name, {}))
+            compactor = DatasetCompactor(string_pool, **COMPACT_COLUMNS.get(name, {}))
+            stats = ingest_csv(name, path, consumers,
+                               transform=lambda chunk: compactor.compact(normalizer.normalize(chunk)))
+            datasets[name] = collector.finalize()
+            if name in facet_indexes:
+                facet_indexes[name].finalize()
+            ingest_stats[name] = stats.as_dict()
+            normalization[name] = normalizer.report()
+            print(f"✓ Loaded {name} dataset: {len(datasets[name])} records "
+                  f"({stats.chunks} chunks, {stats.rows_per_sec:,.0f} rows/s)")
+        
+    except Exception as e:
+        print(f"Error loading datasets: {str(e)}")
+    
+    # All categoricals share the final string pool, so codes compare across columns
+    for frame in datasets.values():
+        align_categories(frame, string_pool)
+    
+    # Render each row's prompt snippet once, aligned with row positions
+    snippets = {}
+    for name, frame in datasets.items():
+        table = build_snippets(name, frame)
+        if table is not None:
+            snippets[name] = table
+    
+    # Synonym/expansion dictionary over the canonical symptom vocabulary
+    vocabulary = set()
+    for name, frame in datasets.items():
+        vocabulary.update(symptom_vocabulary(frame, NORMALIZE_COLUMNS.get(name, {}).get('symptoms', [])))
+    query_expander = QueryExpander(
+        vocabulary,
+        synonyms=SYMPTOM_SYNONYMS,
+        keywords=INTENT_KEYWORDS.get("symptom", []) + EMERGENCY_KEYWORDS,
+    )
+    
+    # Similar-case index: symptom columns, or symptoms recognized in free text
+    similar_cases = {}
+    for name in SIMILAR_CASE_DATASETS:
+        if name not in datasets:
+            continue
+        frame = datasets[name]
+        columns = [c for c in NORMALIZE_COLUMNS.get(name, {}).get('symptoms', []) if c in frame.columns]
+        if columns:
+            term_sets = [[t for t in row if isinstance(t, str)] for row in frame[columns].astype(object).to_numpy()]
+        elif 'text' in frame.columns:
+            term_sets = [query_expander.expand(str(text)).symptoms for text in frame['text'].fillna('')]
+        else:
+            continue
+        similar_cases[name] = MinHashLSH(term_sets)
+    
+    # Precompute per-breed health statistics for O(1) breed lookups
+    breed_aggregates = build_breed_aggregates(datasets['breeds']) if 'breeds' in datasets else {}
+    
+    # Train the local differential-diagnosis scorer on the symptom tables
+    diagnosis_scorer = DiagnosisScorer(datasets.get('diseases'), datasets.get('animals'))
+    
+    return DatasetSnapshot(
+        version=version,
+        datasets=datasets,
+        string_pool=string_pool,
+        facet_indexes=facet_indexes,
+        breed_aggregates=breed_aggregates,
+        diagnosis_scorer=diagnosis_scorer,
+        ingest_stats=ingest_stats,
+        build_seconds=time.perf_counter() - started,
+        normalization=normalization,
+        snippets=snippets,
+        query_expander=query_expander,
+        similar_cases=similar_cases,
+    )
+
+
+def write_compiled_snapshot(snapshot: "DatasetSnapshot", compiled_path=COMPILED_PATH) -> Dict:
+    """
+    Write a snapshot and its human-readable artifacts for fast startup
+    
+    Writes snapshot.pkl (tables, indexes, aggregates, scorer) with its array
+    data in snapshot.buffers (see snapshot_file), vocabulary.json
+    (canonical symptom terms per dataset) and manifest.json (source version
+    and normalization report). The manifest is written last, so a partially
+    written directory is never considered fresh.
+    
+    Returns:
+        The manifest
+    """
+    compiled_path = Path(compiled_path)
+    compiled_path.mkdir(parents=True, exist_ok=True)
+    manifest_path = compiled_path / "manifest.json"
+    if manifest_path.exists():
+        manifest_path.unlink()
+    
+    dump_snapshot(snapshot, compiled_path / "snapshot.pkl")
+    
+    vocabulary = {
+        name: symptom_vocabulary(snapshot.datasets[name], NORMALIZE_COLUMNS[name].get('symptoms', []))
+        for name in snapshot.datasets if NORMALIZE_COLUMNS.get(name, {}).get('symptoms')
+    }
+    with open(compiled_path / "vocabulary.json", "w") as f:
+        json.dump(vocabulary, f, indent=2, ensure_ascii=False)
+    
+    manifest = {
+        "format": COMPILED_FORMAT,
+        "source_version": snapshot.version,
+        "pandas_version": pd.__version__,
+        "compiled_at": datetime.now().isoformat(),
+        "build_seconds": round(snapshot.build_seconds, 3),
+        "datasets": {name: len(df) for name, df in snapshot.datasets.items()},
+        "diagnosis_vocabulary": len(snapshot.diagnosis_scorer.vocabulary),
+        "expansion_phrases": len(snapshot.query_expander.lookup),
+        "normalization": snapshot.normalization,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_compiled_snapshot(datasets_path, compiled_path=COMPILED_PATH) -> Optional["DatasetSnapshot"]:
+    """
+    Load the compiled snapshot if it was built from the current raw files
+    
+    Returns:
+        The snapshot, or None when artifacts are missing, stale or were
+        written by an incompatible format/pandas version
+    """
+    compiled_path = Path(compiled_path)
+    manifest_path = compiled_path / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if (manifest.get("format") != COMPILED_FORMAT
+                or manifest.get("pandas_version") != pd.__version__
+                or manifest.get("source_version") != dataset_fingerprint(Path(datasets_path))):
+            return None
+        started = time.perf_counter()
+        snapshot = read_snapshot(compiled_path / "snapshot.pkl")
+        snapshot.source = "compiled"
+        snapshot.build_seconds = time.perf_counter() - started
+        return snapshot
+    except Exception as e:
+        print(f"⚠️  Ignoring compiled datasets in {compiled_path}: {str(e)}")
+        return None
+
+
+def compiled_snapshot_file(version: str, compiled_path=COMPILED_PATH) -> Optional[Path]:
+    """snapshot.pkl under compiled_path if it holds this version and can be loaded here"""
+    compiled_path = Path(compiled_path)
+    try:
+        with open(compiled_path / "manifest.json") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get("format") == COMPILED_FORMAT
+            and manifest.get("pandas_version") == pd.__version__
+            and manifest.get("source_version") == version):
+        return compiled_path / "snapshot.pkl"
+    return None
+
+
+def load_snapshot(datasets_path, compiled_path=COMPILED_PATH) -> "DatasetSnapshot":
+    """Load the compiled snapshot when it is fresh, otherwise build from the raw CSVs"""
+    snapshot = load_compiled_snapshot(datasets_path, compiled_path)
+    if snapshot is not None:
+        print(f"✓ Loaded compiled datasets {snapshot.version} in {snapshot.build_seconds:.2f}s")
+        return snapshot
+    return build_snapshot(datasets_path)
+
+
+class TermQuery:
+    """
+    A query expanded into search terms, compiled into one regex.
+    
+    Match counts over the shared string pool are computed on first use and
+    reused for every categorical column of every dataset.
+    """
+    
+    def __init__(self, expansion: QueryExpansion, string_pool: StringPool):
+        self.expansion = expansion
+        self.string_pool = string_pool
+        terms = sorted(expansion.terms, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + ")") if terms else None
+        self._pool_scores: Optional[np.ndarray] = None
+    
+    @property
+    def pool_scores(self) -> np.ndarray:
+        if self._pool_scores is None:
+            # Trailing 0 so missing values (code -1) never score
+            self._pool_scores = np.append(pool_count(self.string_pool, self.pattern), 0).astype(np.int32)
+        return self._pool_scores
+
+
+class DatasetSnapshot:
+    """
+    One immutable, fully built generation of the datasets and their indexes.
+    
+    Requests grab the current snapshot once and use only that object, so a
+    reload swapping in a new generation never mixes tables from two versions.
+    """
+    
+    def __init__(self, version: str, datasets: Dict[str, pd.DataFrame], string_pool: StringPool,
+                 facet_indexes: Dict[str, FacetIndex], breed_aggregates: Dict[str, Dict],
+                 diagnosis_scorer: DiagnosisScorer, ingest_stats: Dict, build_seconds: float,
+                 normalization: Optional[Dict] = None, snippets: Optional[Dict[str, SnippetTable]] = None,
+                 query_expander: Optional[QueryExpander] = None,
+                 similar_cases: Optional[Dict[str, MinHashLSH]] = None):
+        self.version = version
+        self.datasets = datasets
+        self.string_pool = string_pool
+        self.facet_indexes = facet_indexes
+        self.breed_aggregates = breed_aggregates
+        self.diagnosis_scorer = diagnosis_scorer
+        self.ingest_stats = ingest_stats
+        self.build_seconds = build_seconds
+        self.normalization = normalization or {}
+        self.snippets = snippets or {}
+        self.query_expander = query_expander or QueryExpander(())
+        self.similar_cases = similar_cases or {}
+        self.source = "raw"
+    
+    def _filter_candidates(self, name: str, facets: Optional[Dict]) -> pd.DataFrame:
+        """Narrow a dataset to the rows matching the pet facets (bitmap intersection)"""
+        df = self.datasets[name]
+        if not facets or name not in self.facet_indexes:
+            return df
+        mask = self.facet_indexes[name].candidates(facets)
+        if mask is None:
+            return df
+        return df[mask]
+    
+    def prepare_query(self, query: str) -> "TermQuery":
+        """Expand a query into search terms once, for use across all datasets"""
+        return TermQuery(self.query_expander.expand(query), self.string_pool)
+    
+    def _term_scores(self, df: pd.DataFrame, query: "TermQuery", columns: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Per-row count of search-term matches across the columns
+        
+        Categorical columns are scored once per string-pool entry and the
+        result gathered by code, instead of lowercasing every row.
+        """
+        scores = np.zeros(len(df), dtype=np.int32)
+        for column in columns or df.columns:
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                scores += query.pool_scores[series.cat.codes.to_numpy()]
+            elif pd.api.types.is_bool_dtype(series) or not pd.api.types.is_object_dtype(series):
+                continue
+            else:
+                scores += series.str.lower().str.count(query.pattern).fillna(0).to_numpy(dtype=np.int32)
+        return scores
+    
+    def _match_positions(self, name: str, query: "TermQuery", limit: int, columns: Optional[List[str]] = None,
+                         facets: Optional[Dict] = None) -> np.ndarray:
+        """Row positions of the `limit` best-matching facet-filtered rows (ties keep dataset order)"""
+        if name not in self.datasets or query.pattern is None:
+            return np.empty(0, dtype=np.intp)
+        df = self._filter_candidates(name, facets)
+        scores = self._term_scores(df, query, columns)
+        matched = np.flatnonzero(scores)
+        best = matched[np.argsort(-scores[matched], kind="stable")][:limit]
+        # Datasets have a RangeIndex, so index labels are row positions
+        return df.index.to_numpy()[best]
+    
+    def _records(self, name: str, positions: np.ndarray) -> List[Dict]:
+        if name not in self.datasets:
+            return []
+        return self.datasets[name].iloc[positions].to_dict('records')
+    
+    def _snippets(self, name: str, positions: np.ndarray) -> List[str]:
+        table = self.snippets.get(name)
+        if table is None:
+            return [str(record)[:200] for record in self._records(name, positions)]
+        return table.gather(positions)
     
     def search_symptoms(self, query: str, limit: int = 5) -> List[Dict]:
         """
@@ -63,113 +433,437 @@ class DatasetService:
         Returns:
             List of relevant symptom records
         """
-        if 'symptoms' not in self.datasets:
-            return []
-        
-        df = self.datasets['symptoms']
-        query_lower = query.lower()
-        
         # Search in text and condition columns
-        mask = (
-            df['text'].str.lower().str.contains(query_lower, na=False, regex=False) |
-            df['condition'].str.lower().str.contains(query_lower, na=False, regex=False)
-        )
+        return self._records('symptoms', self._match_positions('symptoms', self.prepare_query(query), limit, ['text', 'condition']))
+    
+    def search_diseases(self, query: str, limit: int = 5, facets: Optional[Dict] = None) -> List[Dict]:
+        """Search disease dataset, restricted to rows matching the pet facets"""
+        # Search across all text columns
+        return self._records('diseases', self._match_positions('diseases', self.prepare_query(query), limit, facets=facets))
+    
+    def get_breed_info(self, breed: str) -> Optional[Dict]:
+        """
+        Get breed-specific health statistics
         
-        results = df[mask].head(limit)
+        Returns:
+            Precomputed aggregates (health rate, seizure prevalence, median
+            weight, activity/diet distributions, vet visits) or None
+        """
+        if not breed:
+            return None
+        return lookup_breed(self.breed_aggregates, breed)
+    
+    def search_clinical_notes(self, query: str, limit: int = 5, facets: Optional[Dict] = None) -> List[Dict]:
+        """Search clinical notes for relevant cases, restricted to rows matching the pet facets"""
+        return self._records('clinical', self._match_positions('clinical', self.prepare_query(query), limit, facets=facets))
+    
+    def find_similar_cases(self, symptoms: List[str], facets: Optional[Dict] = None, limit: int = 3,
+                           exclude: Optional[Dict[str, set]] = None) -> List[Dict]:
+        """
+        Nearest historical cases by symptom-set overlap (MinHash LSH)
+        
+        Args:
+            symptoms: Canonical symptom terms
+            facets: Pet facets; cases of other species are skipped
+            limit: Number of cases across all indexed datasets
+            exclude: Dataset name → row positions already shown
         
-        return results.to_dict('records')
+        Returns:
+            List of {dataset, position, similarity, snippet}, most similar first
+        """
+        cases = []
+        for name, index in self.similar_cases.items():
+            mask = None
+            if facets and name in self.facet_indexes:
+                mask = self.facet_indexes[name].candidates(facets)
+            skip = (exclude or {}).get(name, ())
+            for position, similarity in index.query(symptoms, k=limit + len(skip), candidate_mask=mask):
+                if position not in skip:
+                    cases.append({"dataset": name, "position": position, "similarity": similarity})
+        cases.sort(key=lambda case: -case["similarity"])
+        cases = cases[:limit]
+        for case in cases:
+            case["snippet"] = self._snippets(case["dataset"], [case["position"]])[0]
+        return cases
     
-    def search_diseases(self, query: str, limit: int = 5) -> List[Dict]:
-        """Search disease dataset"""
-        if 'diseases' not in self.datasets:
-            return []
+    def build_context(self, query: str, facets: Dict) -> str:
+        """Run the dataset searches for a normalized query and format the prebuilt row snippets"""
+        context_parts = []
+        query = self.prepare_query(query)
         
-        df = self.datasets['diseases']
-        query_lower = query.lower()
+        # Search symptoms
+        symptom_positions = self._match_positions('symptoms', query, 3, ['text', 'condition'])
+        symptoms = self._snippets('symptoms', symptom_positions)
+        if symptoms:
+            context_parts.append("**Relevant Symptom Information:**")
+            context_parts.extend(f"{i}. {snippet}" for i, snippet in enumerate(symptoms, 1))
         
-        # Search across all text columns
-        mask = df.apply(lambda row: any(
-            query_lower in str(val).lower() for val in row.values
-        ), axis=1)
+        # Search diseases
+        diseases = self._snippets('diseases', self._match_positions('diseases', query, 2, facets=facets))
+        if diseases:
+            context_parts.append("\n**Related Disease Information:**")
+            context_parts.extend(f"{i}. {snippet}" for i, snippet in enumerate(diseases, 1))
+        
+        # Nearest historical cases by symptom overlap; term search when no
+        # symptom was recognized
+        cases = self.find_similar_cases(query.expansion.symptoms, facets, limit=3,
+                                        exclude={'symptoms': set(symptom_positions.tolist())})
+        if cases:
+            context_parts.append("\n**Similar Clinical Cases:**")
+            context_parts.extend(f"{i}. {case['snippet']} ({case['similarity']:.0%} symptom overlap)"
+                                 for i, case in enumerate(cases, 1))
+        else:
+            clinical = self._snippets('clinical', self._match_positions('clinical', query, 2, facets=facets))
+            if clinical:
+                context_parts.append("\n**Similar Clinical Cases:**")
+                context_parts.extend(f"{i}. {snippet}" for i, snippet in enumerate(clinical, 1))
+        
+        # Local differential from the symptom datasets (no LLM call)
+        assessment = self.diagnosis_scorer.score(query.expansion.symptoms, species=facets.get('species'))
+        if assessment["candidates"]:
+            context_parts.append("\n**Dataset Differential (statistical, not a diagnosis):**")
+            context_parts.append(f"Recognized symptoms: {', '.join(assessment['symptoms'])}")
+            for i, candidate in enumerate(assessment["candidates"], 1):
+                context_parts.append(f"{i}. {candidate['condition']} ({candidate['probability']:.0%})")
         
-        results = df[mask].head(limit)
-        return results.to_dict('records')
+        if context_parts:
+            return "\n".join(context_parts)
+        
+        return ""
     
-    def get_breed_info(self, breed: str) -> Optional[Dict]:
-        """Get breed-specific health information"""
-        if 'breeds' not in self.datasets:
-            return None
+    def score_text(self, text: str, species: Optional[str] = None, top_k: int = 3) -> Dict:
+        """Rank candidate conditions for the symptoms recognized in a text (synonyms included)"""
+        symptoms = self.query_expander.expand(text).symptoms
+        return self.diagnosis_scorer.score(symptoms, species=species, top_k=top_k)
+    
+    def get_memory_report(self) -> Dict:
+        """
+        Get resident memory per dataset, compared with plain-string storage
+        
+        Returns:
+            Dict with the shared string pool size, a per-dataset report and
+            the snippet buffer sizes
+        """
+        pool_bytes = sum(sys.getsizeof(value) for value in self.string_pool.categories)
+        return {
+            "string_pool": {"strings": len(self.string_pool), "bytes": pool_bytes},
+            "datasets": {name: memory_report(df) for name, df in self.datasets.items()},
+            "snippets": {name: {"rows": len(table), "bytes": table.nbytes} for name, table in self.snippets.items()},
+            "similar_cases": {name: {"rows": len(index), "bytes": index.nbytes} for name, index in self.similar_cases.items()},
+        }
+
+
+class DatasetService:
+    def __init__(self):
+        """Initialize dataset service and load all datasets"""
+        self.datasets_path = APP_ROOT / "datasets" / "01_raw_data"
+        self.compiled_path = COMPILED_PATH
+        
+        # Retrieval results cache, keyed by (dataset version, normalized query)
+        self.context_cache = LRUCache(maxsize=int(os.getenv("DATASET_CACHE_SIZE", "512")))
         
-        df = self.datasets['breeds']
-        breed_lower = breed.lower()
+        # Hot reload: "process" builds new snapshots outside this interpreter
+        # so request threads never compete with the rebuild for the GIL
+        self.reload_mode = os.getenv("DATASET_RELOAD_MODE", "process")
+        self.watch_interval = float(os.getenv("DATASET_WATCH_INTERVAL", "0"))
+        self._reload_lock = threading.Lock()
+        self.last_reload: Optional[Dict] = None
         
-        # Search for breed
-        mask = df.apply(lambda row: any(
-            breed_lower in str(val).lower() for val in row.values
-        ), axis=1)
+        # Retrieval and scoring in worker processes (0 = in the request thread)
+        self.retrieval_workers = int(os.getenv("DATASET_RETRIEVAL_WORKERS", "0"))
+        self._retrieval_pool: Optional[RetrievalPool] = None
         
-        results = df[mask].head(1)
+        self._snapshot: Optional[DatasetSnapshot] = None
+        self.load_datasets()
         
-        if len(results) > 0:
-            return results.to_dict('records')[0]
+        if self.watch_interval > 0:
+            self.start_watcher(self.watch_interval)
+    
+    @property
+    def snapshot(self) -> DatasetSnapshot:
+        """The current dataset generation (grab once per request)"""
+        return self._snapshot
+    
+    @property
+    def datasets(self) -> Dict[str, pd.DataFrame]:
+        return self._snapshot.datasets
+    
+    @property
+    def dataset_version(self) -> str:
+        return self._snapshot.version
+    
+    @property
+    def facet_indexes(self) -> Dict[str, FacetIndex]:
+        return self._snapshot.facet_indexes
+    
+    @property
+    def breed_aggregates(self) -> Dict[str, Dict]:
+        return self._snapshot.breed_aggregates
+    
+    @property
+    def diagnosis_scorer(self) -> DiagnosisScorer:
+        return self._snapshot.diagnosis_scorer
+    
+    @property
+    def string_pool(self) -> StringPool:
+        return self._snapshot.string_pool
+    
+    @property
+    def ingest_stats(self) -> Dict:
+        return self._snapshot.ingest_stats
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercase and collapse whitespace so equivalent queries share a cache entry"""
+        return " ".join(query.lower().split())
+    
+    def load_datasets(self):
+        """Load (compiled) or build a snapshot in the calling thread and publish it"""
+        self._publish(load_snapshot(self.datasets_path, self.compiled_path))
+    
+    def _publish(self, snapshot: DatasetSnapshot):
+        """
+        Swap in a new snapshot (a single reference assignment, atomic for readers)
+        
+        Cached results for the previous version can never be served again,
+        so drop them eagerly. Retrieval workers are bound to one version, so
+        a new pool is started for the new snapshot and the old one retired.
+        """
+        self._snapshot = snapshot
+        self.context_cache.clear()
+        if self.retrieval_workers > 0:
+            self._recycle_retrieval_pool(snapshot)
+    
+    def _recycle_retrieval_pool(self, snapshot: DatasetSnapshot):
+        previous = self._retrieval_pool
+        try:
+            self._retrieval_pool = RetrievalPool(snapshot, self.retrieval_workers,
+                                                 compiled_snapshot_file(snapshot.version, self.compiled_path))
+            print(f"✓ Retrieval pool: {self.retrieval_workers} worker processes on version {snapshot.version}")
+        except Exception as e:
+            self._retrieval_pool = None
+            print(f"⚠️  Retrieval pool failed to start, retrieving in-process: {str(e)}")
+        if previous is not None:
+            previous.shutdown()
+    
+    def _pool_for(self, snapshot: DatasetSnapshot) -> Optional[RetrievalPool]:
+        """The retrieval pool, if it serves this snapshot (it lags briefly behind a swap)"""
+        pool = self._retrieval_pool
+        if pool is not None and pool.version == snapshot.version:
+            return pool
         return None
     
-    def search_clinical_notes(self, query: str, limit: int = 5) -> List[Dict]:
-        """Search clinical notes for relevant cases"""
-        if 'clinical' not in self.datasets:
-            return []
+    def _pool_failed(self, pool: RetrievalPool, error: RuntimeError):
+        """
+        Handle a retrieval pool call that raised (the caller then retrieves in-process)
+        
+        A reload may have retired the pool after the request picked it up;
+        that pool is already being shut down and needs nothing else. A pool
+        whose workers died (BrokenProcessPool) is dropped, so later requests
+        stop retrying it until the next reload starts a new one.
+        """
+        if not isinstance(error, BrokenProcessPool):
+            return
+        if self._retrieval_pool is pool:
+            self._retrieval_pool = None
+            print(f"⚠️  Retrieval pool broken, retrieving in-process until the next reload: {str(error)}")
+        pool.shutdown()
+    
+    def reload_datasets(self, wait: bool = False) -> bool:
+        """
+        Rebuild all datasets and indexes in the background and swap them in
         
-        df = self.datasets['clinical']
-        query_lower = query.lower()
+        Requests keep using the previous snapshot until the new one is
+        complete; there is no window where the service has no data.
         
-        mask = df.apply(lambda row: any(
-            query_lower in str(val).lower() for val in row.values
-        ), axis=1)
+        Args:
+            wait: Block until the reload finished
         
-        results = df[mask].head(limit)
-        return results.to_dict('records')
+        Returns:
+            False if a reload is already running
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        thread = threading.Thread(target=self._reload_worker, name="dataset-reload", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
     
-    def get_context_for_query(self, query: str) -> str:
+    def _reload_worker(self):
+        started = time.perf_counter()
+        previous = self._snapshot.version if self._snapshot else None
+        try:
+            if self.reload_mode == "process":
+                snapshot = self._build_snapshot_in_subprocess()
+            else:
+                snapshot = load_snapshot(self.datasets_path, self.compiled_path)
+            self._publish(snapshot)
+            total = time.perf_counter() - started
+            self.last_reload = {
+                "status": "ok",
+                "previous_version": previous,
+                "version": snapshot.version,
+                "build_seconds": round(snapshot.build_seconds, 3),
+                "source": snapshot.source,
+                "total_seconds": round(total, 3),
+                "mode": self.reload_mode,
+                "finished_at": datetime.now().isoformat(),
+            }
+            print(f"✓ Datasets reloaded: version {snapshot.version} "
+                  f"(build {snapshot.build_seconds:.2f}s, total {total:.2f}s)")
+        except Exception as e:
+            self.last_reload = {
+                "status": "failed",
+                "error": str(e),
+                "version": previous,
+                "finished_at": datetime.now().isoformat(),
+            }
+            print(f"⚠️  Dataset reload failed, keeping version {previous}: {str(e)}")
+        finally:
+            self._reload_lock.release()
+    
+    def _build_snapshot_in_subprocess(self) -> DatasetSnapshot:
+        """
+        Build a snapshot in a fresh interpreter and load the pickled result
+        
+        A plain subprocess (rather than a multiprocessing pool) keeps the child
+        from re-importing the API module and its services.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "snapshot.pkl"
+            subprocess.run(
+                [sys.executable, "-c", BUILD_SNAPSHOT_SCRIPT,
+                 str(self.datasets_path), str(self.compiled_path), str(output)],
+                cwd=APP_ROOT, check=True
+            )
+            with open(output, "rb") as f:
+                return pickle.load(f)
+    
+    def start_watcher(self, interval: float):
+        """Poll the dataset files and reload when their fingerprint changes"""
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    if dataset_fingerprint(self.datasets_path) != self._snapshot.version:
+                        self.reload_datasets()
+                except Exception as e:
+                    print(f"⚠️  Dataset watcher error: {str(e)}")
+        
+        threading.Thread(target=watch, name="dataset-watcher", daemon=True).start()
+        print(f"✓ Watching {self.datasets_path} for dataset changes every {interval:g}s")
+    
+    def search_symptoms(self, query: str, limit: int = 5) -> List[Dict]:
+        """Search symptom dataset for relevant information"""
+        return self._snapshot.search_symptoms(query, limit)
+    
+    def search_diseases(self, query: str, limit: int = 5, facets: Optional[Dict] = None) -> List[Dict]:
+        """Search disease dataset, restricted to rows matching the pet facets"""
+        return self._snapshot.search_diseases(query, limit, facets)
+    
+    def search_clinical_notes(self, query: str, limit: int = 5, facets: Optional[Dict] = None) -> List[Dict]:
+        """Search clinical notes for relevant cases, restricted to rows matching the pet facets"""
+        return self._snapshot.search_clinical_notes(query, limit, facets)
+    
+    def get_breed_info(self, breed: str) -> Optional[Dict]:
+        """Get precomputed breed health statistics"""
+        return self._snapshot.get_breed_info(breed)
+    
+    def get_context_for_query(self, query: str, pet_context: Optional[Dict] = None) -> str:
         """
         Get relevant context from all datasets for a query
         This is used for RAG (Retrieval-Augmented Generation)
         
         Args:
             query: User's question or symptom description
+            pet_context: Known pet info (species, breed, age, weight) used to
+                         restrict results to comparable animals
         
         Returns:
             Formatted context string to augment AI response
         """
-        context_parts = []
+        snapshot = self._snapshot
+        query = self.normalize_query(query)
+        facets = facets_from_pet_context(pet_context)
+        cache_key = (snapshot.version, query, tuple(sorted(facets.items())))
+        cached = self.context_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        # Search symptoms
-        symptoms = self.search_symptoms(query, limit=3)
-        if symptoms:
-            context_parts.append("**Relevant Symptom Information:**")
-            for i, symptom in enumerate(symptoms, 1):
-                context_parts.append(f"{i}. {symptom.get('text', '')} (Condition: {symptom.get('condition', 'Unknown')})")
+        pool = self._pool_for(snapshot)
+        context = None
+        if pool is not None:
+            try:
+                context = pool.build_context(query, facets)
+            except RuntimeError as e:
+                self._pool_failed(pool, e)
+        if context is None:
+            context = snapshot.build_context(query, facets)
+        self.context_cache.set(cache_key, context)
+        return context
+    
+    def score_symptoms(self, text: str, pet_context: Optional[Dict] = None, top_k: int = 3) -> Dict:
+        """
+        Rank candidate conditions for the symptoms mentioned in a message
         
-        # Search diseases
-        diseases = self.search_diseases(query, limit=2)
-        if diseases:
-            context_parts.append("\n**Related Disease Information:**")
-            for i, disease in enumerate(diseases, 1):
-                # Format disease info (structure depends on your dataset)
-                disease_text = str(disease)[:200]  # Limit length
-                context_parts.append(f"{i}. {disease_text}")
-        
-        # Search clinical notes
-        clinical = self.search_clinical_notes(query, limit=2)
-        if clinical:
-            context_parts.append("\n**Similar Clinical Cases:**")
-            for i, case in enumerate(clinical, 1):
-                case_text = str(case)[:200]
-                context_parts.append(f"{i}. {case_text}")
+        Args:
+            text: User message or symptom description
+            pet_context: Known pet info; species restricts the candidates
+            top_k: Number of candidate conditions
         
-        if context_parts:
-            return "\n".join(context_parts)
+        Returns:
+            Dict with recognized symptoms, ranked candidates and the
+            symptoms' danger likelihood ratio
+        """
+        snapshot = self._snapshot
+        species = facets_from_pet_context(pet_context).get('species')
+        pool = self._pool_for(snapshot)
+        if pool is not None:
+            try:
+                return pool.score_text(text, species=species, top_k=top_k)
+            except RuntimeError as e:
+                self._pool_failed(pool, e)
+        return snapshot.score_text(text, species=species, top_k=top_k)
+    
+    def find_similar_cases(self, text: str, pet_context: Optional[Dict] = None, limit: int = 3) -> List[Dict]:
+        """
+        Find historical cases whose symptoms overlap most with a message
         
-        return ""
+        Args:
+            text: User message or symptom description
+            pet_context: Known pet info; restricts cases to the same species
+            limit: Number of cases
+        
+        Returns:
+            List of {dataset, position, similarity, snippet}
+        """
+        snapshot = self._snapshot
+        symptoms = snapshot.query_expander.expand(text).symptoms
+        return snapshot.find_similar_cases(symptoms, facets_from_pet_context(pet_context), limit)
+    
+    def get_memory_report(self) -> Dict:
+        """Get resident memory per dataset, compared with plain-string storage"""
+        return self._snapshot.get_memory_report()
+    
+    def get_cache_stats(self) -> Dict:
+        """Get retrieval cache metrics for the current dataset version"""
+        stats = self.context_cache.stats()
+        stats["dataset_version"] = self.dataset_version
+        return stats
+    
+    def get_reload_status(self) -> Dict:
+        """Get the current dataset version and the outcome of the last reload"""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "build_seconds": round(snapshot.build_seconds, 3),
+            "source": snapshot.source,
+            "reloading": self._reload_lock.locked(),
+            "watch_interval": self.watch_interval,
+            "last_reload": self.last_reload,
+            "retrieval_pool": self._retrieval_pool.stats() if self._retrieval_pool else None,
+        }
     
     def get_nutrition_recommendations(self, pet_type: str, breed: str = None, age: str = None) -> str:
         """
@@ -221,7 +915,6 @@ class DatasetService:
             breed_info = self.get_breed_info(breed)
             if breed_info:
                 recommendations.append(f"\n**Breed-Specific Notes for {breed}:**")
-                # Add breed-specific nutrition info from dataset
-                # This depends on your dataset structure
+                recommendations.extend(breed_nutrition_notes(breed_info))
         
         return "\n".join(recommendations) if recommendations else "Please provide more details about your pet for personalized nutrition advice."
@@ -0,0 +1,141 @@
+"""
+Dataset Snippets - Pre-rendered prompt context per dataset row
+Each row is rendered once at load time into a short, human-readable line
+(no column names, no missing values) and stored in one contiguous string
+buffer, so building RAG context is a gather of prebuilt strings
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.services.dataset_normalize import canonical_symptom
+
+# Longest snippet kept per row (characters)
+MAX_SNIPPET_CHARS = 240
+
+
+def _text(value) -> Optional[str]:
+    """Cell as display text, or None when missing"""
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _join(values: Iterable, sep: str = ", ") -> str:
+    return sep.join(text for text in map(_text, values) if text)
+
+
+def _is_set(value) -> bool:
+    """True for a Yes flag (nullable booleans may be pd.NA)"""
+    return value is not None and value is not pd.NA and bool(value)
+
+
+def _flag_names(row: Dict, columns: List[str]) -> List[str]:
+    return [canonical_symptom(c.replace("_", " ")) for c in columns if _is_set(row.get(c))]
+
+
+def render_symptom(row: Dict) -> str:
+    text = _text(row.get("text")) or ""
+    return f"{text} (Condition: {_text(row.get('condition')) or 'Unknown'})"
+
+
+DISEASE_FLAGS = ["Appetite_Loss", "Vomiting", "Diarrhea", "Coughing", "Labored_Breathing",
+                 "Lameness", "Skin_Lesions", "Nasal_Discharge", "Eye_Discharge"]
+
+
+def render_disease(row: Dict) -> str:
+    """'Labrador dog, 4y male, 25 kg: fever, lethargy… for 3 days; 39.5°C, HR 120 → Parvovirus'"""
+    animal = _join([row.get("Breed"), row.get("Animal_Type")], " ")
+    age = _text(row.get("Age"))
+    gender = _text(row.get("Gender"))
+    profile = _join([f"{age}y" if age else None, gender.lower() if gender else None], " ")
+    weight = _text(row.get("Weight"))
+    header = _join([animal, profile, f"{weight} kg" if weight else None])
+
+    symptoms = [row.get(f"Symptom_{i}") for i in range(1, 5)]
+    flags = [f for f in _flag_names(row, DISEASE_FLAGS) if f not in {str(s).lower() for s in symptoms}]
+    findings = _join(symptoms + flags)
+    duration = _text(row.get("Duration"))
+    if duration:
+        findings += f" for {duration}"
+
+    vitals = _join([row.get("Body_Temperature"),
+                    f"HR {_text(row.get('Heart_Rate'))}" if _text(row.get("Heart_Rate")) else None])
+    body = "; ".join(part for part in (findings, vitals) if part)
+    outcome = _text(row.get("Disease_Prediction"))
+    return f"{header}: {body}" + (f" → {outcome}" if outcome else "")
+
+
+def render_animal(row: Dict) -> str:
+    symptoms = _join(row.get(f"symptoms{i}") for i in range(1, 6))
+    dangerous = row.get("Dangerous")
+    verdict = "" if dangerous is None or dangerous is pd.NA else (" (dangerous)" if _is_set(dangerous) else " (not dangerous)")
+    return f"{_text(row.get('AnimalName')) or 'Animal'}: {symptoms}{verdict}"
+
+
+def render_clinical(row: Dict) -> str:
+    """'Rottweiler dog, 6y, 32.1 kg (chronic illness): anorexia, hydrophobia, …'"""
+    animal = _join([row.get("Breed"), row.get("AnimalName")], " ")
+    age = _text(row.get("Age"))
+    weight = _text(row.get("Weight_kg"))
+    header = _join([animal, f"{age}y" if age else None, f"{weight} kg" if weight else None])
+    history = _text(row.get("MedicalHistory"))
+    if history:
+        header += f" ({history.lower()})"
+    return f"{header}: {_join(row.get(f'Symptom_{i}') for i in range(1, 6))}"
+
+
+# Dataset name → row renderer (datasets without one get no snippets)
+SNIPPET_RENDERERS: Dict[str, Callable[[Dict], str]] = {
+    "symptoms": render_symptom,
+    "diseases": render_disease,
+    "animals": render_animal,
+    "clinical": render_clinical,
+}
+
+
+class SnippetTable:
+    """
+    Snippets of one dataset in a single string buffer plus row offsets.
+
+    Row i is text[offsets[i]:offsets[i + 1]]; positions are the dataset's
+    row positions, so a retrieval mask or index gathers snippets directly.
+    """
+
+    def __init__(self, snippets: List[str]):
+        lengths = np.fromiter((len(s) for s in snippets), dtype=np.int64, count=len(snippets))
+        self.offsets = np.zeros(len(snippets) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.text = "".join(snippets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, position: int) -> str:
+        return self.text[self.offsets[position]:self.offsets[position + 1]]
+
+    def gather(self, positions: Iterable[int]) -> List[str]:
+        text, offsets = self.text, self.offsets
+        return [text[offsets[p]:offsets[p + 1]] for p in positions]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.text.encode("utf-8")) + self.offsets.nbytes
+
+
+def build_snippets(name: str, frame: pd.DataFrame) -> Optional[SnippetTable]:
+    """Render every row of a dataset once (None if the dataset has no renderer)"""
+    renderer = SNIPPET_RENDERERS.get(name)
+    if renderer is None:
+        return None
+    snippets = []
+    for row in frame.to_dict("records"):
+        snippet = renderer(row)
+        if len(snippet) > MAX_SNIPPET_CHARS:
+            snippet = snippet[:MAX_SNIPPET_CHARS - 1].rstrip(" ,;") + "…"
+        snippets.append(snippet)
+    return SnippetTable(snippets)
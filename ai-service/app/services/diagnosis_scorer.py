@@ -0,0 +1,175 @@
+"""
+Diagnosis Scorer - Local differential diagnosis from the symptom datasets
+Naive Bayes over a one-hot symptom vocabulary, evaluated with NumPy
+so ranking candidate conditions needs no LLM call
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+from app.services.dataset_compact import as_flag
+from app.services.dataset_normalize import canonical_symptom
+from app.services.facet_index import canonical_species
+
+# Symptom sources per dataset
+DISEASE_SYMPTOM_COLUMNS = ["Symptom_1", "Symptom_2", "Symptom_3", "Symptom_4"]
+DISEASE_FLAG_COLUMNS = [
+    "Appetite_Loss", "Vomiting", "Diarrhea", "Coughing", "Labored_Breathing",
+    "Lameness", "Skin_Lesions", "Nasal_Discharge", "Eye_Discharge",
+]
+DANGER_SYMPTOM_COLUMNS = ["symptoms1", "symptoms2", "symptoms3", "symptoms4", "symptoms5"]
+
+# Laplace smoothing for the per-class symptom probabilities
+SMOOTHING = 1.0
+
+
+class _NaiveBayes:
+    """
+    Naive Bayes over symptom presence, in linear form.
+
+    log P(c | x) ∝ bias[c] + Σ_i x_i * weights[c, i] with weights = log p(s|c)
+    and bias = log prior. Only reported symptoms contribute: users describe a
+    few symptoms, so an unmentioned one is not evidence of its absence.
+    Scoring a query is a column gather and a row sum.
+    """
+
+    def __init__(self, features: np.ndarray, labels: np.ndarray, num_classes: int):
+        # features: (rows, vocab) 0/1 matrix, labels: (rows,) class codes
+        one_hot_labels = np.zeros((len(labels), num_classes), dtype=np.float32)
+        one_hot_labels[np.arange(len(labels)), labels] = 1.0
+
+        class_counts = one_hot_labels.sum(axis=0)
+        feature_counts = one_hot_labels.T @ features
+
+        p = (feature_counts + SMOOTHING) / (class_counts[:, None] + 2 * SMOOTHING)
+        self.weights = np.log(p).astype(np.float32)
+        prior = (class_counts + SMOOTHING) / (class_counts.sum() + num_classes * SMOOTHING)
+        self.bias = np.log(prior).astype(np.float32)
+
+    def log_likelihood(self, feature_ids: np.ndarray) -> np.ndarray:
+        """log P(x | c) per class, without the prior"""
+        return self.weights[:, feature_ids].sum(axis=1)
+
+    def predict_proba(self, feature_ids: np.ndarray, class_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        scores = self.bias + self.log_likelihood(feature_ids)
+        if class_mask is not None:
+            scores = np.where(class_mask, scores, -np.inf)
+        scores = scores - scores.max()
+        probs = np.exp(scores)
+        return probs / probs.sum()
+
+
+class DiagnosisScorer:
+    """
+    Ranks candidate conditions and estimates danger from a set of symptoms.
+
+    Trained at load time from 02_animal_disease_prediction.csv (symptoms →
+    Disease_Prediction) and 03_general_animal_data.csv (symptoms → Dangerous).
+    """
+
+    def __init__(self, diseases: Optional[pd.DataFrame] = None, animals: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            diseases: Disease prediction table
+            animals: General animal table (Dangerous labels)
+        """
+        disease_rows = self._disease_symptom_sets(diseases) if diseases is not None else []
+        danger_rows = self._danger_symptom_sets(animals) if animals is not None else []
+
+        vocabulary = sorted({s for symptoms, _, _ in disease_rows for s in symptoms} |
+                            {s for symptoms, _ in danger_rows for s in symptoms})
+        self.vocabulary: Dict[str, int] = {term: i for i, term in enumerate(vocabulary)}
+
+        self.diseases: List[str] = []
+        self.disease_model = None
+        self.species_classes: Dict[str, np.ndarray] = {}
+        if disease_rows:
+            labels, self.diseases = pd.factorize(pd.Series([d for _, d, _ in disease_rows]))
+            self.diseases = list(self.diseases)
+            features = self._one_hot([symptoms for symptoms, _, _ in disease_rows])
+            self.disease_model = _NaiveBayes(features, labels, len(self.diseases))
+            species = pd.Series([sp for _, _, sp in disease_rows])
+            for name in species.dropna().unique():
+                mask = np.zeros(len(self.diseases), dtype=bool)
+                mask[np.unique(labels[(species == name).to_numpy()])] = True
+                self.species_classes[name] = mask
+
+        self.danger_model = None
+        if danger_rows:
+            labels = np.array([1 if dangerous else 0 for _, dangerous in danger_rows])
+            features = self._one_hot([symptoms for symptoms, _ in danger_rows])
+            self.danger_model = _NaiveBayes(features, labels, 2)
+
+    @staticmethod
+    def _disease_symptom_sets(df: pd.DataFrame):
+        rows = []
+        flag_columns = [c for c in DISEASE_FLAG_COLUMNS if c in df.columns]
+        flags = df[flag_columns].apply(as_flag).fillna(False).to_numpy(dtype=bool) if flag_columns else None
+        flag_names = [canonical_symptom(c.replace("_", " ")) for c in flag_columns]
+        for i, record in enumerate(df.to_dict("records")):
+            disease = record.get("Disease_Prediction")
+            if not isinstance(disease, str) or not disease.strip():
+                continue
+            symptoms = {canonical_symptom(record.get(c)) for c in DISEASE_SYMPTOM_COLUMNS}
+            if flags is not None:
+                symptoms.update(name for name, on in zip(flag_names, flags[i]) if on)
+            symptoms.discard(None)
+            rows.append((symptoms, disease.strip(), canonical_species(record.get("Animal_Type"))))
+        return rows
+
+    @staticmethod
+    def _danger_symptom_sets(df: pd.DataFrame):
+        rows = []
+        dangerous = as_flag(df["Dangerous"]) if "Dangerous" in df.columns else pd.Series(pd.NA, index=df.index)
+        for flag, record in zip(dangerous, df.to_dict("records")):
+            if pd.isna(flag):
+                continue
+            symptoms = {canonical_symptom(record.get(c)) for c in DANGER_SYMPTOM_COLUMNS}
+            symptoms.discard(None)
+            rows.append((symptoms, bool(flag)))
+        return rows
+
+    def _one_hot(self, symptom_sets: List[Iterable[str]]) -> np.ndarray:
+        matrix = np.zeros((len(symptom_sets), len(self.vocabulary)), dtype=np.float32)
+        for row, symptoms in enumerate(symptom_sets):
+            ids = [self.vocabulary[s] for s in symptoms if s in self.vocabulary]
+            matrix[row, ids] = 1.0
+        return matrix
+
+    def score(self, symptoms: Iterable[str], species: Optional[str] = None, top_k: int = 3) -> Dict:
+        """
+        Rank candidate conditions for a set of symptoms
+
+        Args:
+            symptoms: Canonical symptom terms (as found by QueryExpander)
+            species: Optional species to restrict candidate diseases (no
+                     candidates when the datasets have none for it)
+            top_k: Number of candidate conditions to return
+
+        Returns:
+            Dict with symptoms, candidates [{condition, probability}] and
+            danger_likelihood_ratio (None when nothing matched)
+        """
+        ids = np.array(sorted({self.vocabulary[s] for s in symptoms if s in self.vocabulary}), dtype=np.intp)
+        result = {"symptoms": [s for s in symptoms if s in self.vocabulary], "candidates": [], "danger_likelihood_ratio": None}
+        if ids.size == 0:
+            return result
+
+        class_mask = self.species_classes.get(canonical_species(species)) if species else None
+        # A species with no recorded diseases gets no candidates, not every species' diseases
+        if self.disease_model is not None and (class_mask is not None or not species):
+            probs = self.disease_model.predict_proba(ids, class_mask)
+            top = np.argsort(probs)[::-1][:top_k]
+            result["candidates"] = [
+                {"condition": self.diseases[i], "probability": round(float(probs[i]), 3)}
+                for i in top if probs[i] > 0
+            ]
+
+        if self.danger_model is not None:
+            # P(symptoms | dangerous) / P(symptoms | not dangerous). The labels are ~98% "dangerous",
+            # so a posterior would mostly restate that prior; the ratio is the symptoms' evidence alone
+            not_dangerous, dangerous = self.danger_model.log_likelihood(ids)
+            result["danger_likelihood_ratio"] = round(float(np.exp(dangerous - not_dangerous)), 3)
+
+        return result
@@ -0,0 +1,226 @@
+"""
+Facet Index - Bitmap indexes over dataset attributes
+Lets retrieval narrow a dataset to the rows matching the pet (species, breed,
+age band, weight band) before any text scoring runs
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Dataset spellings → canonical species (pet context uses the same names)
+SPECIES_SYNONYMS: Dict[str, str] = {
+    "dogs": "dog", "puppy": "dog", "canine": "dog",
+    "cats": "cat", "kitten": "cat", "feline": "cat",
+    "rabbits": "rabbit", "bunny": "rabbit",
+    "birds": "bird", "other birds": "bird", "parrot": "bird",
+    "fowl": "poultry", "chicken": "poultry", "duck": "poultry",
+    "cow": "cattle", "cows": "cattle", "buffaloes": "cattle",
+    "pigs": "pig", "goats": "goat", "horses": "horse",
+    "donkeys": "donkey", "mules": "mule", "hamsters": "hamster",
+    "wolves": "wolf", "hyaenas": "hyena", "moos": "moose",
+}
+
+# Upper bounds (exclusive) for the age and weight bands
+AGE_BANDS = [(1, "juvenile"), (3, "young"), (8, "adult"), (float("inf"), "senior")]
+WEIGHT_BANDS_KG = [(5, "toy"), (10, "small"), (25, "medium"), (45, "large"), (float("inf"), "giant")]
+
+# Facets in the order they are applied; only species is mandatory
+FACET_ORDER = ["species", "breed", "age_band", "weight_band"]
+
+
+def canonical_species(value) -> Optional[str]:
+    """Normalize a species label ("Dog", "cat ", "Buffaloes") to its canonical name"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    name = str(value).strip().lower()
+    if not name:
+        return None
+    return SPECIES_SYNONYMS.get(name, name)
+
+
+def _band(value: Optional[float], bands) -> Optional[str]:
+    if value is None or np.isnan(value):
+        return None
+    for upper, label in bands:
+        if value < upper:
+            return label
+    return None
+
+
+def age_band(years: Optional[float]) -> Optional[str]:
+    """Map an age in years to its band label"""
+    return _band(years, AGE_BANDS)
+
+
+def weight_band(kg: Optional[float]) -> Optional[str]:
+    """Map a weight in kilograms to its band label"""
+    return _band(kg, WEIGHT_BANDS_KG)
+
+
+def parse_age_years(text) -> Optional[float]:
+    """Parse free-text ages from pet context ("3 years old", "8 months old", 4)"""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(year|yr|month|mo|week|wk)?", str(text).lower())
+    if not match:
+        return None
+    value = float(match.group(1))
+    unit = match.group(2) or "year"
+    if unit.startswith("mo"):
+        return value / 12
+    if unit.startswith("w"):
+        return value / 52
+    return value
+
+
+def parse_weight_kg(text) -> Optional[float]:
+    """Parse free-text weights from pet context ("10 kg", "22 lbs", "800 g")"""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(kg|kilogram|lb|pound|g|gram)?", str(text).lower())
+    if not match:
+        return None
+    value = float(match.group(1))
+    unit = match.group(2) or "kg"
+    if unit in ("lb", "pound"):
+        return value * 0.4536
+    if unit in ("g", "gram"):
+        return value / 1000
+    return value
+
+
+def facets_from_pet_context(pet_context: Optional[Dict]) -> Dict[str, str]:
+    """
+    Derive facet filters from the session pet context
+
+    Args:
+        pet_context: Pet info as stored by the session service
+                     (species/type, breed, age, weight)
+
+    Returns:
+        Dict of facet name → value, only for facets that are known
+    """
+    if not pet_context:
+        return {}
+    facets = {}
+    species = canonical_species(pet_context.get("species") or pet_context.get("type"))
+    if species:
+        facets["species"] = species
+    breed = pet_context.get("breed")
+    if breed and str(breed).strip():
+        facets["breed"] = str(breed).strip().lower()
+    band = age_band(parse_age_years(pet_context.get("age")))
+    if band:
+        facets["age_band"] = band
+    band = weight_band(parse_weight_kg(pet_context.get("weight")))
+    if band:
+        facets["weight_band"] = band
+    return facets
+
+
+class FacetIndex:
+    """
+    Per-dataset bitmap index: one boolean row mask per facet value.
+
+    Candidate selection is a chain of bitmap intersections, so its cost is
+    independent of how expensive the later text scoring is.
+    """
+
+    def __init__(self, columns: Dict[str, str], df: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            columns: Facet source columns, any of
+                     species / breed / age (years) / weight (kg)
+            df: Optional full dataset to index right away; otherwise feed
+                chunks with add_chunk() and call finalize()
+        """
+        self.columns = columns
+        self.num_rows = 0
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        self._codebooks: Dict[str, Dict[str, int]] = {}
+        self._codes: Dict[str, List[np.ndarray]] = {}
+
+        if df is not None:
+            self.add_chunk(df)
+            self.finalize()
+
+    def _facet_values(self, df: pd.DataFrame) -> Dict[str, pd.Series]:
+        columns = self.columns
+        values = {}
+        if "species" in columns:
+            values["species"] = df[columns["species"]].map(canonical_species)
+        if "breed" in columns:
+            values["breed"] = df[columns["breed"]].astype("string").str.strip().str.lower()
+        if "age" in columns:
+            ages = pd.to_numeric(df[columns["age"]], errors="coerce")
+            values["age_band"] = ages.map(age_band)
+        if "weight" in columns:
+            weights = pd.to_numeric(df[columns["weight"]], errors="coerce")
+            values["weight_band"] = weights.map(weight_band)
+        return values
+
+    def add_chunk(self, df: pd.DataFrame):
+        """Index the next chunk of rows (rows keep their order across chunks)"""
+        for facet, series in self._facet_values(df).items():
+            codebook = self._codebooks.setdefault(facet, {})
+            local_codes, uniques = pd.factorize(series)
+            remap = np.array([codebook.setdefault(str(v), len(codebook)) for v in uniques] + [-1], dtype=np.int32)
+            self._codes.setdefault(facet, []).append(remap[local_codes])
+        self.num_rows += len(df)
+
+    def finalize(self):
+        """Turn the accumulated per-row codes into one bitmap per facet value"""
+        for facet, chunks in self._codes.items():
+            codes = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+            self.bitmaps[facet] = {
+                value: codes == code for value, code in self._codebooks[facet].items()
+            }
+        self._codes = {}
+
+    @property
+    def facets(self) -> List[str]:
+        return list(self.bitmaps.keys())
+
+    def _lookup(self, facet: str, value: str) -> Optional[np.ndarray]:
+        """Bitmap for a facet value; breeds also match partial names ("labrador")"""
+        bitmaps = self.bitmaps[facet]
+        if value in bitmaps:
+            return bitmaps[value]
+        if facet != "breed":
+            return None
+        partial = [bitmap for name, bitmap in bitmaps.items() if value in name or name in value]
+        if not partial:
+            return None
+        return np.logical_or.reduce(partial)
+
+    def candidates(self, filters: Dict[str, str]) -> Optional[np.ndarray]:
+        """
+        Intersect the bitmaps for the requested facet values.
+
+        Species is a hard filter (a cat owner never gets cattle rows, even if
+        that leaves nothing); the remaining facets are only applied while
+        they keep at least one candidate.
+
+        Returns:
+            Boolean row mask, or None when no facet applies to this dataset
+        """
+        mask = None
+        for facet in FACET_ORDER:
+            value = filters.get(facet)
+            if value is None or facet not in self.bitmaps:
+                continue
+            bitmap = self._lookup(facet, value)
+            if bitmap is None:
+                if facet == "species":
+                    return np.zeros(self.num_rows, dtype=bool)
+                continue
+            narrowed = bitmap if mask is None else mask & bitmap
+            if facet == "species" or narrowed.any():
+                mask = narrowed
+        return mask
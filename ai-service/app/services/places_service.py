@@ -1,11 +1,64 @@
 import os
+import threading
+import time
 import requests
-from typing import List, Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Tuple
+
+NOMINATIM_HEADERS = {'User-Agent': 'ZoodoApp/1.0 (zoodo-ai-project)'}
+PUBLIC_NOMINATIM_URL = "https://nominatim.openstreetmap.org"
+
+# Widening viewbox searches around the user: (half-width in degrees, label)
+RADIUS_TIERS = [
+    (0.25, "~25 km"),
+    (0.5,  "~50 km"),
+    (1.0,  "~100 km"),
+]
+
+# Shared by every PlacesService (one is created per request)
+_lookup_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PLACES_LOOKUP_WORKERS", "16")),
+    thread_name_prefix="nominatim"
+)
+
+
+class _RateLimiter:
+    """Spaces requests at least `interval` seconds apart across all threads"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self, deadline: float) -> bool:
+        """Sleep until this caller's slot; False (without a slot) if it would pass the deadline"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if slot >= deadline:
+                return False
+            self._next_slot = slot + self.interval
+        time.sleep(slot - now)
+        return True
+
+
+# The public server's usage policy allows at most one request per second
+_public_rate_limit = _RateLimiter(float(os.getenv("NOMINATIM_PUBLIC_INTERVAL", "1.0")))
 
 class PlacesService:
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         self.base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+        # Point at a self-hosted Nominatim to lift the public server's rate limit
+        self.nominatim_url = os.getenv("NOMINATIM_URL", PUBLIC_NOMINATIM_URL).rstrip("/")
+        # Per-request timeout and overall budget of one OpenStreetMap search (seconds)
+        self.request_timeout = float(os.getenv("PLACES_REQUEST_TIMEOUT", "4"))
+        self.search_deadline = float(os.getenv("PLACES_SEARCH_DEADLINE", "6"))
+
+    @property
+    def self_hosted(self) -> bool:
+        """Concurrent lookups are only sent to a self-hosted Nominatim, never the public one"""
+        return self.nominatim_url != PUBLIC_NOMINATIM_URL
         
     def search_nearby_vets(self, latitude: float, longitude: float, radius: int = 5000) -> List[Dict]:
         """
@@ -24,7 +77,7 @@ class PlacesService:
                     "keyword": "veterinarian",
                     "key": self.api_key
                 }
-                response = requests.get(self.base_url, params=params)
+                response = requests.get(self.base_url, params=params, timeout=self.request_timeout)
                 data = response.json()
                 if data.get("status") == "OK":
                     return self._format_places_data(data.get("results", []))
@@ -35,126 +88,198 @@ class PlacesService:
         print(" Using OpenStreetMap (Nominatim) for vet search...")
         return self._search_openstreetmap(latitude, longitude)
 
+    def _nominatim(self, endpoint: str, params: Dict, deadline: float):
+        """GET a Nominatim endpoint, never waiting past the search deadline"""
+        if not self.self_hosted and not _public_rate_limit.wait(deadline):
+            raise TimeoutError("search deadline reached waiting for the public Nominatim rate limit")
+        timeout = max(min(self.request_timeout, deadline - time.monotonic()), 0.1)
+        response = requests.get(f"{self.nominatim_url}/{endpoint}", params=params,
+                                headers=NOMINATIM_HEADERS, timeout=timeout)
+        return response.json()
+
+    @staticmethod
+    def _search_params(tier: str, lat: float, lng: float, user_city: Optional[str], country: str) -> Dict:
+        """Nominatim /search parameters of a tier"""
+        if tier == "city":
+            params = {'q': f'veterinary {user_city}', 'limit': 10}
+        elif tier == "country":
+            params = {'q': f'veterinary clinic {country}', 'limit': 5}
+        else:
+            delta = dict((label, delta) for delta, label in RADIUS_TIERS)[tier]
+            params = {
+                'q': 'veterinary',
+                'limit': 10,
+                'viewbox': f"{lng-delta},{lat+delta},{lng+delta},{lat-delta}",
+                'bounded': 1
+            }
+        return dict(params, format='json', addressdetails=1)
+
+    @staticmethod
+    def _address(data) -> Tuple[Optional[str], str]:
+        """(city, country) from a reverse geocode answer"""
+        addr = (data or {}).get('address', {}) if isinstance(data, dict) else {}
+        user_city = addr.get('city') or addr.get('town') or addr.get('village') or addr.get('county')
+        return user_city, addr.get('country', '')
+
+    @staticmethod
+    def _best_tier(order: List[str], results: Dict[str, List], skipped: set):
+        """
+        First tier (in preference order) with results, once every better
+        tier has come back empty or cannot run
+
+        Returns:
+            (tier or None, decided) — decided is False while a better tier is outstanding
+        """
+        for tier in order:
+            if tier in skipped or (tier in results and not results[tier]):
+                continue
+            if tier in results:
+                return tier, True
+            return None, False
+        return None, True
+
     def _search_openstreetmap(self, lat: float, lng: float) -> List[Dict]:
         """
-        Search for vets using a progressive strategy:
-        1. Detect user's city via reverse geocode
-        2. Search in that exact city
-        3. If not found, expand viewbox progressively (25km → 50km → 100km → country)
-        4. If still nothing found, return empty — never fake data
+        Search for vets, preferring the closest tier that has results:
+        1. Vets in the user's city (found via reverse geocode)
+        2. Widening viewboxes around the user (25km → 50km → 100km)
+        3. The user's country
+        The public Nominatim is asked one tier at a time, at most once a
+        second; a self-hosted one is asked concurrently. Either way the
+        search stops at the first tier with results or at the deadline.
+        If nothing is found, return empty — never fake data
         """
         print(f"📍 Searching OSM at: {lat}, {lng}")
-        try:
-            url = "https://nominatim.openstreetmap.org/search"
-            headers = {'User-Agent': 'ZoodoApp/1.0 (zoodo-ai-project)'}
+        started = time.monotonic()
+        deadline = started + self.search_deadline
+        order = ["city"] + [label for _, label in RADIUS_TIERS] + ["country"]
+
+        find = self._find_concurrently if self.self_hosted else self._find_in_order
+        tier, results, user_city, country = find(lat, lng, order, deadline)
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        if tier is None:
+            print(f"⚠️ No veterinary results found anywhere for {lat},{lng} ({elapsed_ms:.0f} ms)")
+            return []
+
+        data = results[tier]
+        is_fallback = tier != "city"
+        fallback_city = None
+        if is_fallback:
+            # Determine which city the fallback results belong to
+            parts = [p.strip() for p in data[0].get('display_name', '').split(',')]
+            fallback_city = parts[2] if len(parts) > 2 else (country if tier == "country" else parts[0])
+        print(f"      ✅ Found {len(data)} results ({tier}) in {elapsed_ms:.0f} ms")
+
+        return [{
+            "id": str(p.get("place_id")),
+            "name": p.get("name") or p.get("display_name", "").split(",")[0],
+            "address": p.get("display_name"),
+            "rating": "4.5",
+            "user_ratings_total": "OSM",
+            "open_now": True,
+            "distance": "Nearby",
+            "is_nearby_fallback": is_fallback,
+            "user_city": user_city,
+            "fallback_city": fallback_city
+        } for p in data][:5]
 
-            is_fallback = False
-            user_city = None
-            fallback_city = None
-            data = []
+    def _find_in_order(self, lat: float, lng: float, order: List[str], deadline: float):
+        """
+        One lookup at a time (reverse geocode, then each tier) until a tier has results
 
-            # ── Step 1: Reverse geocode to get user's actual city ──────────────
+        Returns:
+            (tier or None, results by tier, user city, country)
+        """
+        results: Dict[str, List] = {}
+        try:
+            user_city, country = self._address(
+                self._nominatim("reverse", {'lat': lat, 'lon': lng, 'format': 'json'}, deadline))
+        except Exception as e:
+            print(f"    reverse lookup failed: {e}")
+            user_city, country = None, ''
+        print(f"    User city: {user_city}, Country: {country}")
+
+        for tier in order:
+            if (tier == "city" and not user_city) or (tier == "country" and not country):
+                continue
+            if time.monotonic() >= deadline:
+                break
             try:
-                rev_resp = requests.get(
-                    "https://nominatim.openstreetmap.org/reverse",
-                    params={'lat': lat, 'lon': lng, 'format': 'json'},
-                    headers=headers, timeout=4
-                ).json()
-                addr = rev_resp.get('address', {})
-                user_city = addr.get('city') or addr.get('town') or addr.get('village') or addr.get('county')
-                country = addr.get('country', '')
-                print(f"    User city: {user_city}, Country: {country}")
+                data = self._nominatim("search", self._search_params(tier, lat, lng, user_city, country), deadline)
             except Exception as e:
-                print(f"    Reverse geocode failed: {e}")
-                country = ''
+                print(f"    {tier} lookup failed: {e}")
+                data = None
+            results[tier] = data if isinstance(data, list) else []
+            if results[tier]:
+                return tier, results, user_city, country
+        return None, results, user_city, country
 
-            # ── Step 2: Search vets in exact city ─────────────────────────────
-            if user_city:
-                print(f"    - Step 2: Searching vets in {user_city}...")
-                try:
-                    r = requests.get(url, params={
-                        'q': f'veterinary {user_city}',
-                        'format': 'json',
-                        'limit': 10,
-                        'addressdetails': 1
-                    }, headers=headers, timeout=4)
-                    data = r.json()
-                    if data:
-                        print(f"      ✅ Found {len(data)} results in {user_city}")
-                except:
-                    data = []
-
-            # ── Step 3: Progressive viewbox expansion if not found ────────────
-            if not data:
-                is_fallback = True
-                radii = [
-                    (0.25, "~25 km"),
-                    (0.5,  "~50 km"),
-                    (1.0,  "~100 km"),
-                ]
-                for delta, label in radii:
-                    print(f"    - Expanding search to {label}...")
-                    try:
-                        r = requests.get(url, params={
-                            'q': 'veterinary',
-                            'format': 'json',
-                            'limit': 10,
-                            'viewbox': f"{lng-delta},{lat+delta},{lng+delta},{lat-delta}",
-                            'bounded': 1,
-                            'addressdetails': 1
-                        }, headers=headers, timeout=4)
-                        data = r.json()
-                        if data:
-                            # Determine which city the fallback results belong to
-                            first_addr = data[0].get('display_name', '')
-                            parts = [p.strip() for p in first_addr.split(',')]
-                            fallback_city = parts[2] if len(parts) > 2 else parts[0]
-                            print(f"      ✅ Found {len(data)} results near {fallback_city} ({label})")
-                            break
-                    except:
-                        continue
-
-            # ── Step 4: Country-level fallback ────────────────────────────────
-            if not data and country:
-                is_fallback = True
-                print(f"    - Step 4: Country-level search in {country}...")
+    def _find_concurrently(self, lat: float, lng: float, order: List[str], deadline: float):
+        """
+        The reverse geocode and the viewbox searches start together; the
+        city search starts as soon as the reverse geocode answers, and the
+        country search only once the city search has come back empty. A
+        tier is returned as soon as every better tier has come back empty;
+        at the deadline the best tier found so far is returned.
+
+        Returns:
+            (tier or None, results by tier, user city, country)
+        """
+        def search(tier: str):
+            params = self._search_params(tier, lat, lng, user_city, country)
+            future = _lookup_pool.submit(self._nominatim, "search", params, deadline)
+            tiers[future] = tier
+            pending.add(future)
+
+        user_city = None
+        country = ''
+        tiers = {}  # future → tier
+        pending = set()
+        tiers[_lookup_pool.submit(self._nominatim, "reverse", {'lat': lat, 'lon': lng, 'format': 'json'}, deadline)] = "reverse"
+        pending.update(tiers)
+        for _, label in RADIUS_TIERS:
+            search(label)
+
+        results: Dict[str, List] = {}  # tier → results ([] when empty or failed)
+        skipped = set()  # tiers the reverse geocode ruled out
+        while True:
+            tier, decided = self._best_tier(order, results, skipped)
+            remaining = deadline - time.monotonic()
+            if decided or not pending or remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = tiers[future]
                 try:
-                    r = requests.get(url, params={
-                        'q': f'veterinary clinic {country}',
-                        'format': 'json',
-                        'limit': 5,
-                        'addressdetails': 1
-                    }, headers=headers, timeout=4)
-                    data = r.json()
-                    if data:
-                        first_addr = data[0].get('display_name', '')
-                        parts = [p.strip() for p in first_addr.split(',')]
-                        fallback_city = parts[2] if len(parts) > 2 else country
-                        print(f"      ✅ Found country-level results near {fallback_city}")
-                except:
-                    data = []
-
-            # ── No results at all → return empty, no fake data ────────────────
-            if not data:
-                print(f"⚠️ No veterinary results found anywhere for {lat},{lng}")
-                return []
-
-            return [{
-                "id": str(p.get("place_id")),
-                "name": p.get("name") or p.get("display_name", "").split(",")[0],
-                "address": p.get("display_name"),
-                "rating": "4.5",
-                "user_ratings_total": "OSM",
-                "open_now": True,
-                "distance": "Nearby",
-                "is_nearby_fallback": is_fallback,
-                "user_city": user_city,
-                "fallback_city": fallback_city
-            } for p in data][:5]
+                    data = future.result()
+                except Exception as e:
+                    print(f"    {name} lookup failed: {e}")
+                    data = None
 
-        except Exception as e:
-            print(f"❌ OSM Error: {str(e)}")
-            return []
+                if name != "reverse":
+                    results[name] = data if isinstance(data, list) else []
+                    if name == "city" and not results[name] and country:
+                        search("country")
+                    continue
+
+                user_city, country = self._address(data)
+                print(f"    User city: {user_city}, Country: {country}")
+                if user_city:
+                    search("city")
+                else:
+                    skipped.add("city")
+                    if country:
+                        search("country")
+                if not country:
+                    skipped.add("country")
+
+        if not decided:
+            # Deadline: settle for the best tier that has answered
+            tier = next((name for name in order if results.get(name)), None)
+        for future in pending:
+            future.cancel()
+        return tier, results, user_city, country
 
     def _format_places_data(self, results: List[Dict]) -> List[Dict]:
         formatted_results = []
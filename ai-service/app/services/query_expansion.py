@@ -0,0 +1,214 @@
+"""
+Query Expansion - Symptom synonym dictionary and retrieval tokenizer
+Maps how owners describe symptoms ("throwing up", "not peeing", "lethargic")
+to the canonical dataset vocabulary ("vomiting", "unable to urinate",
+"lethargy") with one dictionary lookup per query n-gram
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Owner wording → canonical dataset symptom. Complements the mined entries:
+# the stemmer already covers inflections ("vomited", "coughs", "itchy").
+LAY_SYNONYMS: Dict[str, str] = {
+    "throwing up": "vomiting", "throw up": "vomiting", "threw up": "vomiting",
+    "puking": "vomiting", "puke": "vomiting", "being sick": "vomiting",
+    "vomiting blood": "blood from mouth", "blood in vomit": "blood from mouth",
+    "runny poop": "diarrhea", "runny stool": "diarrhea", "loose stool": "diarrhea",
+    "loose poop": "diarrhea", "the runs": "diarrhea", "watery poop": "watery stool",
+    "bloody poop": "blood in stool", "bloody stool": "blood in stool",
+    "not pooping": "constipation", "can't poop": "constipation",
+    "not peeing": "unable to urinate", "can't pee": "unable to urinate",
+    "unable to pee": "unable to urinate", "can't urinate": "unable to urinate",
+    "no urine": "unable to urinate", "straining to urinate": "unable to urinate",
+    "straining to pee": "unable to urinate", "peeing a lot": "polyuria",
+    "peeing more": "polyuria", "drinking a lot": "extreme thirst",
+    "drinking more": "extreme thirst", "very thirsty": "extreme thirst",
+    "blood in pee": "blood in urine", "bloody pee": "blood in urine",
+    "not eating": "loss of appetite", "won't eat": "loss of appetite",
+    "refuses food": "loss of appetite", "off food": "loss of appetite",
+    "not hungry": "loss of appetite", "stopped eating": "loss of appetite",
+    "not drinking": "stop drinking", "won't drink": "stop drinking",
+    "tired": "lethargy", "sleepy": "lethargy", "low energy": "lethargy",
+    "no energy": "lethargy", "sluggish": "lethargy",
+    "losing weight": "weight loss", "getting thin": "weight loss", "skinny": "weight loss",
+    "gaining weight": "weight gain",
+    "hot": "fever", "temperature": "fever", "feverish": "fever",
+    "can't breathe": "difficulty breathing", "hard to breathe": "difficulty breathing",
+    "struggling to breathe": "difficulty breathing", "breathing hard": "heavy breathing",
+    "breathing fast": "rapid breathing", "panting": "panting", "wheezy": "wheezing",
+    "runny nose": "nasal discharge", "snotty nose": "nasal discharge", "snot": "nasal discharge",
+    "nose bleed": "nosebleeds", "bloody nose": "nosebleeds",
+    "gooey eyes": "eye discharge", "eye goop": "eye discharge", "crusty eyes": "eye discharge",
+    "red eyes": "eye redness", "red eye": "eye redness", "cloudy eye": "clouded cornea",
+    "limping": "limping", "can't walk": "difficulty walking", "won't walk": "reluctance to walk",
+    "dragging legs": "paralysis", "dragging his legs": "paralysis", "dragging her legs": "paralysis",
+    "wobbly": "incoordination", "unsteady": "unsteady gait", "falling over": "staggering",
+    "shaking": "trembling", "shivering": "shivering", "fits": "seizures", "fitting": "seizures",
+    "seizing": "seizures", "convulsing": "convulsions", "passed out": "loss of consciousness",
+    "fainted": "loss of consciousness", "collapsed": "loss of consciousness",
+    "itchy": "itching", "scratching a lot": "scratching", "licking paws": "excessive grooming",
+    "bald spots": "bald patches", "losing fur": "hair loss", "losing hair": "hair loss",
+    "fur loss": "hair loss", "hot spot": "skin lesions", "rash": "skin rashes",
+    "lump": "lumps", "bump": "lumps", "swollen belly": "swollen abdomen",
+    "bloated": "distended stomach", "bloat": "distended stomach", "stomach ache": "abdominal pain",
+    "tummy ache": "abdominal pain", "belly pain": "abdominal pain", "painful belly": "abdominal pain",
+    "bad breath": "bad breath", "smelly breath": "bad breath", "drooling a lot": "drooling",
+    "pale gums": "pale gums", "white gums": "pale gums", "blue gums": "blue colored lip",
+    "head tilt": "head tilt", "shaking head": "head shaking", "ear smell": "odor to ear",
+    "smelly ears": "odor to ear", "hiding": "uncharacteristic hiding",
+    "aggressive": "aggressiveness", "restless": "restlessness",
+}
+
+# Words that never carry symptom meaning on their own
+STOPWORDS = {
+    "a", "an", "the", "my", "our", "his", "her", "its", "their", "he", "she", "it",
+    "they", "is", "are", "was", "were", "be", "been", "being", "has", "have", "had",
+    "and", "or", "but", "with", "of", "to", "in", "on", "at", "for", "from", "by",
+    "this", "that", "these", "those", "i", "me", "we", "you", "your", "so", "very",
+    "some", "any", "all", "also", "just", "since", "after", "about", "what", "why",
+    "how", "when", "should", "could", "would", "can", "do", "does", "did", "keeps",
+    "keep", "lot", "lots", "bit", "little", "days", "day", "week", "weeks", "today",
+    "yesterday", "dog", "dogs", "cat", "cats", "pet", "puppy", "kitten", "help",
+    "please", "think", "seems", "started", "still", "really", "now",
+}
+
+# Suffixes stripped by the stemmer, longest first; one strip per word
+_SUFFIXES = ("ingly", "ness", "ing", "ies", "ied", "ed", "es", "ic", "s", "y", "e")
+_MIN_STEM = 3
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Longest phrase (in words) recognized as one term
+MAX_PHRASE_WORDS = 5
+
+
+def stem(word: str) -> str:
+    """Crude suffix stemmer shared by dictionary build and query time ("vomited" → "vomit")"""
+    if word.endswith("ss"):
+        return word
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens ("can't" stays one token)"""
+    return _WORD.findall(text.lower().replace("’", "'"))
+
+
+def _key(phrase: str) -> Tuple[str, ...]:
+    return tuple(stem(word) for word in tokenize(phrase))
+
+
+class QueryExpansion:
+    """Result of expanding one query"""
+
+    def __init__(self, symptoms: List[str], terms: List[str]):
+        # Canonical dataset symptoms recognized in the query
+        self.symptoms = symptoms
+        # Everything to search for: canonical symptoms, their surface forms
+        # and leftover content words
+        self.terms = terms
+
+
+class QueryExpander:
+    """
+    Compiled synonym dictionary over stemmed n-grams.
+
+    Built once per dataset snapshot from:
+      - the canonical symptom vocabulary of the datasets (and its inflections,
+        via the stemmer)
+      - dataset spelling variants (the normalization synonym table)
+      - owner wording (LAY_SYNONYMS)
+      - the symptom/emergency keyword tables the LLM service triages with,
+        mapped to the vocabulary terms they unambiguously point at
+
+    Expanding a query is a greedy longest-match over its stemmed tokens,
+    i.e. a handful of dict lookups, with no pass over the datasets.
+    """
+
+    def __init__(self, vocabulary: Iterable[str], synonyms: Optional[Dict[str, str]] = None,
+                 keywords: Iterable[str] = ()):
+        self.vocabulary: Set[str] = {term for term in vocabulary if term}
+        self.lookup: Dict[Tuple[str, ...], Set[str]] = defaultdict(set)
+        # Canonical term → phrases worth searching for in free text
+        self.surface_forms: Dict[str, Set[str]] = defaultdict(set)
+
+        for term in self.vocabulary:
+            self._add(term, term)
+        for variant, term in (synonyms or {}).items():
+            if term in self.vocabulary:
+                self._add(variant, term, searchable=False)
+        for phrase, term in LAY_SYNONYMS.items():
+            if term in self.vocabulary:
+                self._add(phrase, term)
+        for keyword in keywords:
+            self._add_keyword(keyword)
+
+        self.lookup = dict(self.lookup)
+        self.surface_forms = dict(self.surface_forms)
+
+    def _add(self, phrase: str, term: str, searchable: bool = True):
+        key = _key(phrase)
+        if not key or len(key) > MAX_PHRASE_WORDS:
+            return
+        self.lookup[key].add(term)
+        self.surface_forms[term].add(term)
+        if searchable and phrase != term:
+            self.surface_forms[term].add(phrase.lower())
+
+    def _add_keyword(self, keyword: str):
+        """Map an LLM keyword (often a stem like "letharg") to vocabulary terms it clearly names"""
+        key = _key(keyword)
+        if not key or key in self.lookup:
+            return
+        if len(key) == 1:
+            # Single-word terms sharing the keyword's stem; long keywords are
+            # often truncated stems and may match as a prefix ("letharg" → lethargy)
+            root = key[0]
+            matches = {t for t in self.vocabulary if " " not in t and
+                       (stem(t) == root or (len(root) >= 5 and stem(t).startswith(root)))}
+        else:
+            matches = {t for t in self.vocabulary if _key(t) == key}
+        if 0 < len(matches) <= 2:
+            for term in matches:
+                self.lookup[key].add(term)
+                self.surface_forms[term].add(term)
+
+    def expand(self, query: str) -> QueryExpansion:
+        """
+        Recognize symptoms in a query and list the phrases to search for
+
+        Args:
+            query: Free-text user message or symptom description
+
+        Returns:
+            QueryExpansion with canonical symptoms and search terms
+        """
+        words = tokenize(query)
+        stems = [stem(word) for word in words]
+        symptoms: List[str] = []
+        leftovers: List[str] = []
+        i = 0
+        while i < len(words):
+            for n in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+                terms = self.lookup.get(tuple(stems[i:i + n]))
+                if terms:
+                    symptoms.extend(sorted(terms))
+                    i += n
+                    break
+            else:
+                word = words[i]
+                if word not in STOPWORDS and len(word) > 3 and "'" not in word:
+                    leftovers.append(word)
+                i += 1
+
+        symptoms = list(dict.fromkeys(symptoms))
+        terms = []
+        for symptom in symptoms:
+            terms.append(symptom)
+            terms.extend(sorted(self.surface_forms.get(symptom, ()) - {symptom}))
+        terms.extend(leftovers)
+        return QueryExpansion(symptoms, list(dict.fromkeys(terms)))
@@ -0,0 +1,121 @@
+"""
+Retrieval Pool - Process-pool execution of dataset retrieval and scoring
+The pandas/numpy work behind RAG context and local scoring holds the GIL, so
+under load one API process serializes every request on it. Running it in
+worker processes lets chat throughput scale with cores. Each worker attaches
+to one read-only DatasetSnapshot and only strings and small dicts cross the
+process boundary.
+
+Workers map the snapshot's array data from its file (see snapshot_file), so
+the tables and indexes are in memory once however many workers run; each
+worker still unpickles its own copy of the remaining Python objects (mostly
+snippet text and the query expansion lookup).
+
+Workers are never forked from the API process, whose other threads (request
+handlers, reloads, Redis listeners) could hold locks a forked child would
+inherit forever. They come from the forkserver (a single-threaded process
+that has already imported the dataset code; spawn where it is missing) and
+load the snapshot from its file. Like any spawned process they import
+the launching script once: start the API with `uvicorn main:app`.
+"""
+
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.services.snapshot_file import dump_snapshot, read_snapshot
+
+# The snapshot this worker process serves (set once by _attach)
+_snapshot = None
+
+
+def _attach(snapshot_file: str, version: str):
+    """
+    Worker initializer: load the pool's snapshot, mapping its arrays
+
+    Raises if the file holds another version (it was recompiled after the
+    pool started), which breaks the pool so callers retrieve in-process.
+    """
+    global _snapshot
+    snapshot = read_snapshot(snapshot_file, shared=True)
+    if snapshot.version != version:
+        raise RuntimeError(f"{snapshot_file} holds dataset version {snapshot.version}, expected {version}")
+    _snapshot = snapshot
+
+
+def _version() -> str:
+    return _snapshot.version
+
+
+def _build_context(query: str, facets: Dict) -> str:
+    return _snapshot.build_context(query, facets)
+
+
+def _score_text(text: str, species: Optional[str], top_k: int) -> Dict:
+    return _snapshot.score_text(text, species=species, top_k=top_k)
+
+
+class RetrievalPool:
+    """
+    Worker processes bound to one dataset snapshot version.
+
+    A pool never outlives its snapshot: DatasetService starts a new pool when
+    it publishes a new version and shuts the old one down, so workers never
+    need to reload in place.
+    """
+
+    def __init__(self, snapshot, workers: int, snapshot_file: Optional[Path] = None):
+        """
+        Args:
+            snapshot: The DatasetSnapshot to serve
+            workers: Worker processes
+            snapshot_file: This snapshot written by dump_snapshot (the compiled
+                           snapshot.pkl when it is this version); None writes
+                           a private copy for the pool's lifetime
+        """
+        self.version = snapshot.version
+        self.workers = workers
+        self._tmpdir = None
+        if snapshot_file is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="retrieval-snapshot-", ignore_cleanup_errors=True)
+            snapshot_file = Path(self._tmpdir.name) / "snapshot.pkl"
+            dump_snapshot(snapshot, snapshot_file)
+        self.snapshot_file = str(snapshot_file)
+
+        self.start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            # Imported once in the server, so workers start without re-importing pandas
+            context.set_forkserver_preload(["__main__", "app.services.dataset_service"])
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_attach,
+            initargs=(self.snapshot_file, self.version)
+        )
+        # Start (and attach) every worker now rather than on the first request
+        try:
+            for future in [self._executor.submit(_version) for _ in range(workers)]:
+                future.result()
+        except Exception:
+            self.shutdown()
+            raise
+
+    def build_context(self, query: str, facets: Dict) -> str:
+        return self._executor.submit(_build_context, query, facets).result()
+
+    def score_text(self, text: str, species: Optional[str] = None, top_k: int = 3) -> Dict:
+        return self._executor.submit(_score_text, text, species, top_k).result()
+
+    def shutdown(self):
+        """Stop the workers once their in-flight requests finish (does not block)"""
+        self._executor.shutdown(wait=False)
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers, "start_method": self.start_method, "version": self.version,
+                "snapshot_file": self.snapshot_file}
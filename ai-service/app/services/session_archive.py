@@ -0,0 +1,108 @@
+"""
+Session Archive - Append-only cold storage for old conversation history
+Redis keeps the newest messages of each session; older ones are spilled
+here in batches. Messages are stored exactly as encoded for Redis (see
+MessageCodec) under their position in the session's full history, so a
+page can be served from either tier with one cursor.
+
+Rows are tagged with the session's created_at (its generation): a session
+id that expired and was started again never sees the old conversation.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class SessionArchive:
+    """
+    SQLite table of archived messages, one row per message.
+
+    One connection shared by all request threads behind a lock; WAL mode
+    lets several worker processes on the host append to the same file.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: SQLite database file (created with its directory if missing)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " session_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " generation TEXT NOT NULL,"
+            " entry BLOB NOT NULL,"
+            " archived_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, seq)"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS messages_archived_at ON messages (archived_at)")
+        self._db.commit()
+        self.appended = 0
+
+    def append(self, session_id: str, generation: str, first_seq: int, entries: List[bytes]):
+        """
+        Archive consecutive messages of a session
+
+        Args:
+            session_id: Session ID
+            generation: The session's created_at
+            first_seq: History position of the first entry
+            entries: Encoded messages, oldest first
+        """
+        now = time.time()
+        rows = [(session_id, first_seq + i, generation, entry, now) for i, entry in enumerate(entries)]
+        with self._lock, self._db:
+            # Rows of an earlier session with the same id would collide on seq
+            self._db.execute("DELETE FROM messages WHERE session_id = ? AND generation != ?", (session_id, generation))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO messages (session_id, seq, generation, entry, archived_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self.appended += len(rows)
+
+    def page(self, session_id: str, generation: str, start: int, stop: int) -> Tuple[List[bytes], Optional[int]]:
+        """
+        Archived entries with start <= seq < stop
+
+        Returns:
+            (entries oldest first, seq of the oldest archived message or None)
+        """
+        with self._lock:
+            entries = [row[0] for row in self._db.execute(
+                "SELECT entry FROM messages WHERE session_id = ? AND generation = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, generation, start, stop)
+            )]
+            oldest = self._db.execute(
+                "SELECT MIN(seq) FROM messages WHERE session_id = ? AND generation = ?", (session_id, generation)
+            ).fetchone()[0]
+        return entries, oldest
+
+    def delete(self, session_id: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def prune(self, max_age: float) -> int:
+        """Drop messages archived more than max_age seconds ago; returns the number removed"""
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM messages WHERE archived_at < ?", (time.time() - max_age,)).rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            messages, sessions = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT session_id) FROM messages").fetchone()
+        return {
+            "path": str(self.path),
+            "messages": messages,
+            "sessions": sessions,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "appended_since_start": self.appended,
+        }
@@ -0,0 +1,241 @@
+"""
+Session Codec - Compact binary encoding of conversation history messages
+Each history entry is a two-byte header followed by the payload:
+  byte 0: format version (FORMAT_VERSION)
+  byte 1: serializer id (low nibble) | compression id (high nibble)
+  payload: [role, content, timestamp], serialized with msgpack, orjson or
+           json and compressed when larger than a threshold
+The timestamp is stored as wall-clock microseconds since 1970-01-01 (no
+time zone conversion), paired with the UTC offset in seconds when the
+timestamp has one; any timestamp that would not come back as the same
+string is kept as text. Version 1 entries (local-time epoch milliseconds)
+and plain JSON objects (first byte '{') are still decoded, so existing
+sessions migrate lazily as their old messages are trimmed.
+"""
+
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_VERSION = 2
+LEGACY_JSON = ord("{")
+
+SERIALIZERS = {"json": 0, "msgpack": 1, "orjson": 2}
+COMPRESSORS = {"none": 0, "zlib": 1, "zstd": 2}
+_SERIALIZER_NAMES = {v: k for k, v in SERIALIZERS.items()}
+_COMPRESSOR_NAMES = {v: k for k, v in COMPRESSORS.items()}
+
+# Common roles are stored as small integers
+ROLES = ["user", "assistant", "system"]
+
+
+_WALL_CLOCK_EPOCH = datetime(1970, 1, 1)
+
+TimestampField = Union[int, List[int], str, None]
+
+
+def encode_timestamp(timestamp: Optional[str]) -> TimestampField:
+    """
+    ISO timestamp → wall-clock microseconds, or [microseconds, UTC offset
+    seconds] when it carries an offset. Text that would not decode to the
+    very same string is kept as is.
+    """
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return timestamp
+    wall_us = (moment.replace(tzinfo=None) - _WALL_CLOCK_EPOCH) // timedelta(microseconds=1)
+    encoded = wall_us if moment.tzinfo is None else [wall_us, int(moment.utcoffset().total_seconds())]
+    return encoded if decode_timestamp(encoded) == timestamp else timestamp
+
+
+def decode_timestamp(value: TimestampField) -> Optional[str]:
+    if isinstance(value, list):
+        wall_us, offset = value
+        moment = _WALL_CLOCK_EPOCH + timedelta(microseconds=wall_us)
+        return moment.replace(tzinfo=timezone(timedelta(seconds=offset))).isoformat()
+    if isinstance(value, int):
+        return (_WALL_CLOCK_EPOCH + timedelta(microseconds=value)).isoformat()
+    return value
+
+
+def from_epoch_ms(epoch_ms: Union[int, str, None]) -> Optional[str]:
+    """Timestamp of a version 1 entry (epoch milliseconds, shown in the host's local time)"""
+    if not isinstance(epoch_ms, int):
+        return epoch_ms
+    return datetime.fromtimestamp(epoch_ms / 1000).isoformat()
+
+
+def _dumps(serializer: str, value) -> bytes:
+    if serializer == "msgpack":
+        return msgpack.packb(value, use_bin_type=True)
+    if serializer == "orjson":
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _loads(serializer: str, payload: bytes):
+    if serializer == "msgpack":
+        if msgpack is None:
+            raise ValueError("session entry is msgpack-encoded but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    if serializer == "orjson" and orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+# zstd (de)compressor objects are not thread-safe: one pair per thread
+_zstd = threading.local()
+
+
+def _compress(compression: str, payload: bytes) -> bytes:
+    if compression == "zstd":
+        if not hasattr(_zstd, "compressor"):
+            _zstd.compressor = zstandard.ZstdCompressor(level=3)
+        return _zstd.compressor.compress(payload)
+    return zlib.compress(payload, 6)
+
+
+def _decompress(compression: str, payload: bytes) -> bytes:
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("session entry is zstd-compressed but zstandard is not installed")
+        if not hasattr(_zstd, "decompressor"):
+            _zstd.decompressor = zstandard.ZstdDecompressor()
+        return _zstd.decompressor.decompress(payload)
+    if compression == "zlib":
+        return zlib.decompress(payload)
+    return payload
+
+
+class MessageCodec:
+    """
+    Encodes history messages for storage and decodes every known format.
+
+    The serializer and compressor are picked once; missing optional
+    packages fall back to json / zlib with a warning.
+    """
+
+    def __init__(self, serializer: str = "auto", compression: str = "zlib", compress_min_bytes: int = 512):
+        """
+        Args:
+            serializer: "auto" (msgpack, then orjson, then json), "msgpack", "orjson" or "json"
+            compression: "zlib", "zstd" or "none"
+            compress_min_bytes: Payloads at least this large are compressed
+        """
+        available = {"json": True, "msgpack": msgpack is not None, "orjson": orjson is not None}
+        if serializer == "auto":
+            serializer = next(name for name in ("msgpack", "orjson", "json") if available[name])
+        elif not available.get(serializer):
+            print(f"⚠️  Session serializer '{serializer}' unavailable, using json")
+            serializer = "json"
+        if compression == "zstd" and zstandard is None:
+            print("⚠️  zstandard not installed, compressing sessions with zlib")
+            compression = "zlib"
+        if compression not in COMPRESSORS:
+            compression = "none"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self._flags = SERIALIZERS[serializer]
+
+    def encode(self, message: Dict) -> bytes:
+        role = message.get("role")
+        record = [ROLES.index(role) if role in ROLES else role,
+                  message.get("content", ""),
+                  encode_timestamp(message.get("timestamp"))]
+        payload = _dumps(self.serializer, record)
+        flags = self._flags
+        if self.compression != "none" and len(payload) >= self.compress_min_bytes:
+            compressed = _compress(self.compression, payload)
+            if len(compressed) < len(payload):
+                payload = compressed
+                flags |= COMPRESSORS[self.compression] << 4
+        return bytes((FORMAT_VERSION, flags)) + payload
+
+    def decode(self, raw: bytes) -> Dict:
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        if raw[0] == LEGACY_JSON:
+            return json.loads(raw)
+        if raw[0] not in (1, FORMAT_VERSION):
+            raise ValueError(f"unknown session entry format {raw[0]}")
+        flags = raw[1]
+        payload = _decompress(_COMPRESSOR_NAMES[flags >> 4], raw[2:])
+        role, content, timestamp = _loads(_SERIALIZER_NAMES[flags & 0x0F], payload)
+        return {
+            "role": ROLES[role] if isinstance(role, int) else role,
+            "content": content,
+            "timestamp": from_epoch_ms(timestamp) if raw[0] == 1 else decode_timestamp(timestamp),
+        }
+
+    @staticmethod
+    def describe(raw: bytes) -> str:
+        """Format label of a stored entry, e.g. "v1/msgpack+zlib" or "legacy-json" """
+        if isinstance(raw, str) or raw[0] == LEGACY_JSON:
+            return "legacy-json"
+        flags = raw[1]
+        name = f"v{raw[0]}/{_SERIALIZER_NAMES.get(flags & 0x0F, '?')}"
+        compression = _COMPRESSOR_NAMES.get(flags >> 4, "?")
+        return name if compression == "none" else f"{name}+{compression}"
+
+    def report(self, entries: Iterable[bytes], repeat: int = 3) -> Dict:
+        """
+        Size and CPU of stored entries compared with the plain-JSON format
+
+        Args:
+            entries: Stored history entries of one session
+            repeat: Timing repetitions (best run is reported)
+
+        Returns:
+            Dict with message count, stored vs JSON bytes, encode/decode
+            milliseconds for this codec vs json, and entry formats
+        """
+        entries = list(entries)
+        messages = [self.decode(raw) for raw in entries]
+        current = [self.encode(m) for m in messages]
+        plain = [json.dumps(m) for m in messages]
+
+        def best(fn) -> float:
+            runs = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                fn()
+                runs.append(time.perf_counter() - started)
+            return round(min(runs) * 1000, 3)
+
+        stored_bytes = sum(len(raw) for raw in entries)
+        json_bytes = sum(len(text.encode("utf-8")) for text in plain)
+        return {
+            "messages": len(entries),
+            "stored_bytes": stored_bytes,
+            "json_bytes": json_bytes,
+            "current_format_bytes": sum(len(raw) for raw in current),
+            "size_saving": round(1 - stored_bytes / json_bytes, 4) if json_bytes else None,
+            "encode_ms": best(lambda: [self.encode(m) for m in messages]),
+            "json_encode_ms": best(lambda: [json.dumps(m) for m in messages]),
+            "decode_ms": best(lambda: [self.decode(raw) for raw in current]),
+            "json_decode_ms": best(lambda: [json.loads(text) for text in plain]),
+            "formats": dict(Counter(self.describe(raw) for raw in entries)),
+            "codec": f"{self.serializer}+{self.compression}",
+        }
@@ -1,13 +1,277 @@
 """
 Session Service - Redis-based session management for Salus AI
 Provides fast, scalable session storage with automatic expiration
+
+Redis layout per session (both keys share the session TTL):
+  session:{id}          hash: session_id, created_at, last_activity,
+                        emergency_detected, message_count, pet_context
+                        (each field JSON-encoded)
+  session:{id}:history  list: one encoded message per entry (see
+                        MessageCodec), oldest first, capped at the newest
+                        SESSION_HISTORY_LIMIT messages
+and one index over all sessions:
+  sessions:active       sorted set: session id → last activity (epoch
+                        seconds); ids older than the TTL are pruned lazily
+
+With REDIS_NODES listing several nodes, each session lives on the node that
+owns its id on a consistent hash ring (see SessionShards). Each node indexes
+its own sessions in sessions:active and carries the invalidations of its
+sessions; whole-store reads (session list, stats) query every node. After
+the node list changes, REDIS_PREVIOUS_NODES names the old list until
+rebalance_sessions.py has run: a session still on its old node is moved to
+its new owner the first time it is used (merged, old history first, if a
+copy was already started there).
+
+With the archive enabled, the history list may grow SESSION_ARCHIVE_BATCH
+past the limit; the append that reaches that size removes the overflow and
+hands it to the caller, which stores it in the SessionArchive (SQLite on
+the worker's host). Message positions are counted from the session start
+(the oldest message in Redis is number message_count - LLEN), so history
+pages are addressed the same way in both tiers.
+
+Each worker also keeps recently used sessions in a near cache. Every write
+publishes the session id on sessions:invalidate (in the same round trip),
+and every worker evicts its copy when it receives another worker's message.
 """
 
 import redis
+import heapq
+import itertools
 import json
 import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from functools import wraps
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.core.cache import TTLLRUCache
+from app.services.session_archive import SessionArchive
+from app.services.session_codec import MessageCodec
+from app.services.session_shards import PoolExhaustedError, SessionShards, parse_nodes
+
+HISTORY_SUFFIX = ":history"
+ACTIVE_SESSIONS_KEY = "sessions:active"
+INVALIDATION_CHANNEL = "sessions:invalidate"
+DEFAULT_ARCHIVE_PATH = Path(__file__).parent.parent.parent / "data" / "session_archive.db"
+
+# Server-side session mutations. Each script runs atomically and refreshes
+# the TTL, so concurrent requests on one session (two tabs, retries) never
+# overwrite each other's changes.
+#   KEYS: session hash, history list, active-session index
+#   ARGV[1..4]: TTL, session_id, timestamp (both JSON-encoded like every
+#   hash field), activity score; script-specific arguments follow
+_ENSURE_SESSION_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], 'session_id', ARGV[2], 'created_at', ARGV[3],
+               'pet_context', '{}', 'emergency_detected', 'false', 'message_count', '0')
+end
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[3])
+"""
+_REFRESH_TTL_LUA = """
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+redis.call('ZADD', KEYS[3], ARGV[4], cjson.decode(ARGV[2]))
+"""
+
+# ARGV[5]: history limit, ARGV[6]: archive batch (0 = no archive),
+# ARGV[7..]: messages
+# → {message count, emergency_detected, pet_context, created_at,
+#    position of the first spilled entry, spilled entries} after the append
+APPEND_MESSAGES_LUA = _ENSURE_SESSION_LUA + """
+for i = 7, #ARGV do
+    redis.call('RPUSH', KEYS[2], ARGV[i])
+end
+local count = redis.call('HINCRBY', KEYS[1], 'message_count', #ARGV - 6)
+local limit, batch = tonumber(ARGV[5]), tonumber(ARGV[6])
+local first, spilled = 0, {}
+if batch > 0 then
+    local length = redis.call('LLEN', KEYS[2])
+    local overflow = length - limit
+    if overflow >= batch then
+        first = count - length
+        spilled = redis.call('LRANGE', KEYS[2], 0, overflow - 1)
+        redis.call('LTRIM', KEYS[2], overflow, -1)
+    end
+else
+    redis.call('LTRIM', KEYS[2], -limit, -1)
+end
+""" + _REFRESH_TTL_LUA + """
+return {count, redis.call('HGET', KEYS[1], 'emergency_detected'), redis.call('HGET', KEYS[1], 'pet_context'),
+        redis.call('HGET', KEYS[1], 'created_at'), first, spilled}
+"""
+
+# ARGV[5]: JSON object of pet fields → merged pet context (JSON)
+MERGE_PET_CONTEXT_LUA = _ENSURE_SESSION_LUA + """
+local context = cjson.decode(redis.call('HGET', KEYS[1], 'pet_context') or '{}')
+for field, value in pairs(cjson.decode(ARGV[5])) do
+    context[field] = value
+end
+local merged = cjson.encode(context)
+redis.call('HSET', KEYS[1], 'pet_context', merged)
+""" + _REFRESH_TTL_LUA + """
+return merged
+"""
+
+MARK_EMERGENCY_LUA = _ENSURE_SESSION_LUA + """
+redis.call('HSET', KEYS[1], 'emergency_detected', 'true')
+""" + _REFRESH_TTL_LUA
+
+# Merges the copy of a session from its previous node into the copy started
+# on its new owner. ARGV[3] (timestamp) is unused; ARGV[5]: the old copy's
+# hash (JSON object of its JSON-encoded fields), ARGV[6..]: its history entries
+# → 1 if merged, 0 if this copy was merged already
+MERGE_MOVED_SESSION_LUA = """
+local old = cjson.decode(ARGV[5])
+if redis.call('HGET', KEYS[1], 'created_at') == old['created_at'] then
+    return 0
+end
+local count = tonumber(redis.call('HGET', KEYS[1], 'message_count') or '0') + tonumber(old['message_count'] or '0')
+local context = cjson.decode(old['pet_context'] or '{}')
+for field, value in pairs(cjson.decode(redis.call('HGET', KEYS[1], 'pet_context') or '{}')) do
+    context[field] = value
+end
+for field, value in pairs(old) do
+    redis.call('HSETNX', KEYS[1], field, value)
+end
+for i = #ARGV, 6, -1 do
+    redis.call('LPUSH', KEYS[2], ARGV[i])
+end
+-- The old copy's created_at keeps its archived history addressable
+redis.call('HSET', KEYS[1], 'created_at', old['created_at'], 'pet_context', cjson.encode(context),
+           'message_count', count)
+if old['emergency_detected'] == 'true' then
+    redis.call('HSET', KEYS[1], 'emergency_detected', 'true')
+end
+""" + _REFRESH_TTL_LUA + """
+return 1
+"""
+
+# Read-only. KEYS: session hash, history list. ARGV[1]: cursor (position
+# of the oldest message already seen, -1 for the newest page), ARGV[2]: limit
+# → {message count, created_at, position of the oldest entry in Redis,
+#    page start, page stop, the page's entries held in Redis}
+HISTORY_PAGE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local count = tonumber(redis.call('HGET', KEYS[1], 'message_count') or '0')
+local first = count - redis.call('LLEN', KEYS[2])
+local stop = tonumber(ARGV[1])
+if stop < 0 or stop > count then
+    stop = count
+end
+local start = math.max(stop - tonumber(ARGV[2]), 0)
+local entries = {}
+if stop > first then
+    entries = redis.call('LRANGE', KEYS[2], math.max(start - first, 0), stop - first - 1)
+end
+return {count, redis.call('HGET', KEYS[1], 'created_at'), first, start, stop, entries}
+"""
+
+
+def fails_over(write: bool = False):
+    """
+    Run a SessionService method against Redis, switching the service to the
+    in-memory fallback (and retrying there) when Redis is unreachable
+    
+    Args:
+        write: The method changes sessions; its fallback branch runs under
+               the outage lock and buffers the write for replay
+    """
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self._use_redis():
+                try:
+                    return method(self, *args, **kwargs)
+                except PoolExhaustedError:
+                    # Saturated, not down: fail this request rather than split session state
+                    raise
+                except (redis.ConnectionError, redis.TimeoutError) as e:
+                    if getattr(self._replay, "active", False):
+                        raise
+                    self._use_fallback_store(e)
+            if not write:
+                return method(self, *args, **kwargs)
+            with self._outage_lock:
+                if not self.redis_available:
+                    return method(self, *args, **kwargs)
+            # Redis came back while waiting for the lock
+            return wrapper(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def session_size(session: Dict) -> int:
+    """Approximate in-memory footprint of a session (its serialized size)"""
+    return len(json.dumps(session))
+
+
+class SessionUnitOfWork:
+    """
+    One request's view of a session: loaded once, mutated in memory,
+    written back once by commit().
+    
+    Use as a context manager; the session is committed on exit, also when
+    the request fails, so the user's message is never lost.
+    """
+    
+    def __init__(self, service: "SessionService", session_id: str, history_limit: int = 10):
+        self.service = service
+        self.session_id = session_id
+        self.data = service.load_session(session_id, history_limit)
+        if self.data is None:
+            self.data = service.new_session_data(session_id)
+        self.new_messages: List[Dict] = []
+        self.pet_patch: Dict = {}
+        self.emergency = False
+    
+    def __enter__(self) -> "SessionUnitOfWork":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.commit()
+        return False
+    
+    @property
+    def pet_context(self) -> Dict:
+        return self.data.get("pet_context", {})
+    
+    @property
+    def message_count(self) -> int:
+        return self.data.get("message_count", 0)
+    
+    def get_conversation_history(self, limit: int = 10) -> List[Dict]:
+        history = self.data.get("conversation_history", [])
+        return history[-limit:] if limit else history
+    
+    def add_message(self, role: str, content: str):
+        message = {"role": role, "content": content, "timestamp": datetime.now().isoformat()}
+        self.data["conversation_history"].append(message)
+        self.data["message_count"] += 1
+        self.data["last_activity"] = message["timestamp"]
+        self.new_messages.append(message)
+    
+    def update_pet_context(self, pet_info: Dict):
+        self.data.setdefault("pet_context", {}).update(pet_info)
+        self.pet_patch.update(pet_info)
+    
+    def mark_emergency(self):
+        self.data["emergency_detected"] = True
+        self.emergency = True
+    
+    def commit(self):
+        """Write all changes in one round trip (an unchanged session only has its TTL refreshed)"""
+        self.service.save_changes(self.session_id, self.new_messages, self.pet_patch, self.emergency, self.data)
+        self.new_messages = []
+        self.pet_patch = {}
+        self.emergency = False
+
 
 class SessionService:
     def __init__(self):
@@ -17,203 +281,858 @@ class SessionService:
         redis_port = int(os.getenv("REDIS_PORT", "6379"))
         redis_password = os.getenv("REDIS_PASSWORD", None)
         redis_db = int(os.getenv("REDIS_DB", "0"))
+        # Several nodes ("host:port[/db],...") shard sessions by consistent hashing
+        redis_nodes = parse_nodes(os.getenv("REDIS_NODES", ""), redis_db) or [(redis_host, redis_port, redis_db)]
+        # The node list before the last change, until rebalance_sessions.py has moved every session
+        previous_nodes = parse_nodes(os.getenv("REDIS_PREVIOUS_NODES", ""), redis_db)
         
         # Session expiration time (24 hours by default)
         self.session_ttl = int(os.getenv("SESSION_TTL", "86400"))  # 24 hours in seconds
+        # Messages kept per session (older ones are trimmed on append)
+        self.history_limit = int(os.getenv("SESSION_HISTORY_LIMIT", "200"))
+        # Binary encoding of history entries
+        self.codec = MessageCodec(
+            serializer=os.getenv("SESSION_SERIALIZER", "auto"),
+            compression=os.getenv("SESSION_COMPRESSION", "zlib"),
+            compress_min_bytes=int(os.getenv("SESSION_COMPRESS_MIN_BYTES", "512"))
+        )
+        
+        # Cold storage for messages past the history limit (empty path disables it)
+        self.archive: Optional[SessionArchive] = None
+        self.archive_batch = 0
+        archive_path = os.getenv("SESSION_ARCHIVE_PATH", str(DEFAULT_ARCHIVE_PATH))
+        if archive_path:
+            try:
+                self.archive = SessionArchive(archive_path)
+                self.archive_batch = max(int(os.getenv("SESSION_ARCHIVE_BATCH", "50")), 1)
+                pruned = self.archive.prune(float(os.getenv("SESSION_ARCHIVE_RETENTION", str(30 * 86400))))
+                print(f"✓ Session archive at {archive_path} ({pruned} expired messages pruned)")
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️  Session archive unavailable, trimming old history instead: {str(e)}")
+                self.archive = None
+        
+        # Near cache of hot sessions (Redis mode only)
+        self.near_cache: Optional[TTLLRUCache] = None
+        self.node_id = uuid.uuid4().hex[:12]
+        # Bumped on every invalidation from another worker; a read or write
+        # only fills the near cache if no invalidation raced with it
+        self._invalidation_epoch = 0
+        
+        # Same expiry as Redis, bounded so a long outage cannot exhaust memory
+        self.fallback_sessions = TTLLRUCache(
+            maxsize=int(os.getenv("SESSION_FALLBACK_MAX_SESSIONS", "10000")),
+            ttl=self.session_ttl,
+            max_bytes=int(os.getenv("SESSION_FALLBACK_MAX_BYTES", str(64 * 1024 * 1024))),
+            sizeof=session_size
+        )
+        # Writes made while Redis is unreachable, replayed in order once it is back
+        self.write_buffer = deque()
+        self.write_buffer_max = int(os.getenv("SESSION_WRITE_BUFFER_MAX", "10000"))
+        self.reconnect_interval = float(os.getenv("REDIS_RECONNECT_INTERVAL", "5"))
+        self.connection_events = {
+            "outages": 0,
+            "reconnects": 0,
+            "failed_reconnect_attempts": 0,
+            "replayed_writes": 0,
+            "dropped_writes": 0,
+            "last_outage": None,
+            "last_reconnect": None,
+            "last_error": None
+        }
+        # Held while switching between Redis and the fallback and while
+        # buffering a write, so no write lands between the last replay and the switch
+        self._outage_lock = threading.RLock()
+        self._replay = threading.local()
+        self._reconnecting = False
+        self._listening = False
+        self.redis_available = False
+        
+        # One shared, bounded connection pool per node; idle connections are
+        # kept alive and PINGed before reuse after health_check_interval
+        self.shards = SessionShards(
+            redis_nodes,
+            password=redis_password,
+            vnodes=int(os.getenv("SESSION_RING_VNODES", "160")),
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+            pool_timeout=float(os.getenv("REDIS_POOL_TIMEOUT", "5")),
+            previous_nodes=previous_nodes,
+            decode_responses=False,  # History entries are binary; text is decoded where read
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            socket_keepalive=True,
+            health_check_interval=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+        )
+        
+        # Loaded by SHA on first use on each node (and reloaded after a
+        # server restart); always called with a node's client or pipeline
+        any_client = next(iter(self.shards.clients.values()))
+        self.append_messages_script = any_client.register_script(APPEND_MESSAGES_LUA)
+        self.merge_pet_context_script = any_client.register_script(MERGE_PET_CONTEXT_LUA)
+        self.mark_emergency_script = any_client.register_script(MARK_EMERGENCY_LUA)
+        self.history_page_script = any_client.register_script(HISTORY_PAGE_LUA)
+        self.merge_moved_session_script = any_client.register_script(MERGE_MOVED_SESSION_LUA)
+        # Sessions this worker already looked for on their previous node
+        self._claimed: Optional[TTLLRUCache] = None
+        if self.shards.previous_ring is not None:
+            self._claimed = TTLLRUCache(maxsize=100000, ttl=self.session_ttl)
         
         try:
-            # Connect to Redis
-            self.redis_client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                password=redis_password,
-                db=redis_db,
-                decode_responses=True,  # Automatically decode responses to strings
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
-            
             # Test connection
-            self.redis_client.ping()
-            print(f"✓ Connected to Redis at {redis_host}:{redis_port}")
-            self.redis_available = True
-            
+            self.shards.ping()
+            print(f"✓ Connected to Redis at {', '.join(self.shards.clients)}")
+            self._use_redis_store()
+        
         except (redis.ConnectionError, redis.TimeoutError) as e:
             print(f"⚠️  Redis connection failed: {str(e)}")
-            print("⚠️  Falling back to in-memory session storage")
+            print("⚠️  Falling back to in-memory session storage (reconnecting in the background)")
+            self._use_fallback_store(e, announce=False)
+    
+    def _use_redis_store(self):
+        """Serve sessions from Redis (again); the fallback copies are dropped"""
+        with self._outage_lock:
+            self.redis_available = True
+            self.fallback_sessions.clear()
+            if self.near_cache is not None:
+                # Cached before the outage; other workers kept writing meanwhile
+                self._invalidation_epoch += 1
+                self.near_cache.clear()
+        
+        near_cache_size = int(os.getenv("SESSION_NEAR_CACHE_SIZE", "1000"))
+        if near_cache_size > 0 and not self._listening:
+            self._listening = True
+            self.near_cache = TTLLRUCache(
+                maxsize=near_cache_size,
+                ttl=float(os.getenv("SESSION_NEAR_CACHE_TTL", "60"))
+            )
+            # Invalidations are published on the session's node: listen on all of them
+            for name, client in self.shards.clients.items():
+                threading.Thread(target=self._listen_for_invalidations, args=(client,),
+                                 name=f"session-invalidation-{name}", daemon=True).start()
+    
+    def _use_fallback_store(self, error: Exception, announce: bool = True):
+        """Serve sessions from memory until the reconnect loop finds Redis again"""
+        with self._outage_lock:
             self.redis_available = False
-            self.fallback_sessions: Dict[str, Dict] = {}
+            if self._reconnecting:
+                return
+            if announce:
+                print(f"⚠️  Redis unreachable, serving sessions from memory until it is back: {str(error)}")
+            self._reconnecting = True
+            self.connection_events["outages"] += 1
+            self.connection_events["last_outage"] = datetime.now().isoformat()
+            self.connection_events["last_error"] = str(error)
+        threading.Thread(target=self._reconnect_loop, name="session-redis-reconnect", daemon=True).start()
+    
+    def _reconnect_loop(self):
+        """Ping Redis with backoff, replay the buffered writes, then switch back (daemon thread)"""
+        delay = self.reconnect_interval
+        try:
+            while True:
+                time.sleep(delay)
+                try:
+                    self.shards.ping()
+                    self._replay_buffered_writes()
+                    break
+                except Exception as e:
+                    # Not only connection errors: anything that stops this thread would
+                    # leave the service in fallback mode for good
+                    self.connection_events["failed_reconnect_attempts"] += 1
+                    self.connection_events["last_error"] = str(e)
+                    delay = min(delay * 2, 60)
+            self.connection_events["reconnects"] += 1
+            self.connection_events["last_reconnect"] = datetime.now().isoformat()
+            print(f"✓ Reconnected to Redis ({self.connection_events['replayed_writes']} buffered writes replayed so far)")
+        finally:
+            with self._outage_lock:
+                self._reconnecting = False
+    
+    def _replay_buffered_writes(self):
+        """
+        Apply buffered writes to Redis in order, then switch to Redis
+        
+        Requests keep using the fallback (and buffering) while a batch is
+        replayed; the switch happens under the lock once the buffer is empty.
+        A batch interrupted by another outage is put back in front; a write
+        Redis rejects (bad data, script error) is logged and dropped.
+        """
+        self._replay.active = True
+        try:
+            while True:
+                with self._outage_lock:
+                    if not self.write_buffer:
+                        self._use_redis_store()
+                        return
+                    batch = list(self.write_buffer)
+                    self.write_buffer.clear()
+                for i, (method, args) in enumerate(batch):
+                    try:
+                        getattr(self, method)(*args)
+                    except (redis.ConnectionError, redis.TimeoutError):
+                        with self._outage_lock:
+                            self.write_buffer.extendleft(reversed(batch[i:]))
+                        raise
+                    except Exception as e:
+                        print(f"⚠️  Dropped buffered {method} for session {args[0] if args else '?'}: {str(e)}")
+                        self.connection_events["dropped_writes"] += 1
+                        continue
+                    self.connection_events["replayed_writes"] += 1
+        finally:
+            self._replay.active = False
+    
+    def _buffer_write(self, method: str, *args):
+        """Record a fallback write for replay (the oldest is dropped when full)"""
+        if len(self.write_buffer) >= self.write_buffer_max:
+            self.write_buffer.popleft()
+            self.connection_events["dropped_writes"] += 1
+        self.write_buffer.append((method, args))
+    
+    def _use_redis(self) -> bool:
+        """Whether this call goes to Redis (always, for the thread replaying buffered writes)"""
+        return self.redis_available or getattr(self._replay, "active", False)
     
     def _get_session_key(self, session_id: str) -> str:
-        """Generate Redis key for session"""
+        """Generate Redis key for session metadata"""
         return f"session:{session_id}"
     
-    def create_session(self, session_id: str) -> Dict:
-        """Create a new conversation session"""
-        session_data = {
+    def _get_history_key(self, session_id: str) -> str:
+        """Generate Redis key for session message history"""
+        return f"session:{session_id}{HISTORY_SUFFIX}"
+    
+    def _client(self, session_id: str) -> redis.Redis:
+        """Client of the Redis node that owns a session's keys"""
+        if self._claimed is not None and session_id not in self._claimed:
+            self._claim(session_id)
+        return self.shards.client_for(session_id)
+    
+    def _claim(self, session_id: str):
+        """Move a session from its owner under REDIS_PREVIOUS_NODES before its first use here"""
+        previous, owner = self.shards.previous_node_for(session_id), self.shards.node_for(session_id)
+        if previous != owner:
+            self._move_session(session_id, previous, owner)
+        self._claimed.set(session_id, True)
+    
+    def _move_session(self, session_id: str, source: str, target: str) -> Optional[str]:
+        """
+        Move a session's keys from one node to another, deleting the source copy
+        
+        Args:
+            session_id: Session ID
+            source: Node holding the session
+            target: The session's owner
+        
+        Returns:
+            "moved", "merged" (a copy had already been started on the
+            target: the source's history is put in front of it), None if the
+            source has no copy, or "kept" if it cannot be merged (the old
+            single-JSON-string layout); only a kept copy stays on the source
+        """
+        keys = [self._get_session_key(session_id), self._get_history_key(session_id)]
+        source_client, target_client = self.shards.clients[source], self.shards.clients[target]
+        pipe = source_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.dump(key)
+            pipe.pttl(key)
+        pipe.zscore(ACTIVE_SESSIONS_KEY, session_id)
+        meta, meta_ttl, history, history_ttl, score = pipe.execute()
+        score = score or time.time()
+        if meta is None:
+            source_client.zrem(ACTIVE_SESSIONS_KEY, session_id)
+            return None
+        
+        outcome = None
+        with target_client.pipeline() as pipe:
+            # Restore only if no copy exists on the target, else merge into it
+            pipe.watch(keys[0])
+            if not pipe.exists(keys[0]):
+                pipe.multi()
+                pipe.delete(keys[1])  # history without a hash is a leftover
+                for key, payload, ttl in ((keys[0], meta, meta_ttl), (keys[1], history, history_ttl)):
+                    if payload is not None:
+                        pipe.restore(key, max(ttl, 0), payload)
+                pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: score})
+                self._queue_invalidation(pipe, session_id)
+                try:
+                    pipe.execute()
+                    outcome = "moved"
+                except redis.WatchError:
+                    pass  # started on the target meanwhile
+        
+        if outcome is None:
+            pipe = source_client.pipeline(transaction=False)
+            pipe.hgetall(keys[0])
+            pipe.lrange(keys[1], 0, -1)
+            try:
+                fields, entries = pipe.execute()
+            except redis.ResponseError:
+                print(f"⚠️  Session {session_id} on {source} uses the old layout and was not merged into {target}")
+                return "kept"
+            outcome = "merged"
+            if fields:
+                old = {name.decode("utf-8"): value.decode("utf-8") for name, value in fields.items()}
+                pipe = target_client.pipeline()
+                self.merge_moved_session_script(
+                    keys=keys + [ACTIVE_SESSIONS_KEY], client=pipe,
+                    args=[self.session_ttl, json.dumps(session_id), "", score, json.dumps(old)] + entries
+                )
+                self._queue_invalidation(pipe, session_id)
+                if not pipe.execute()[0]:
+                    outcome = "moved"  # another worker merged or moved this copy
+        
+        pipe = source_client.pipeline()
+        pipe.delete(*keys)
+        pipe.zrem(ACTIVE_SESSIONS_KEY, session_id)
+        pipe.execute()
+        return outcome
+    
+    def _queue_invalidation(self, pipe, session_id: str):
+        """Drop this worker's cached copy and queue the invalidation for all others"""
+        if self.near_cache is not None:
+            self.near_cache.pop(session_id)
+        pipe.publish(INVALIDATION_CHANNEL, f"{self.node_id}:{session_id}")
+    
+    def _listen_for_invalidations(self, client: redis.Redis):
+        """Evict sessions written by other workers on one node (runs in a daemon thread)"""
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything published while unsubscribed was missed: start clean
+                self._invalidation_epoch += 1
+                self.near_cache.clear()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    origin, _, session_id = message["data"].decode("utf-8").partition(":")
+                    if origin != self.node_id:
+                        self._invalidation_epoch += 1
+                        self.near_cache.pop(session_id)
+            except redis.RedisError as e:
+                if self.redis_available:
+                    print(f"⚠️  Session invalidation listener error: {str(e)}")
+                self._invalidation_epoch += 1
+                self.near_cache.clear()
+                # Return the broken connection to the pool before resubscribing
+                pubsub.close()
+                time.sleep(1)
+    
+    @staticmethod
+    def _copy_session(session: Dict, history_limit: Optional[int] = None) -> Dict:
+        history = session["conversation_history"]
+        return dict(
+            session,
+            pet_context=dict(session.get("pet_context", {})),
+            conversation_history=list(history[-history_limit:] if history_limit else history)
+        )
+    
+    def _cache_session(self, session_id: str, session: Dict, epoch: int):
+        """Keep a copy in the near cache unless another worker invalidated something meanwhile"""
+        if self.near_cache is not None and epoch == self._invalidation_epoch:
+            self.near_cache.set(session_id, self._copy_session(session))
+    
+    def _cached_session(self, session_id: str, history_limit: Optional[int]) -> Optional[Dict]:
+        """Near-cache copy of a session, if it holds all the history asked for"""
+        if self.near_cache is None:
+            return None
+        session = self.near_cache.get(session_id)
+        if session is None:
+            return None
+        history = session["conversation_history"]
+        if len(history) >= session.get("message_count", 0) or (history_limit and len(history) >= history_limit):
+            return self._copy_session(session, history_limit)
+        return None
+    
+    @staticmethod
+    def _encode_fields(fields: Dict) -> Dict[str, str]:
+        return {name: json.dumps(value) for name, value in fields.items()}
+    
+    def _decode_session(self, session_id: str, fields: Dict[str, str], history: List[str]) -> Dict:
+        """Hash fields + history entries → session dict (missing fields get defaults)"""
+        session = self.new_session_data(session_id)
+        session.update({name.decode("utf-8"): json.loads(value) for name, value in fields.items()})
+        session["conversation_history"] = [self.codec.decode(m) for m in history]
+        return session
+    
+    def _migrate_legacy(self, session_id: str):
+        """Convert a session stored as one JSON string into the hash + list layout"""
+        key = self._get_session_key(session_id)
+        session_json = self._client(session_id).get(key)
+        if session_json is None:
+            return
+        session = json.loads(session_json)
+        history = session.pop("conversation_history", [])
+        overflow = max(len(history) - self.history_limit, 0)
+        if self.archive is not None and overflow:
+            first = session.get("message_count", len(history)) - len(history)
+            self.archive.append(session_id, session.get("created_at", ""), first,
+                                [self.codec.encode(m) for m in history[:overflow]])
+        history = history[overflow:]
+        pipe = self._client(session_id).pipeline()
+        pipe.delete(key, self._get_history_key(session_id))
+        pipe.hset(key, mapping=self._encode_fields(session))
+        if history:
+            pipe.rpush(self._get_history_key(session_id), *[self.codec.encode(m) for m in history])
+        pipe.expire(key, self.session_ttl)
+        pipe.expire(self._get_history_key(session_id), self.session_ttl)
+        pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: time.time()})
+        self._queue_invalidation(pipe, session_id)
+        pipe.execute()
+    
+    def new_session_data(self, session_id: str) -> Dict:
+        now = datetime.now().isoformat()
+        return {
             "session_id": session_id,
-            "created_at": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat(),
+            "created_at": now,
+            "last_activity": now,
             "conversation_history": [],
             "pet_context": {},
             "emergency_detected": False,
             "message_count": 0
         }
+    
+    @fails_over()
+    def create_session(self, session_id: str) -> Dict:
+        """Create a new conversation session"""
+        session_data = self.new_session_data(session_id)
         
-        if self.redis_available:
+        if self._use_redis():
             # Store in Redis with TTL
             key = self._get_session_key(session_id)
-            self.redis_client.setex(
-                key,
-                self.session_ttl,
-                json.dumps(session_data)
-            )
+            meta = {k: v for k, v in session_data.items() if k != "conversation_history"}
+            pipe = self._client(session_id).pipeline()
+            pipe.delete(self._get_history_key(session_id))
+            pipe.hset(key, mapping=self._encode_fields(meta))
+            pipe.expire(key, self.session_ttl)
+            pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: time.time()})
+            self._queue_invalidation(pipe, session_id)
+            pipe.execute()
         else:
             # Fallback to in-memory
-            self.fallback_sessions[session_id] = session_data
+            self.fallback_sessions.set(session_id, session_data)
+        if self.archive is not None:
+            self.archive.delete(session_id)
         
         return session_data
     
-    def get_session(self, session_id: str) -> Optional[Dict]:
-        """Get existing session or create new one"""
-        if self.redis_available:
-            key = self._get_session_key(session_id)
-            session_json = self.redis_client.get(key)
-            
-            if session_json:
-                # Session exists, refresh TTL
-                self.redis_client.expire(key, self.session_ttl)
-                return json.loads(session_json)
-            else:
-                # Create new session
-                return self.create_session(session_id)
-        else:
-            # Fallback to in-memory
-            if session_id not in self.fallback_sessions:
-                return self.create_session(session_id)
-            return self.fallback_sessions[session_id]
+    @fails_over()
+    def load_session(self, session_id: str, history_limit: Optional[int] = None) -> Optional[Dict]:
+        """
+        Read a session in one round trip
+        
+        Args:
+            session_id: Session ID
+            history_limit: Newest messages to include (None = all stored)
+        
+        Returns:
+            Session dict, or None if it does not exist
+        """
+        if not self._use_redis():
+            session = self.fallback_sessions.get(session_id)
+            if session is None:
+                return None
+            history = session["conversation_history"]
+            session = dict(session, pet_context=dict(session.get("pet_context", {})))
+            session["conversation_history"] = list(history[-history_limit:] if history_limit else history)
+            return session
+        
+        cached = self._cached_session(session_id, history_limit)
+        if cached is not None:
+            return cached
+        
+        epoch = self._invalidation_epoch
+        pipe = self._client(session_id).pipeline(transaction=False)
+        pipe.hgetall(self._get_session_key(session_id))
+        pipe.lrange(self._get_history_key(session_id), -history_limit if history_limit else 0, -1)
+        try:
+            fields, history = pipe.execute()
+        except redis.ResponseError:
+            # Session written by the single-JSON-string layout
+            self._migrate_legacy(session_id)
+            return self.load_session(session_id, history_limit)
+        if not fields:
+            return None
+        session = self._decode_session(session_id, fields, history)
+        self._cache_session(session_id, session, epoch)
+        return session
+    
+    @fails_over(write=True)
+    def save_changes(self, session_id: str, new_messages: List[Dict] = (),
+                     pet_patch: Optional[Dict] = None, emergency: bool = False,
+                     session: Optional[Dict] = None):
+        """
+        Apply a request's session changes in one round trip
+        
+        The changes run as the atomic session scripts, pipelined together.
+        Appending messages is O(1) regardless of history length: they are
+        pushed onto the history list, which is trimmed to the newest
+        history_limit entries. With the archive enabled the trimmed entries
+        are moved there, archive_batch at a time (Redis mode only).
+        
+        Args:
+            session_id: Session ID
+            new_messages: Messages to append, oldest first
+            pet_patch: Pet context fields to merge into the stored context
+            emergency: Mark the session as having detected an emergency
+            session: The caller's in-memory session after these changes; kept
+                     in the near cache if Redis confirms no other write
+                     interleaved (the append reports the resulting count)
+        """
+        timestamp = new_messages[-1]["timestamp"] if new_messages else datetime.now().isoformat()
+        
+        if not self._use_redis():
+            self._buffer_write("save_changes", session_id, list(new_messages), pet_patch, emergency)
+            session = self.fallback_sessions.get(session_id) or self.new_session_data(session_id)
+            if pet_patch:
+                session.setdefault("pet_context", {}).update(pet_patch)
+            if emergency:
+                session["emergency_detected"] = True
+            if new_messages:
+                history = session["conversation_history"]
+                history.extend(new_messages)
+                session["message_count"] = session.get("message_count", 0) + len(new_messages)
+                # Not archived: this copy's created_at is not the Redis session's
+                # generation, and archiving under it would delete that history.
+                # The buffered write is replayed into Redis, which spills it.
+                del history[:-self.history_limit]
+            session["last_activity"] = timestamp
+            # Stored again so the store re-measures its size
+            self.fallback_sessions.set(session_id, session)
+            return
+        
+        if not (new_messages or pet_patch or emergency):
+            self._touch(session_id)
+            return
+        
+        keys = [self._get_session_key(session_id), self._get_history_key(session_id), ACTIVE_SESSIONS_KEY]
+        args = [self.session_ttl, json.dumps(session_id), json.dumps(timestamp), time.time()]
+        for attempt in range(2):
+            pipe = self._client(session_id).pipeline()
+            if pet_patch:
+                self.merge_pet_context_script(keys=keys, args=args + [json.dumps(pet_patch)], client=pipe)
+            if emergency:
+                self.mark_emergency_script(keys=keys, args=args, client=pipe)
+            if new_messages:
+                self.append_messages_script(
+                    keys=keys, client=pipe,
+                    args=args + [self.history_limit, self.archive_batch] + [self.codec.encode(m) for m in new_messages]
+                )
+            self._queue_invalidation(pipe, session_id)
+            epoch = self._invalidation_epoch
+            try:
+                results = pipe.execute()
+                if new_messages:
+                    count, emergency_detected, pet_context, created_at, first, spilled = results[-2]
+                    if spilled:
+                        self.archive.append(session_id, json.loads(created_at), first, spilled)
+                    if session is not None and count == session["message_count"]:
+                        session["emergency_detected"] = json.loads(emergency_detected)
+                        session["pet_context"] = json.loads(pet_context)
+                        self._cache_session(session_id, session, epoch)
+                return
+            except redis.ResponseError:
+                if attempt:
+                    raise
+                # Session written by the single-JSON-string layout (scripts
+                # fail before writing anything on the wrong key type)
+                self._migrate_legacy(session_id)
+    
+    def unit_of_work(self, session_id: str, history_limit: int = 10) -> SessionUnitOfWork:
+        """Load a session once for a request; see SessionUnitOfWork"""
+        return SessionUnitOfWork(self, session_id, history_limit)
+    
+    def _touch(self, session_id: str):
+        """Refresh the TTL of both session keys and the session's activity score"""
+        pipe = self._client(session_id).pipeline(transaction=False)
+        pipe.expire(self._get_session_key(session_id), self.session_ttl)
+        pipe.expire(self._get_history_key(session_id), self.session_ttl)
+        pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: time.time()})
+        pipe.execute()
     
+    @fails_over()
+    def get_session(self, session_id: str, history_limit: Optional[int] = None) -> Optional[Dict]:
+        """
+        Get existing session or create new one
+        
+        Args:
+            session_id: Session ID
+            history_limit: Newest messages to read (None = all stored)
+        """
+        session = self.load_session(session_id, history_limit)
+        if session is None:
+            # Create new session
+            return self.create_session(session_id)
+        if self._use_redis():
+            # Session exists, refresh TTL
+            self._touch(session_id)
+        elif history_limit is None:
+            session = self.fallback_sessions.get(session_id) or session
+        return session
+    
+    @fails_over(write=True)
     def update_session(self, session_id: str, updates: Dict):
-        """Update session data"""
-        session = self.get_session(session_id)
-        if session:
+        """Overwrite session metadata fields (history is only changed through add_message)"""
+        if self.load_session(session_id, history_limit=1) is None:
+            self.create_session(session_id)
+        updates = {k: v for k, v in updates.items() if k not in ("conversation_history", "message_count")}
+        updates["last_activity"] = datetime.now().isoformat()
+        
+        if self._use_redis():
+            pipe = self._client(session_id).pipeline()
+            pipe.hset(self._get_session_key(session_id), mapping=self._encode_fields(updates))
+            pipe.expire(self._get_session_key(session_id), self.session_ttl)
+            pipe.expire(self._get_history_key(session_id), self.session_ttl)
+            pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: time.time()})
+            self._queue_invalidation(pipe, session_id)
+            pipe.execute()
+        else:
+            self._buffer_write("update_session", session_id, updates)
+            session = self.fallback_sessions.get(session_id) or self.new_session_data(session_id)
             session.update(updates)
-            session["last_activity"] = datetime.now().isoformat()
-            
-            if self.redis_available:
-                key = self._get_session_key(session_id)
-                self.redis_client.setex(
-                    key,
-                    self.session_ttl,
-                    json.dumps(session)
-                )
-            else:
-                self.fallback_sessions[session_id] = session
+            self.fallback_sessions.set(session_id, session)
     
     def add_message(self, session_id: str, role: str, content: str):
-        """Add a message to conversation history"""
-        session = self.get_session(session_id)
-        
+        """Add a message to conversation history (one atomic script call)"""
         message = {
             "role": role,
             "content": content,
             "timestamp": datetime.now().isoformat()
         }
+        self.save_changes(session_id, new_messages=[message])
+    
+    def get_conversation_history(self, session_id: str, limit: int = 10) -> List[Dict]:
+        """Get conversation history for a session (only the requested tail is read)"""
+        session = self.load_session(session_id, history_limit=limit)
+        if session is None:
+            return []
+        return session["conversation_history"]
+    
+    @fails_over()
+    def get_history_page(self, session_id: str, cursor: Optional[int] = None, limit: int = 50) -> Optional[Dict]:
+        """
+        Page backwards through a session's full history, newest page first
         
-        session["conversation_history"].append(message)
-        session["message_count"] += 1
-        session["last_activity"] = datetime.now().isoformat()
+        Args:
+            session_id: Session ID
+            cursor: next_cursor of the previous page (None = newest messages)
+            limit: Messages per page
         
-        # Save updated session
-        if self.redis_available:
-            key = self._get_session_key(session_id)
-            self.redis_client.setex(
-                key,
-                self.session_ttl,
-                json.dumps(session)
-            )
+        Returns:
+            Dict with messages (oldest first), next_cursor (None on the
+            oldest page) and total_messages, or None if the session does not exist
+        """
+        limit = max(int(limit), 1)
+        if self._use_redis():
+            keys = [self._get_session_key(session_id), self._get_history_key(session_id)]
+            try:
+                page = self.history_page_script(keys=keys, args=[-1 if cursor is None else int(cursor), limit],
+                                                client=self._client(session_id))
+            except redis.ResponseError:
+                self._migrate_legacy(session_id)
+                return self.get_history_page(session_id, cursor, limit)
+            if not page:
+                return None
+            count, created_at, first, start, stop, entries = page
+            generation = json.loads(created_at)
         else:
-            self.fallback_sessions[session_id] = session
-    
-    def get_conversation_history(self, session_id: str, limit: int = 10) -> List[Dict]:
-        """Get conversation history for a session"""
-        session = self.get_session(session_id)
-        history = session.get("conversation_history", [])
-        return history[-limit:] if limit else history
+            session = self.fallback_sessions.get(session_id)
+            if session is None:
+                return None
+            history = session["conversation_history"]
+            count, generation = session["message_count"], session["created_at"]
+            first = count - len(history)
+            stop = count if cursor is None else min(max(int(cursor), 0), count)
+            start = max(stop - limit, 0)
+            entries = history[max(start - first, 0):max(stop - first, 0)]
+        
+        messages = [m if isinstance(m, dict) else self.codec.decode(m) for m in entries]
+        oldest = first
+        if self.archive is not None:
+            # Positions before the oldest message in Redis come from the archive
+            archived, archived_oldest = self.archive.page(session_id, generation, start, min(stop, first))
+            messages = [self.codec.decode(m) for m in archived] + messages
+            if archived_oldest is not None:
+                oldest = min(oldest, archived_oldest)
+        return {
+            "messages": messages,
+            "next_cursor": start if start > max(oldest, 0) else None,
+            "total_messages": count
+        }
     
     def update_pet_context(self, session_id: str, pet_info: Dict):
-        """Update pet context information"""
-        session = self.get_session(session_id)
-        if "pet_context" not in session:
-            session["pet_context"] = {}
-        session["pet_context"].update(pet_info)
-        
-        # Save updated session
-        if self.redis_available:
-            key = self._get_session_key(session_id)
-            self.redis_client.setex(
-                key,
-                self.session_ttl,
-                json.dumps(session)
-            )
-        else:
-            self.fallback_sessions[session_id] = session
+        """Merge pet context information (one atomic script call)"""
+        self.save_changes(session_id, pet_patch=pet_info)
     
+    @fails_over()
     def get_pet_context(self, session_id: str) -> Dict:
         """Get pet context for a session"""
-        session = self.get_session(session_id)
-        return session.get("pet_context", {})
+        if self._use_redis():
+            cached = self._cached_session(session_id, 1)
+            if cached is not None:
+                return cached["pet_context"]
+            try:
+                value = self._client(session_id).hget(self._get_session_key(session_id), "pet_context")
+            except redis.ResponseError:
+                self._migrate_legacy(session_id)
+                return self.get_pet_context(session_id)
+            return json.loads(value) if value else {}
+        session = self.fallback_sessions.get(session_id)
+        return dict(session.get("pet_context", {})) if session else {}
     
     def mark_emergency(self, session_id: str):
-        """Mark session as having detected an emergency"""
-        session = self.get_session(session_id)
-        session["emergency_detected"] = True
-        
-        # Save updated session
-        if self.redis_available:
-            key = self._get_session_key(session_id)
-            self.redis_client.setex(
-                key,
-                self.session_ttl,
-                json.dumps(session)
-            )
-        else:
-            self.fallback_sessions[session_id] = session
+        """Mark session as having detected an emergency (one atomic script call)"""
+        self.save_changes(session_id, emergency=True)
     
+    @fails_over(write=True)
     def clear_session(self, session_id: str):
         """Clear a session"""
-        if self.redis_available:
-            key = self._get_session_key(session_id)
-            self.redis_client.delete(key)
+        if self._use_redis():
+            pipe = self._client(session_id).pipeline()
+            pipe.delete(self._get_session_key(session_id), self._get_history_key(session_id))
+            pipe.zrem(ACTIVE_SESSIONS_KEY, session_id)
+            self._queue_invalidation(pipe, session_id)
+            pipe.execute()
         else:
-            if session_id in self.fallback_sessions:
-                del self.fallback_sessions[session_id]
-    
-    def get_all_sessions(self) -> List[str]:
-        """Get all active session IDs"""
-        if self.redis_available:
-            # Get all session keys
-            keys = self.redis_client.keys("session:*")
-            # Extract session IDs from keys
-            return [key.replace("session:", "") for key in keys]
+            self._buffer_write("clear_session", session_id)
+            self.fallback_sessions.pop(session_id)
+        if self.archive is not None:
+            self.archive.delete(session_id)
+    
+    def _prune_index(self, pipe):
+        """
+        Queue removal of index entries whose sessions have expired
+        
+        Scores track the last TTL refresh, so anything older than the TTL
+        is gone from Redis. Run before every index read, each call only
+        removes what expired since the previous one.
+        """
+        pipe.zremrangebyscore(ACTIVE_SESSIONS_KEY, "-inf", time.time() - self.session_ttl)
+    
+    @fails_over()
+    def get_all_sessions(self, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """
+        Get active session IDs, most recently active first
+        
+        With several nodes, each returns its first offset + limit entries
+        and the pages are merged by activity.
+        
+        Args:
+            offset: Sessions to skip
+            limit: Page size (None = all remaining)
+        
+        Returns:
+            List of session IDs
+        """
+        stop = offset + limit - 1 if limit else -1
+        if self._use_redis():
+            pages = []
+            for client in self.shards.clients.values():
+                pipe = client.pipeline()
+                self._prune_index(pipe)
+                pipe.zrange(ACTIVE_SESSIONS_KEY, 0, stop, desc=True, withscores=True)
+                pages.append(pipe.execute()[-1])
+            merged = heapq.merge(*pages, key=lambda entry: -entry[1])
+            return [session_id.decode("utf-8") for session_id, _ in itertools.islice(merged, offset, stop + 1 if limit else None)]
         else:
-            return list(self.fallback_sessions.keys())
+            ordered = sorted(self.fallback_sessions.values(), key=lambda s: s.get("last_activity", ""), reverse=True)
+            return [s["session_id"] for s in ordered[offset:stop + 1 if limit else None]]
+    
+    def rebalance_shards(self) -> Dict:
+        """
+        Move every session stored on a node that no longer owns it
+        
+        Run once after changing REDIS_NODES (with REDIS_PREVIOUS_NODES set
+        to the old list, so sessions used meanwhile were moved on access).
+        Only sessions whose ring owner changed are copied (about 1/N of them
+        per added node). A session that was already started on its new owner
+        has the old copy merged into it rather than dropped.
+        
+        Returns:
+            Per source node: sessions indexed, moved, merged and kept
+        """
+        if not self._use_redis():
+            return {}
+        report = {}
+        for name, source in self.shards.clients.items():
+            pipe = source.pipeline()
+            self._prune_index(pipe)
+            pipe.zrange(ACTIVE_SESSIONS_KEY, 0, -1)
+            entries = pipe.execute()[-1]
+            counts = {"sessions": len(entries), "moved": 0, "merged": 0, "kept": 0}
+            for raw_id in entries:
+                session_id = raw_id.decode("utf-8")
+                owner = self.shards.node_for(session_id)
+                if owner == name:
+                    continue
+                outcome = self._move_session(session_id, name, owner)
+                if outcome is not None:
+                    counts[outcome] += 1
+            report[name] = counts
+        return report
+    
+    @fails_over()
+    def get_storage_report(self, session_id: str) -> Dict:
+        """
+        Size and CPU of a session's stored history versus plain JSON
+        
+        Args:
+            session_id: Session ID
+        
+        Returns:
+            MessageCodec.report() for the session's history entries
+        """
+        if self._use_redis():
+            entries = self._client(session_id).lrange(self._get_history_key(session_id), 0, -1)
+        else:
+            session = self.fallback_sessions.get(session_id)
+            # In-memory sessions are kept decoded: report what Redis would store
+            entries = [self.codec.encode(m) for m in session["conversation_history"]] if session else []
+        report = self.codec.report(entries)
+        report["session_id"] = session_id
+        return report
+    
+    def get_connection_stats(self) -> Dict:
+        """Connection pool usage per node, outage/reconnect events and the write buffer"""
+        return dict(
+            self.connection_events,
+            state="redis" if self.redis_available else ("reconnecting" if self._reconnecting else "fallback"),
+            buffered_writes=len(self.write_buffer),
+            write_buffer_max=self.write_buffer_max,
+            pools=self.shards.pool_stats()
+        )
     
+    @fails_over()
     def get_session_stats(self) -> Dict:
         """Get statistics about active sessions"""
-        if self.redis_available:
-            total_sessions = len(self.redis_client.keys("session:*"))
-            redis_info = self.redis_client.info("memory")
+        if self._use_redis():
+            shards = {}
+            for name, client in self.shards.clients.items():
+                pipe = client.pipeline()
+                self._prune_index(pipe)
+                pipe.zcard(ACTIVE_SESSIONS_KEY)
+                shards[name] = {
+                    "sessions": pipe.execute()[-1],
+                    "memory_used": client.info("memory").get("used_memory_human", "N/A")
+                }
             
             return {
-                "total_sessions": total_sessions,
+                "total_sessions": sum(shard["sessions"] for shard in shards.values()),
                 "storage_type": "redis",
-                "redis_memory_used": redis_info.get("used_memory_human", "N/A"),
-                "session_ttl": self.session_ttl
+                "redis_memory_used": ", ".join(shard["memory_used"] for shard in shards.values()),
+                "shards": shards,
+                "session_ttl": self.session_ttl,
+                "history_limit": self.history_limit,
+                "history_codec": f"{self.codec.serializer}+{self.codec.compression}",
+                "near_cache": self.near_cache.stats() if self.near_cache else None,
+                "archive": self.archive.stats() if self.archive else None,
+                "connection": self.get_connection_stats()
             }
         else:
             return {
                 "total_sessions": len(self.fallback_sessions),
                 "storage_type": "in-memory (fallback)",
-                "session_ttl": self.session_ttl
+                "session_ttl": self.session_ttl,
+                "history_limit": self.history_limit,
+                "fallback_store": self.fallback_sessions.stats(),
+                "archive": self.archive.stats() if self.archive else None,
+                "connection": self.get_connection_stats()
             }
@@ -0,0 +1,204 @@
+"""
+Session Shards - Consistent-hash placement of sessions on several Redis nodes
+Every key of a session lives on the node that owns its session id on a hash
+ring. Each node is placed on the ring at many pseudo-random points (virtual
+nodes), so sessions spread evenly, and adding a node only moves the sessions
+whose nearest point now belongs to it (about 1/N of them).
+
+Nodes are named "host:port/db"; the name alone decides a node's points, so
+the same node list always gives the same placement in every worker.
+
+While sessions are being moved after the node list changed, the previous
+list is kept as a second ring, so the node that held a session before the
+change can still be found.
+"""
+
+import bisect
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+
+def parse_nodes(spec: str, default_db: int = 0) -> List[Tuple[str, int, int]]:
+    """
+    "host:port[/db],host:port[/db],..." → [(host, port, db), ...]
+
+    Args:
+        spec: Comma-separated node list (as in REDIS_NODES)
+        default_db: Database of nodes given without one
+    """
+    nodes = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        address, _, db = item.partition("/")
+        host, _, port = address.rpartition(":")
+        if not host:
+            host, port = address, "6379"
+        nodes.append((host, int(port), int(db) if db else default_db))
+    return nodes
+
+
+def node_name(host: str, port: int, db: int) -> str:
+    return f"{host}:{port}/{db}"
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes.
+
+    Positions are 64-bit BLAKE2b hashes, so placement is identical across
+    processes and Python versions (unlike hash()).
+    """
+
+    def __init__(self, nodes: List[str] = (), vnodes: int = 160):
+        """
+        Args:
+            nodes: Node names
+            vnodes: Ring points per node (more = more even spread, bigger ring)
+        """
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.vnodes):
+            point = self._hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def node_for(self, key: str) -> str:
+        """Owner of a key: the first ring point clockwise from the key's hash"""
+        if not self._points:
+            raise LookupError("hash ring has no nodes")
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class PoolExhaustedError(redis.ConnectionError):
+    """Every pooled connection stayed busy for the whole pool timeout (Redis itself may be fine)"""
+
+
+class MeteredConnectionPool(redis.BlockingConnectionPool):
+    """
+    Connection pool that waits (up to `timeout`) for a free connection
+    instead of opening unbounded ones, and counts how often it ran full.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.saturated_checkouts = 0  # requested while every connection was in use
+        self.exhausted = 0  # no connection freed up within the timeout
+        self.wait_seconds = 0.0
+        self.peak_in_use = 0
+
+    def _counts(self) -> Tuple[int, int]:
+        """(connections in use, idle connections)"""
+        idle = sum(1 for connection in list(self.pool.queue) if connection is not None)
+        return len(self._connections) - idle, idle
+
+    def get_connection(self, *args, **kwargs):
+        saturated = self._counts()[0] >= self.max_connections
+        started = time.perf_counter()
+        try:
+            return super().get_connection(*args, **kwargs)
+        except redis.ConnectionError as e:
+            if self.timeout is not None and time.perf_counter() - started >= self.timeout:
+                with self._metrics_lock:
+                    self.exhausted += 1
+                raise PoolExhaustedError(f"no Redis connection free after {self.timeout}s") from e
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            in_use = self._counts()[0]
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.saturated_checkouts += saturated
+                self.wait_seconds += waited if saturated else 0.0
+                self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def stats(self) -> Dict:
+        in_use, idle = self._counts()
+        with self._metrics_lock:
+            return {
+                "max_connections": self.max_connections,
+                "in_use": in_use,
+                "idle": idle,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "saturated_checkouts": self.saturated_checkouts,
+                "exhausted": self.exhausted,
+                "saturated_wait_ms": round(self.wait_seconds * 1000, 3),
+            }
+
+
+class SessionShards:
+    """
+    One connection pool and client per Redis node, shared by every caller in
+    the process, plus the ring that maps session ids to them.
+    """
+
+    def __init__(self, nodes: List[Tuple[str, int, int]], password: Optional[str] = None,
+                 vnodes: int = 160, max_connections: int = 50, pool_timeout: float = 5.0,
+                 previous_nodes: List[Tuple[str, int, int]] = (), **connection_options):
+        """
+        Args:
+            nodes: (host, port, db) of every node
+            password: Password shared by all nodes
+            vnodes: Ring points per node
+            max_connections: Connection limit of each node's pool
+            pool_timeout: Seconds a command waits for a free connection
+            previous_nodes: Node list before the last change, while sessions
+                            are being moved (nodes removed since then still
+                            get a client, but no ring points)
+            connection_options: Passed to every connection (timeouts, keepalive, health checks)
+        """
+        self.pools: Dict[str, MeteredConnectionPool] = {}
+        self.clients: Dict[str, redis.Redis] = {}
+        for host, port, db in list(nodes) + [node for node in previous_nodes if node not in nodes]:
+            name = node_name(host, port, db)
+            self.pools[name] = MeteredConnectionPool(
+                max_connections=max_connections, timeout=pool_timeout,
+                host=host, port=port, db=db, password=password, **connection_options
+            )
+            self.clients[name] = redis.Redis(connection_pool=self.pools[name])
+        self.ring = HashRing([node_name(*node) for node in nodes], vnodes)
+        self.previous_ring = HashRing([node_name(*node) for node in previous_nodes], vnodes) if previous_nodes else None
+
+    def node_for(self, session_id: str) -> str:
+        return self.ring.node_for(session_id)
+
+    def previous_node_for(self, session_id: str) -> Optional[str]:
+        """Owner under the previous node list (None when no move is in progress)"""
+        return self.previous_ring.node_for(session_id) if self.previous_ring is not None else None
+
+    def client_for(self, session_id: str) -> redis.Redis:
+        return self.clients[self.ring.node_for(session_id)]
+
+    def ping(self):
+        """Raise if any node is unreachable"""
+        for client in self.clients.values():
+            client.ping()
+
+    def pool_stats(self) -> Dict[str, Dict]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def __len__(self) -> int:
+        return len(self.clients)
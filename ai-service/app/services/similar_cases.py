@@ -0,0 +1,130 @@
+"""
+Similar Cases - MinHash LSH index over case symptom sets
+Finds historical cases whose symptom sets overlap most with the user's
+(Jaccard similarity) without comparing against every case: each case is
+sketched with MinHash, bands of the sketch are bucketed, and only cases
+sharing a bucket with the query are scored exactly
+"""
+
+import zlib
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Sketch shape: NUM_PERM = BANDS × ROWS_PER_BAND. Two rows per band keeps
+# recall high for the short symptom lists users give (a query naming 2 of a
+# case's 5 symptoms has Jaccard 0.4 and is found with ~94% probability).
+NUM_PERM = 32
+BANDS = 16
+
+# Mersenne prime for the universal hash family h(x) = (a·x + b) mod P
+_PRIME = np.uint64((1 << 31) - 1)
+_EMPTY = np.uint64(np.iinfo(np.uint64).max)
+
+
+def _term_hash(term: str) -> int:
+    """Stable across processes (unlike hash()), so compiled indexes stay valid"""
+    return zlib.crc32(term.encode("utf-8")) % int(_PRIME)
+
+
+class MinHashLSH:
+    """
+    LSH index over a list of term sets (row i = dataset row position i).
+
+    Storage per case is the padded term-id row (for exact re-ranking) plus
+    one (key, position) pair per band kept sorted, so lookups are binary
+    searches and the index pickles as a few flat arrays.
+    """
+
+    def __init__(self, term_sets: List[Iterable[str]], num_perm: int = NUM_PERM,
+                 bands: int = BANDS, seed: int = 7):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, np.iinfo(np.int64).max, self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+
+        # Term vocabulary and padded term-id matrix
+        self.vocabulary: Dict[str, int] = {}
+        rows = []
+        for terms in term_sets:
+            rows.append(sorted({self.vocabulary.setdefault(t, len(self.vocabulary)) for t in terms if t}))
+        width = max((len(r) for r in rows), default=0)
+        self.term_ids = np.full((len(rows), max(width, 1)), -1, dtype=np.int32)
+        for i, ids in enumerate(rows):
+            self.term_ids[i, :len(ids)] = ids
+        self.set_sizes = (self.term_ids >= 0).sum(axis=1).astype(np.int32)
+
+        # Per-term hash under every permutation (vocab × num_perm)
+        x = np.array([_term_hash(t) for t in self.vocabulary], dtype=np.uint64)
+        self._term_minhash = (x[:, None] * self._a[None, :] + self._b[None, :]) % _PRIME
+
+        # Row signatures are the column-wise minimum over the row's terms
+        padded = np.vstack([self._term_minhash, np.full((1, num_perm), _EMPTY, dtype=np.uint64)])
+        signatures = padded[self.term_ids].min(axis=1)
+        indexed = np.flatnonzero(self.set_sizes > 0)
+        keys = self._band_keys(signatures[indexed])
+
+        order = np.argsort(keys, axis=0, kind="stable")
+        self._sorted_keys = np.take_along_axis(keys, order, axis=0).T.copy()
+        self._positions = indexed[order].T.astype(np.int32).copy()
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(n, num_perm) signatures → (n, bands) bucket keys (uint64 arithmetic wraps)"""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows_per_band)
+        return (banded * self._band_mix).sum(axis=2)
+
+    def query(self, terms: Iterable[str], k: int = 3, candidate_mask: Optional[np.ndarray] = None,
+              min_similarity: float = 0.2) -> List[Tuple[int, float]]:
+        """
+        Find the cases most similar to a symptom set
+
+        Args:
+            terms: Canonical symptom terms
+            k: Number of cases to return
+            candidate_mask: Optional boolean row mask (e.g. species facet)
+            min_similarity: Minimum Jaccard similarity
+
+        Returns:
+            List of (row position, Jaccard similarity), most similar first
+        """
+        query_terms = set(terms)
+        ids = np.array(sorted({self.vocabulary[t] for t in query_terms if t in self.vocabulary}), dtype=np.intp)
+        if ids.size == 0:
+            return []
+
+        signature = self._term_minhash[ids].min(axis=0)
+        keys = self._band_keys(signature[None, :])[0]
+        buckets = []
+        for band, key in enumerate(keys):
+            sorted_keys = self._sorted_keys[band]
+            lo = np.searchsorted(sorted_keys, key, side="left")
+            hi = np.searchsorted(sorted_keys, key, side="right")
+            if hi > lo:
+                buckets.append(self._positions[band, lo:hi])
+        if not buckets:
+            return []
+        candidates = np.unique(np.concatenate(buckets))
+        if candidate_mask is not None:
+            candidates = candidates[candidate_mask[candidates]]
+        if candidates.size == 0:
+            return []
+
+        # Exact Jaccard on the (few) candidates
+        shared = np.isin(self.term_ids[candidates], ids).sum(axis=1)
+        similarity = shared / (self.set_sizes[candidates] + len(query_terms) - shared)
+        best = np.argsort(-similarity, kind="stable")[:k]
+        return [(int(candidates[i]), round(float(similarity[i]), 3))
+                for i in best if similarity[i] >= min_similarity]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.term_ids.nbytes + self.set_sizes.nbytes + self._term_minhash.nbytes
+                   + self._sorted_keys.nbytes + self._positions.nbytes)
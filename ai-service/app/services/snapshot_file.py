@@ -0,0 +1,81 @@
+"""
+Snapshot File - On-disk DatasetSnapshot whose arrays can be mapped, not copied
+A snapshot is pickled with protocol 5 and its array data (the numpy buffers
+behind the tables, facet indexes, scorer and LSH signatures) written out of
+band to a second file next to it. Processes that load it shared map that
+file read-only, so every retrieval worker reads the same pages from the OS
+page cache instead of holding a private copy. Only the in-band remainder
+(Python objects such as the snippet text and the expansion lookup) is
+unpickled into each process.
+
+Files:
+    snapshot.pkl      buffer layout [(offset, nbytes), ...], then the pickle
+    snapshot.buffers  the out-of-band buffers, each 64-byte aligned
+"""
+
+import mmap
+import os
+import pickle
+from pathlib import Path
+
+# Alignment of each buffer in the .buffers file (cache line, any dtype)
+BUFFER_ALIGN = 64
+
+
+def buffers_path(path) -> Path:
+    return Path(path).with_suffix(".buffers")
+
+
+def dump_snapshot(snapshot, path):
+    """
+    Write a snapshot to path and its array buffers next to it
+
+    Both files are written under temporary names and renamed into place, so
+    a process still mapping the previous files keeps valid pages.
+    """
+    path = Path(path)
+    buffers = []
+    payload = pickle.dumps(snapshot, protocol=5, buffer_callback=buffers.append)
+
+    layout, offset = [], 0
+    partial_buffers = path.with_name(path.name + ".buffers.tmp")
+    with open(partial_buffers, "wb") as f:
+        for buffer in buffers:
+            raw = buffer.raw()
+            offset += -offset % BUFFER_ALIGN
+            f.seek(offset)
+            f.write(raw)
+            layout.append((offset, raw.nbytes))
+            offset += raw.nbytes
+
+    partial = path.with_name(path.name + ".tmp")
+    with open(partial, "wb") as f:
+        pickle.dump(layout, f, protocol=5)
+        f.write(payload)
+    os.replace(partial_buffers, buffers_path(path))
+    os.replace(partial, path)
+
+
+def read_snapshot(path, shared: bool = False):
+    """
+    Load a snapshot written by dump_snapshot
+
+    Args:
+        path: The snapshot.pkl file
+        shared: Map the array buffers read-only instead of copying them (the
+                arrays are then read-only and shared with every other process
+                mapping the same file)
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        layout = pickle.load(f)
+        payload = f.read()
+    with open(buffers_path(path), "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if shared and size:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = bytearray(size)
+            f.readinto(data)
+    view = memoryview(data)
+    return pickle.loads(payload, buffers=[view[offset:offset + nbytes] for offset, nbytes in layout])
@@ -0,0 +1,210 @@
+"""
+Places benchmark: latency of the OpenStreetMap vet search against a local
+stand-in Nominatim server.
+
+The stand-in serves /reverse and /search with a fixed per-request latency
+(plus jitter). The user's latitude selects a scenario:
+  - city: vets in the user's city
+  - radius_50km: nothing in the city or the 25 km box, vets within 50 km
+  - country: only the country-wide search finds vets
+  - nothing: no search finds anything
+  - slow: every request takes longer than the per-request timeout
+
+Strategies:
+  - sequential: the original step-by-step search (reverse geocode, city,
+    25/50/100 km boxes, country), each request with the same timeout
+  - parallel: PlacesService._search_openstreetmap; the stand-in is not the
+    public server, so this is the concurrent (self-hosted) search
+
+Reports p50/p95/max latency and the tier returned per scenario and
+strategy, and writes everything as JSON for comparing runs.
+
+Run: python benchmark_places.py [--runs 5] [--latency-ms 150] [--output places_benchmark.json]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+
+from app.services.places_service import NOMINATIM_HEADERS, RADIUS_TIERS, PlacesService
+
+SCENARIOS = {10.0: "city", 20.0: "radius_50km", 30.0: "country", 40.0: "nothing", 50.0: "slow"}
+
+
+def make_places(tier, count):
+    """Fake Nominatim results; place ids start with the tier that found them"""
+    return [{
+        "place_id": f"{tier}-{i}",
+        "name": f"{tier.title()} Vet {i}",
+        "display_name": f"{tier.title()} Vet {i}, Main Street, {tier.title()}burg, Testland",
+    } for i in range(count)]
+
+
+class StandInNominatim(BaseHTTPRequestHandler):
+    """Answers like Nominatim for the scenario picked by the request's coordinates"""
+
+    latency = 0.15
+    slow_latency = 5.0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/reverse":
+            # The city and country names carry the scenario into the later searches
+            scenario = SCENARIOS.get(round(float(params["lat"]), 1))
+            body = {"address": {"city": f"{scenario}-ville", "country": f"{scenario}-land"}}
+        else:
+            scenario, body = self.search(params)
+
+        time.sleep(self.slow_latency if scenario == "slow" else self.latency * random.uniform(0.8, 1.2))
+        payload = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out or stopped waiting (as the deadline intends)
+
+    @staticmethod
+    def search(params):
+        query = params.get("q", "")
+        if "viewbox" in params:
+            west, north, east, south = map(float, params["viewbox"].split(","))
+            scenario = SCENARIOS.get(round((north + south) / 2, 1))
+            delta = (east - west) / 2
+            found = scenario == "radius_50km" and delta >= 0.5
+            return scenario, make_places("nearby", 10) if found else []
+        if query.startswith("veterinary clinic ") and query.endswith("-land"):
+            scenario = query[len("veterinary clinic "):-len("-land")]
+            return scenario, make_places("country", 5) if scenario == "country" else []
+        if query.endswith("-ville"):
+            scenario = query[len("veterinary "):-len("-ville")]
+            return scenario, make_places("city", 10) if scenario == "city" else []
+        return None, []
+
+
+def found_tier(results):
+    """Tier that produced the results (from the stand-in's place ids), or None"""
+    if not results:
+        return None
+    first = results[0]
+    return str(first.get("place_id", first.get("id"))).split("-")[0]
+
+
+def sequential_search(service, lat, lng):
+    """The original search order, one request at a time"""
+    url = f"{service.nominatim_url}/search"
+    timeout = service.request_timeout
+
+    def get(endpoint_url, params):
+        try:
+            return requests.get(endpoint_url, params=params, headers=NOMINATIM_HEADERS, timeout=timeout).json()
+        except Exception:
+            return None
+
+    reverse = get(f"{service.nominatim_url}/reverse", {'lat': lat, 'lon': lng, 'format': 'json'}) or {}
+    addr = reverse.get('address', {})
+    city, country = addr.get('city'), addr.get('country', '')
+    if city:
+        data = get(url, {'q': f'veterinary {city}', 'format': 'json', 'limit': 10, 'addressdetails': 1})
+        if data:
+            return data
+    for delta, label in RADIUS_TIERS:
+        data = get(url, {'q': 'veterinary', 'format': 'json', 'limit': 10, 'bounded': 1, 'addressdetails': 1,
+                         'viewbox': f"{lng-delta},{lat+delta},{lng+delta},{lat-delta}"})
+        if data:
+            return data
+    if country:
+        data = get(url, {'q': f'veterinary clinic {country}', 'format': 'json', 'limit': 5, 'addressdetails': 1})
+        if data:
+            return data
+    return []
+
+
+def parallel_search(service, lat, lng):
+    return service._search_openstreetmap(lat, lng)
+
+
+def summarize(latencies, tiers):
+    latencies = np.array(latencies)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "max_ms": round(float(latencies.max()), 1),
+        "tiers": sorted(set(str(t) for t in tiers)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OpenStreetMap vet search")
+    parser.add_argument("--runs", type=int, default=5, help="Searches per scenario and strategy")
+    parser.add_argument("--latency-ms", type=float, default=150, help="Stand-in server latency per request")
+    parser.add_argument("--slow-latency-ms", type=float, default=5000, help="Latency in the 'slow' scenario")
+    parser.add_argument("--skip-sequential", action="store_true", help="Only run the parallel search")
+    parser.add_argument("--output", default="places_benchmark.json")
+    args = parser.parse_args()
+
+    StandInNominatim.latency = args.latency_ms / 1000
+    StandInNominatim.slow_latency = args.slow_latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInNominatim)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    service = PlacesService()
+    service.nominatim_url = f"http://127.0.0.1:{server.server_port}"
+    strategies = {"parallel": parallel_search}
+    if not args.skip_sequential:
+        strategies = {"sequential": sequential_search, **strategies}
+
+    results = {}
+    for lat, scenario in SCENARIOS.items():
+        results[scenario] = {}
+        for name, search in strategies.items():
+            latencies, tiers = [], []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                found = search(service, lat, 0.0)
+                latencies.append((time.perf_counter() - started) * 1000)
+                tiers.append(found_tier(found))
+            results[scenario][name] = summarize(latencies, tiers)
+    server.shutdown()
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "runs": args.runs,
+        "latency_ms": args.latency_ms,
+        "slow_latency_ms": args.slow_latency_ms,
+        "request_timeout_s": service.request_timeout,
+        "search_deadline_s": service.search_deadline,
+        "scenarios": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'='*78}")
+    print(f"Places search benchmark — {args.latency_ms:.0f} ms per request, "
+          f"timeout {service.request_timeout:.0f}s, deadline {service.search_deadline:.0f}s")
+    print(f"{'='*78}")
+    print(f"  {'scenario':<13} {'strategy':<11} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}  tier")
+    for scenario, by_strategy in results.items():
+        for name, m in by_strategy.items():
+            print(f"  {scenario:<13} {name:<11} {m['p50_ms']:>9.1f} {m['p95_ms']:>9.1f} {m['max_ms']:>9.1f}  "
+                  f"{', '.join(m['tiers'])}")
+    print(f"\nResults written to {args.output}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Retrieval benchmark: quality and latency of each DatasetService retrieval backend.
+
+Labeled queries come from the datasets themselves:
+  - owner_notes: owner observations from 01_pet_health_symptoms.csv, searched
+    against that dataset; a hit is another record with the same `condition`
+  - disease_symptoms: the symptom list of a 02_animal_disease_prediction.csv
+    row, searched against that dataset; a hit is another record with the
+    same `Disease_Prediction`
+
+Backends:
+  - substring: the original whole-query substring scan
+  - terms: synonym-expanded term matching (what DatasetService serves)
+  - bm25: Okapi BM25 over stemmed tokens
+  - lsh: MinHash LSH over recognized symptom sets
+
+Reports recall@1, recall@k, MRR@k, p50/p99 latency and index memory per task
+and backend, and writes everything as JSON for comparing runs.
+
+Run: python benchmark_retrieval.py [--queries 300] [--k 5] [--output benchmark_results.json]
+"""
+
+import argparse
+import json
+import math
+import platform
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.services.dataset_service import APP_ROOT, load_snapshot
+from app.core.llm import EMERGENCY_KEYWORDS, INTENT_KEYWORDS
+from app.services.dataset_normalize import SYMPTOM_SYNONYMS
+from app.services.query_expansion import STOPWORDS, QueryExpander, stem, tokenize
+from app.services.similar_cases import MinHashLSH
+
+
+def measure_memory(build):
+    """Build an index and return it with the bytes it holds on to"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    index = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return index, max(after - before, 0)
+
+
+class BM25Index:
+    """Okapi BM25 over stemmed, stopword-free tokens (k1=1.2, b=0.75)"""
+
+    def __init__(self, documents, k1=1.2, b=0.75):
+        self.k1, self.b = k1, b
+        self.postings = defaultdict(list)
+        lengths = []
+        for doc_id, text in enumerate(documents):
+            terms = Counter(self.analyze(text))
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc_id, tf))
+        self.lengths = np.array(lengths, dtype=np.float32)
+        self.avg_length = float(self.lengths.mean()) if len(lengths) else 0.0
+        n = len(lengths)
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+
+    @staticmethod
+    def analyze(text):
+        return [stem(w) for w in tokenize(text) if w not in STOPWORDS]
+
+    def search(self, query, k):
+        scores = defaultdict(float)
+        for term in set(self.analyze(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return [doc for doc, _ in sorted(scores.items(), key=lambda item: -item[1])[:k]]
+
+
+def build_tasks(snapshot, num_queries, rng):
+    """Labeled query sets, one dict per task (dataset, search columns, corpus texts, labels, query rows/texts)"""
+    tasks = []
+
+    symptoms = snapshot.datasets.get('symptoms')
+    if symptoms is not None:
+        owner_rows = np.flatnonzero((symptoms['record_type'].astype(str) == 'Owner Observation').to_numpy())
+        picked = rng.choice(owner_rows, size=min(num_queries, len(owner_rows)), replace=False)
+        tasks.append({
+            "name": "owner_notes",
+            "dataset": "symptoms",
+            "columns": ["text", "condition"],
+            "corpus": symptoms['text'].astype(str).tolist(),
+            "labels": symptoms['condition'].astype(str).to_numpy(),
+            "rows": picked,
+            "queries": [str(symptoms['text'].iat[i]) for i in picked],
+        })
+
+    diseases = snapshot.datasets.get('diseases')
+    if diseases is not None:
+        symptom_columns = [c for c in ['Symptom_1', 'Symptom_2', 'Symptom_3', 'Symptom_4'] if c in diseases.columns]
+        corpus = [", ".join(t for t in row if isinstance(t, str))
+                  for row in diseases[symptom_columns].astype(object).to_numpy()]
+        picked = rng.choice(len(diseases), size=min(num_queries, len(diseases)), replace=False)
+        tasks.append({
+            "name": "disease_symptoms",
+            "dataset": "diseases",
+            "columns": None,
+            "corpus": corpus,
+            "labels": diseases['Disease_Prediction'].astype(str).to_numpy(),
+            "rows": picked,
+            "queries": [corpus[i] for i in picked],
+        })
+    return tasks
+
+
+def build_backends(snapshot, task):
+    """Backend name → (search(query, k) → row positions, index bytes)"""
+    name, columns = task["dataset"], task["columns"]
+    frame = snapshot.datasets[name]
+    text_columns = [c for c in (columns or frame.columns)
+                    if not pd.api.types.is_bool_dtype(frame[c])]
+    lowered = {c: frame[c].astype(object).where(frame[c].notna(), "").astype(str).str.lower() for c in text_columns}
+
+    def substring(query, k):
+        needle = " ".join(query.lower().split())
+        mask = np.zeros(len(frame), dtype=bool)
+        for series in lowered.values():
+            mask |= series.str.contains(needle, regex=False).to_numpy()
+        return np.flatnonzero(mask)[:k].tolist()
+
+    def terms(query, k):
+        return snapshot._match_positions(name, snapshot.prepare_query(query), k, columns).tolist()
+
+    bm25, bm25_bytes = measure_memory(lambda: BM25Index(task["corpus"]))
+
+    expander = snapshot.query_expander
+    lsh, lsh_bytes = measure_memory(lambda: MinHashLSH([expander.expand(t).symptoms for t in task["corpus"]]))
+
+    def minhash(query, k):
+        return [position for position, _ in lsh.query(expander.expand(query).symptoms, k=k, min_similarity=0.0)]
+
+    # The term backend's only index is the expansion dictionary (it scans the pool-coded columns)
+    _, terms_bytes = measure_memory(lambda: QueryExpander(
+        expander.vocabulary, SYMPTOM_SYNONYMS, INTENT_KEYWORDS.get("symptom", []) + EMERGENCY_KEYWORDS))
+    return {
+        "substring": (substring, 0),
+        "terms": (terms, terms_bytes),
+        "bm25": (bm25.search, bm25_bytes),
+        "lsh": (minhash, lsh_bytes),
+    }
+
+
+def evaluate(search, task, k):
+    """Leave-one-out: the query's own row never counts as a hit"""
+    hits_at_1 = hits_at_k = 0
+    reciprocal_ranks = []
+    latencies = []
+    labels = task["labels"]
+    for row, query in zip(task["rows"], task["queries"]):
+        started = time.perf_counter()
+        results = search(query, k + 1)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        results = [r for r in results if r != row][:k]
+        rank = next((i for i, r in enumerate(results, 1) if labels[r] == labels[row]), None)
+        hits_at_1 += rank == 1
+        hits_at_k += rank is not None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+    n = max(len(task["queries"]), 1)
+    latencies = np.array(latencies)
+    return {
+        "recall@1": round(hits_at_1 / n, 4),
+        f"recall@{k}": round(hits_at_k / n, 4),
+        f"mrr@{k}": round(float(np.mean(reciprocal_ranks)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DatasetService retrieval backends")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per task")
+    parser.add_argument("--k", type=int, default=5, help="Cutoff for recall and MRR")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    snapshot = load_snapshot(APP_ROOT / "datasets" / "01_raw_data")
+    rng = np.random.default_rng(args.seed)
+
+    results = {}
+    for task in build_tasks(snapshot, args.queries, rng):
+        results[task["name"]] = {"queries": len(task["queries"]), "backends": {}}
+        for backend, (search, index_bytes) in build_backends(snapshot, task).items():
+            metrics = evaluate(search, task, args.k)
+            metrics["index_bytes"] = index_bytes
+            results[task["name"]]["backends"][backend] = metrics
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "dataset_version": snapshot.version,
+        "snapshot_source": snapshot.source,
+        "k": args.k,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "tasks": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'='*86}")
+    print(f"Retrieval benchmark — dataset {snapshot.version}, k={args.k}")
+    print(f"{'='*86}")
+    for task_name, task in results.items():
+        print(f"\n{task_name} ({task['queries']} queries)")
+        print(f"  {'backend':<10} {'R@1':>7} {'R@' + str(args.k):>7} {'MRR':>7} {'p50 ms':>9} {'p99 ms':>9} {'index KB':>10}")
+        for backend, m in task["backends"].items():
+            print(f"  {backend:<10} {m['recall@1']:>7.3f} {m[f'recall@{args.k}']:>7.3f} {m[f'mrr@{args.k}']:>7.3f} "
+                  f"{m['p50_ms']:>9.3f} {m['p99_ms']:>9.3f} {m['index_bytes'] / 1024:>10.1f}")
+    print(f"\nResults written to {args.output}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compile the raw veterinary CSVs into a ready-to-serve dataset snapshot.
+
+Normalizes species/symptom/condition labels, drops duplicate rows, builds the
+facet indexes, breed aggregates and diagnosis scorer, and writes them to
+datasets/02_compiled. DatasetService loads the compiled snapshot at startup
+(and on reload) as long as it matches the raw files, skipping ingestion and
+normalization entirely.
+
+Usage:
+    python compile_datasets.py [--raw DIR] [--out DIR] [--check]
+"""
+
+import argparse
+import sys
+
+from app.services.dataset_service import (
+    APP_ROOT, COMPILED_PATH, build_snapshot, load_compiled_snapshot, write_compiled_snapshot
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile veterinary datasets for DatasetService")
+    parser.add_argument("--raw", default=str(APP_ROOT / "datasets" / "01_raw_data"), help="Raw CSV directory")
+    parser.add_argument("--out", default=str(COMPILED_PATH), help="Compiled artifact directory")
+    parser.add_argument("--check", action="store_true", help="Only report whether the compiled snapshot is up to date")
+    args = parser.parse_args()
+
+    if args.check:
+        fresh = load_compiled_snapshot(args.raw, args.out) is not None
+        print("✓ Compiled datasets are up to date" if fresh else "⚠️  Compiled datasets are missing or stale")
+        return 0 if fresh else 1
+
+    snapshot = build_snapshot(args.raw)
+    manifest = write_compiled_snapshot(snapshot, args.out)
+
+    print(f"\n--- Compiled datasets {manifest['source_version']} → {args.out} ---")
+    for name, report in manifest["normalization"].items():
+        rewritten = sum(report["rewritten_values"].values())
+        print(f"{name}: {manifest['datasets'][name]} rows "
+              f"(dropped {report['duplicate_rows']} duplicates, "
+              f"{report['repeated_symptoms']} repeated symptoms, "
+              f"rewrote {rewritten} values)")
+    print(f"Diagnosis vocabulary: {manifest['diagnosis_vocabulary']} terms")
+    print(f"Query expansion dictionary: {manifest['expansion_phrases']} phrases")
+    print(f"Build time: {manifest['build_seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
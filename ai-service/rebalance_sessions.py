@@ -0,0 +1,42 @@
+"""
+Move Redis sessions to their owner node after the REDIS_NODES list changed.
+
+Sessions are placed on nodes by consistent hashing (see SessionShards), so
+adding a node only changes the owner of the sessions that now hash to it.
+Start the API workers with the new node list in REDIS_NODES and the old one
+in REDIS_PREVIOUS_NODES: until this script has run, a session is moved from
+its old node the first time a request uses it. Then run this once: it
+copies each remaining session (with its remaining TTL) from the node that
+holds it to its new owner and deletes the old copy. A session that was
+already started on its new owner (workers without REDIS_PREVIOUS_NODES) has
+the old copy merged in, old history first. Afterwards unset
+REDIS_PREVIOUS_NODES.
+
+Usage:
+    REDIS_NODES=host1:6379,host2:6379,host3:6379 REDIS_PREVIOUS_NODES=host1:6379,host2:6379 \
+        python rebalance_sessions.py
+"""
+
+import sys
+
+from app.services.session_service import SessionService
+
+
+def main():
+    service = SessionService()
+    if not service.redis_available:
+        print("⚠️  Redis unavailable, nothing to rebalance")
+        return 1
+
+    report = service.rebalance_shards()
+    print(f"\n--- Rebalanced sessions across {len(report)} nodes ---")
+    for node, counts in report.items():
+        print(f"{node}: {counts['sessions']} sessions, moved {counts['moved']}, "
+              f"merged {counts['merged']} into copies already on their new node")
+        if counts['kept']:
+            print(f"   ⚠️  {counts['kept']} sessions in the old layout could not be merged and were left in place")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())